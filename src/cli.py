@@ -15,6 +15,7 @@ import yaml
 # Добавляем путь к модулям
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.orchestrator import setup_logging
 from src.orchestrator.main_orchestrator import LocalSwarmOrchestrator
 from src.quality_gates import (
     QualityGateOrchestrator,
@@ -130,7 +131,7 @@ class LocalSwarmCLI:
 
         return parser
 
-    def run_task(self, args) -> int:
+    async def run_task(self, args) -> int:
         """Выполнить задачу"""
         # Получить описание задачи
         task_description = args.task
@@ -172,8 +173,8 @@ class LocalSwarmCLI:
             # Собираем контекст проекта синхронно
             project_context = f"Project: {project_path.name}\nPath: {project_path}"
 
-            # Запуск (синхронный метод)
-            result = orchestrator.run(task_description, project_context)
+            # Запуск: задачи плана выполняются конкурентно
+            result = await orchestrator.arun(task_description, project_context)
 
             # Вывод результата
             print()
@@ -319,7 +320,7 @@ class LocalSwarmCLI:
             return 0
 
         if args.command == "run":
-            return self.run_task(args)  # Синхронный вызов
+            return await self.run_task(args)
         elif args.command == "check":
             return await self.run_check(args)
         elif args.command == "status":
@@ -332,6 +333,7 @@ class LocalSwarmCLI:
 
 def main():
     """Entry point"""
+    setup_logging()
     cli = LocalSwarmCLI()
     exit_code = asyncio.run(cli.main())
     sys.exit(exit_code)
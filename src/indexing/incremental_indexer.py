@@ -10,6 +10,7 @@ Git-aware индексация:
 
 import asyncio
 import hashlib
+import inspect
 import subprocess
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -183,6 +184,14 @@ class GitChangeDetector:
         return hashlib.sha256(content).hexdigest()
 
 
+async def _call_embedder(fn, arg):
+    """Вызывает embedder (sync или async, как embed_fn в HybridSearchEngine)."""
+    result = fn(arg)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 class IncrementalIndexer:
     """
     Incremental indexer с git-aware updates.
@@ -221,11 +230,13 @@ class IncrementalIndexer:
         qdrant_client: QdrantClient,
         chunker,  # ASTChunker
         embedder,  # Embedding function
+        batch_embedder=None,  # list[str] -> np.ndarray, опционально
     ):
         self.repo_path = repo_path
         self.client = qdrant_client
         self.chunker = chunker
         self.embedder = embedder
+        self.batch_embedder = batch_embedder
         self.git = GitChangeDetector(repo_path)
 
     async def index(
@@ -538,9 +549,13 @@ class IncrementalIndexer:
 
         for i in range(0, len(texts), batch_size):
             batch = texts[i:i + batch_size]
-            batch_embeddings = await asyncio.gather(
-                *[asyncio.to_thread(self.embedder, text) for text in batch]
-            )
+            if self.batch_embedder:
+                # Один вызов на батч вместо вызова на каждый текст
+                batch_embeddings = await _call_embedder(self.batch_embedder, batch)
+            else:
+                batch_embeddings = await asyncio.gather(
+                    *[_call_embedder(self.embedder, text) for text in batch]
+                )
             embeddings.extend(batch_embeddings)
 
         return embeddings
@@ -66,9 +66,10 @@ class QdrantSchemaManager:
         self,
         host: str = "localhost",
         port: int = 6333,
-        config: QdrantConfig = None
+        config: QdrantConfig = None,
+        client: QdrantClient = None
     ):
-        self.client = QdrantClient(host=host, port=port)
+        self.client = client or QdrantClient(host=host, port=port)
         self.config = config or QdrantConfig()
 
     def create_all_collections(self, recreate: bool = False):
@@ -0,0 +1,30 @@
+"""
+Subprocess Limits
+
+Общий лимит одновременных git/npx процессов для интеграций.
+"""
+
+import asyncio
+import os
+import weakref
+
+# Максимум одновременных дочерних процессов (env: CLAUDE_AUTO_DEV_MAX_SPAWN)
+MAX_SPAWN = int(
+    os.environ.get("CLAUDE_AUTO_DEV_MAX_SPAWN", 0)
+    or max(4, os.cpu_count() or 4)
+)
+
+# Семафор на каждый event loop: asyncio примитивы привязаны к своему loop
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def spawn_semaphore() -> asyncio.Semaphore:
+    """Семафор лимита процессов для текущего event loop"""
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(MAX_SPAWN)
+        _semaphores[loop] = sem
+    return sem
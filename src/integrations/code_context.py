@@ -160,7 +160,7 @@ class CodeContextManager:
 
         # Получить обзор проекта
         if not self._overview_cache:
-            self._overview_cache = await self.serena.get_symbols_overview()
+            self._overview_cache = await self.serena.get_symbols_overview(with_docstrings=True)
 
         context.total_files = self._overview_cache.files
         context.total_lines = self._overview_cache.lines
@@ -207,7 +207,9 @@ class CodeContextManager:
 
         # Символы из файлов
         for file_path in files:
-            overview = await self.serena.get_symbols_overview(file_path, depth=1)
+            overview = await self.serena.get_symbols_overview(
+                file_path, depth=1, with_docstrings=True
+            )
             context.relevant_symbols.extend(overview.symbols)
 
         # Код
@@ -296,7 +298,9 @@ class CodeContextManager:
         # Символы из указанных файлов
         if files:
             for file_path in files:
-                overview = await self.serena.get_symbols_overview(file_path, depth=1)
+                overview = await self.serena.get_symbols_overview(
+                    file_path, depth=1, with_docstrings=True
+                )
                 result_symbols.extend(overview.symbols)
 
         # Поиск по ключевым словам из описания задачи
@@ -6,14 +6,26 @@ Git Integration
 
 import asyncio
 import re
+import subprocess
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
+from ._procs import spawn_semaphore
 from .mcp_client import LocalMCPClient, MCPToolCall
 
 
+# Строка `git branch`: маркер текущей/worktree ветки, пробел, имя
+_BRANCH_RE = re.compile(r"^[ *+] (\S.*)$", re.MULTILINE)
+
+# Коды porcelain как int (элементы bytes)
+_STAGED_CODES = frozenset(b"MADRC")
+_CODE_MODIFIED = ord("M")
+_CODE_DELETED = ord("D")
+_CODE_UNTRACKED = ord("?")
+
+
 @dataclass
 class GitStatus:
     """Статус git репозитория"""
@@ -78,22 +90,63 @@ class GitIntegration:
             repo_path: Путь к репозиторию
         """
         self.repo_path = Path(repo_path)
+        self._repo_path_str = str(self.repo_path)
         self.client = LocalMCPClient(self.repo_path)
 
     async def _run_git(
         self,
         *args: str,
-        check: bool = True
-    ) -> Tuple[int, str, str]:
-        """Выполнить git команду"""
-        proc = await asyncio.create_subprocess_exec(
-            "git", *args,
-            cwd=str(self.repo_path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        check: bool = True,
+        want_stderr: bool = False,
+        want_bytes: bool = False
+    ) -> Tuple[int, Union[str, bytes], str]:
+        """
+        Выполнить git команду
+
+        Args:
+            want_stderr: Собирать stderr (иначе он уходит в DEVNULL)
+            want_bytes: Вернуть stdout как bytes без декодирования
+        """
+        async with spawn_semaphore():
+            proc = await asyncio.create_subprocess_exec(
+                "git", *args,
+                cwd=self._repo_path_str,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE if want_stderr else asyncio.subprocess.DEVNULL,
+            )
+
+            if want_stderr:
+                stdout, stderr = await proc.communicate()
+                output = stdout if want_bytes else stdout.decode()
+                return proc.returncode, output, stderr.decode()
+
+            # Читаем stdout кусками, без двойной буферизации communicate()
+            buf = bytearray()
+            while True:
+                chunk = await proc.stdout.read(65536)
+                if not chunk:
+                    break
+                buf += chunk
+            await proc.wait()
+
+            output = bytes(buf) if want_bytes else buf.decode()
+            return proc.returncode, output, ""
+
+    def _run_git_sync(self, args: Tuple[str, ...]) -> Tuple[int, str, str]:
+        """Синхронный git без preexec_fn — CPython использует posix_spawn"""
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=self._repo_path_str,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
         )
-        stdout, stderr = await proc.communicate()
-        return proc.returncode, stdout.decode(), stderr.decode()
+        return proc.returncode, proc.stdout.decode(), proc.stderr.decode()
+
+    async def _run_git_fast(self, *args: str) -> Tuple[int, str, str]:
+        """Короткая git команда в потоке, минуя child watcher asyncio"""
+        async with spawn_semaphore():
+            return await asyncio.to_thread(self._run_git_sync, args)
 
     async def get_status(self) -> GitStatus:
         """Получить статус репозитория"""
@@ -105,33 +158,47 @@ class GitIntegration:
             status.branch = branch.strip() or "HEAD"
 
         # Статус файлов
-        code, output, _ = await self._run_git("status", "--porcelain")
-        if code == 0:
-            for line in output.strip().split("\n"):
-                if not line:
-                    continue
+        self._parse_porcelain(await self._porcelain(), status)
+
+        status.is_clean = not status.has_changes
+        return status
 
-                status_code = line[:2]
-                file_path = line[3:].strip()
+    async def _porcelain(self) -> bytes:
+        """Вывод `git status --porcelain` (пустой при ошибке)"""
+        code, output, _ = await self._run_git("status", "--porcelain", want_bytes=True)
+        return output if code == 0 else b""
 
-                # Staged
-                if status_code[0] in "MADRC":
-                    status.staged.append(file_path)
+    async def _is_clean(self) -> bool:
+        """Проверка чистоты дерева одним вызовом git, без разбора строк"""
+        return not (await self._porcelain()).strip()
 
-                # Modified (unstaged)
-                if status_code[1] == "M":
-                    status.modified.append(file_path)
+    @staticmethod
+    def _parse_porcelain(output: bytes, status: GitStatus):
+        """Разложить вывод porcelain v1 по спискам GitStatus"""
+        for line in output.split(b"\n"):
+            if len(line) < 4:
+                continue
 
-                # Untracked
-                if status_code == "??":
-                    status.untracked.append(file_path)
+            # Коды как int — без декодирования всей строки
+            code0 = line[0]
+            code1 = line[1]
+            file_path = line[3:].rstrip().decode("utf-8", "surrogateescape")
 
-                # Deleted
-                if status_code[1] == "D" or status_code[0] == "D":
-                    status.deleted.append(file_path)
+            # Staged
+            if code0 in _STAGED_CODES:
+                status.staged.append(file_path)
 
-        status.is_clean = not status.has_changes
-        return status
+            # Modified (unstaged)
+            if code1 == _CODE_MODIFIED:
+                status.modified.append(file_path)
+
+            # Untracked
+            if code0 == _CODE_UNTRACKED and code1 == _CODE_UNTRACKED:
+                status.untracked.append(file_path)
+
+            # Deleted
+            if code1 == _CODE_DELETED or code0 == _CODE_DELETED:
+                status.deleted.append(file_path)
 
     async def get_diff(
         self,
@@ -172,7 +239,7 @@ class GitIntegration:
         args = [
             "log",
             f"-{limit}",
-            "--format=%H|%h|%s|%an|%aI",
+            "--format=%H|%h|%s|%an|%at",
         ]
         if file_path:
             args.extend(["--", file_path])
@@ -192,7 +259,7 @@ class GitIntegration:
                         short_hash=parts[1],
                         message=parts[2],
                         author=parts[3],
-                        date=datetime.fromisoformat(parts[4]),
+                        date=datetime.fromtimestamp(int(parts[4]), tz=timezone.utc),
                     ))
 
         return commits
@@ -202,12 +269,12 @@ class GitIntegration:
         if not files:
             return False
 
-        code, _, _ = await self._run_git("add", *files)
+        code, _, _ = await self._run_git_fast("add", *files)
         return code == 0
 
     async def stage_all(self) -> bool:
         """Добавить все изменения"""
-        code, _, _ = await self._run_git("add", "-A")
+        code, _, _ = await self._run_git_fast("add", "-A")
         return code == 0
 
     async def unstage_files(self, files: List[str]) -> bool:
@@ -215,7 +282,7 @@ class GitIntegration:
         if not files:
             return False
 
-        code, _, _ = await self._run_git("reset", "HEAD", *files)
+        code, _, _ = await self._run_git_fast("reset", "HEAD", *files)
         return code == 0
 
     async def commit(
@@ -237,7 +304,7 @@ class GitIntegration:
         if author:
             args.extend(["--author", author])
 
-        code, output, stderr = await self._run_git(*args)
+        code, _, _ = await self._run_git(*args)
 
         if code == 0:
             # Получить созданный коммит
@@ -283,17 +350,7 @@ class GitIntegration:
             args.append("-a")
 
         code, output, _ = await self._run_git(*args)
-
-        branches = []
-        if code == 0:
-            for line in output.strip().split("\n"):
-                branch = line.strip()
-                if branch.startswith("*"):
-                    branch = branch[2:]
-                if branch:
-                    branches.append(branch)
-
-        return branches
+        return _BRANCH_RE.findall(output) if code == 0 else []
 
     async def get_current_branch(self) -> str:
         """Текущая ветка"""
@@ -336,7 +393,7 @@ class GitIntegration:
         mode: str = "mixed"  # soft, mixed, hard
     ) -> bool:
         """Reset к ref"""
-        code, _, _ = await self._run_git("reset", f"--{mode}", ref)
+        code, _, _ = await self._run_git_fast("reset", f"--{mode}", ref)
         return code == 0
 
     async def show_commit(self, ref: str = "HEAD") -> str:
@@ -361,9 +418,7 @@ class GitIntegration:
         Returns:
             GitCommit или None
         """
-        status = await self.get_status()
-
-        if not status.has_changes:
+        if await self._is_clean():
             return None
 
         if files:
@@ -383,11 +438,13 @@ class GitIntegration:
 
     async def get_uncommitted_changes_summary(self) -> str:
         """Краткая сводка незакоммиченных изменений"""
-        status = await self.get_status()
-
-        if status.is_clean:
+        output = await self._porcelain()
+        if not output.strip():
             return "Working tree clean"
 
+        status = GitStatus()
+        self._parse_porcelain(output, status)
+
         parts = []
         if status.staged:
             parts.append(f"{len(status.staged)} staged")
@@ -5,11 +5,56 @@ MCP Client
 """
 
 import asyncio
+import copy
 import json
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import subprocess
+import time
+
+from ._procs import spawn_semaphore
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:  # orjson опционален — fallback на stdlib
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    import re2 as _re  # DFA без backtracking, если установлен google-re2
+except ImportError:
+    import re as _re
+
+# Заголовок кадра при Content-Length framing
+_MCP_HEADER_RE = _re.compile(rb"Content-Length:\s*(\d+)", _re.IGNORECASE)
+
+# Инструменты без побочных эффектов — их результаты можно кэшировать
+_READONLY_TOOLS = frozenset({
+    "read_file",
+    "list_directory",
+    "git_status",
+    "git_diff_unstaged",
+    "git_diff_staged",
+    "git_log",
+    "git_branch",
+})
+
+# Инструменты, после которых кэш результатов сбрасывается
+_WRITE_TOOLS = frozenset({
+    "write_file",
+    "create_directory",
+    "git_commit",
+    "git_add",
+})
 
 
 @dataclass
@@ -73,8 +118,18 @@ class MCPClient:
             working_dir: Рабочая директория для команд
         """
         self.working_dir = working_dir or Path.cwd()
+        self._working_dir_str = str(self.working_dir)
+        # server -> (command, args, cwd), собирается один раз
+        self._server_cmds = {
+            name: (cfg["command"], tuple(cfg["args"]), cfg.get("cwd"))
+            for name, cfg in self.MCP_SERVERS.items()
+        }
         self._processes: Dict[str, asyncio.subprocess.Process] = {}
         self._request_id = 0
+        # (server, tool, params) -> (время, результат) для read-only инструментов
+        self._tool_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, MCPToolResult]]" = OrderedDict()
+        self._tool_ttl = 1.0
+        self._tool_cache_size = 256
 
     async def _get_process(self, server: str) -> asyncio.subprocess.Process:
         """Получить или создать процесс для сервера"""
@@ -84,30 +139,93 @@ class MCPClient:
                 return proc
 
         # Запустить новый процесс
-        if server not in self.MCP_SERVERS:
+        server_cmd = self._server_cmds.get(server)
+        if server_cmd is None:
             raise ValueError(f"Unknown MCP server: {server}")
 
-        config = self.MCP_SERVERS[server]
-        cmd = [config["command"]] + config["args"]
-        cwd = config.get("cwd") or str(self.working_dir)
+        command, args, cwd = server_cmd
 
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=cwd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        # Семафор ограничивает только запуск: сервер живёт долго
+        async with spawn_semaphore():
+            proc = await asyncio.create_subprocess_exec(
+                command, *args,
+                cwd=cwd or self._working_dir_str,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
 
         self._processes[server] = proc
         return proc
 
+    async def _read_message(self, proc: asyncio.subprocess.Process) -> bytes:
+        """
+        Прочитать одно сообщение сервера
+
+        Поддерживает JSON построчно и кадры с заголовком Content-Length.
+        """
+        line = await proc.stdout.readline()
+        if not line[:15].lower().startswith(b"content-length:"):
+            return line
+
+        # Дочитываем заголовки до пустой строки
+        header = line
+        while line not in (b"\r\n", b"\n", b""):
+            line = await proc.stdout.readline()
+            header += line
+
+        match = _MCP_HEADER_RE.search(header)
+        if not match:
+            return b""
+        return await proc.stdout.readexactly(int(match.group(1)))
+
     def _next_request_id(self) -> int:
         """Следующий ID запроса"""
         self._request_id += 1
         return self._request_id
 
     async def call_tool(self, call: MCPToolCall, timeout: int = 30) -> MCPToolResult:
+        """
+        Вызвать инструмент с кэшированием read-only результатов
+
+        Args:
+            call: MCPToolCall с сервером, инструментом и параметрами
+            timeout: Таймаут в секундах
+
+        Returns:
+            MCPToolResult
+        """
+        if not self._ttl_cacheable(call):
+            result = await self._call_tool(call, timeout)
+            if call.tool in _WRITE_TOOLS:
+                self._tool_cache.clear()
+            return result
+
+        key = (call.server, call.tool, json.dumps(call.params, sort_keys=True, default=str))
+        cached = self._tool_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self._tool_ttl:
+            self._tool_cache.move_to_end(key)
+            return self._copy_result(cached[1])
+
+        result = await self._call_tool(call, timeout)
+        if result.success:
+            self._tool_cache[key] = (time.monotonic(), self._copy_result(result))
+            self._tool_cache.move_to_end(key)
+            if len(self._tool_cache) > self._tool_cache_size:
+                self._tool_cache.popitem(last=False)
+
+        return result
+
+    def _ttl_cacheable(self, call: MCPToolCall) -> bool:
+        """Кэшировать ли результат вызова на _tool_ttl секунд"""
+        return call.tool in _READONLY_TOOLS
+
+    @staticmethod
+    def _copy_result(result: MCPToolResult) -> MCPToolResult:
+        """Копия результата: вызывающий может изменять data, не портя кэш"""
+        return MCPToolResult(result.success, copy.deepcopy(result.data), result.error)
+
+    async def _call_tool(self, call: MCPToolCall, timeout: int = 30) -> MCPToolResult:
         """
         Вызвать инструмент MCP сервера
 
@@ -133,14 +251,14 @@ class MCPClient:
             proc = await self._get_process(call.server)
 
             # Отправляем запрос
-            request_bytes = (json.dumps(request) + "\n").encode()
+            request_bytes = _dumps(request) + b"\n"
             proc.stdin.write(request_bytes)
             await proc.stdin.drain()
 
             # Читаем ответ с таймаутом
             try:
                 response_line = await asyncio.wait_for(
-                    proc.stdout.readline(),
+                    self._read_message(proc),
                     timeout=timeout
                 )
 
@@ -150,7 +268,7 @@ class MCPClient:
                         error="Empty response from server"
                     )
 
-                response = json.loads(response_line.decode())
+                response = _loads(response_line)
 
                 if "error" in response:
                     return MCPToolResult(
@@ -190,7 +308,7 @@ class MCPClient:
         return await self.call_tool(MCPToolCall(
             server="git",
             tool="git_status",
-            params={"repo_path": str(self.working_dir)}
+            params={"repo_path": self._working_dir_str}
         ))
 
     async def git_diff(self, staged: bool = False) -> MCPToolResult:
@@ -199,7 +317,7 @@ class MCPClient:
         return await self.call_tool(MCPToolCall(
             server="git",
             tool=tool,
-            params={"repo_path": str(self.working_dir)}
+            params={"repo_path": self._working_dir_str}
         ))
 
     async def git_commit(self, message: str) -> MCPToolResult:
@@ -208,7 +326,7 @@ class MCPClient:
             server="git",
             tool="git_commit",
             params={
-                "repo_path": str(self.working_dir),
+                "repo_path": self._working_dir_str,
                 "message": message,
             }
         ))
@@ -249,10 +367,56 @@ class LocalMCPClient(MCPClient):
     Оптимизировано для полностью локальной работы.
     """
 
+    # Лимит LRU кэша read_file (суммарный размер содержимого)
+    READ_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
     def __init__(self, working_dir: Optional[Path] = None):
         super().__init__(working_dir)
+        # path -> (mtime_ns, content)
+        self._read_cache: "OrderedDict[Path, Tuple[int, str]]" = OrderedDict()
+        self._read_cache_bytes = 0
+
+    def _cache_get(self, path: Path, mtime_ns: int) -> Optional[str]:
+        """Содержимое из кэша, если файл не менялся"""
+        cached = self._read_cache.get(path)
+        if cached is None or cached[0] != mtime_ns:
+            return None
+        self._read_cache.move_to_end(path)
+        return cached[1]
+
+    def _cache_put(self, path: Path, mtime_ns: int, content: str):
+        """Положить содержимое в кэш и вытеснить старые записи"""
+        self._cache_invalidate(path)
+        self._read_cache[path] = (mtime_ns, content)
+        self._read_cache_bytes += len(content)
+
+        while self._read_cache_bytes > self.READ_CACHE_MAX_BYTES and self._read_cache:
+            _, (_, evicted) = self._read_cache.popitem(last=False)
+            self._read_cache_bytes -= len(evicted)
+
+    def _cache_invalidate(self, path: Path):
+        """Удалить path и всё под ним из кэша"""
+        cached = self._read_cache.pop(path, None)
+        if cached is not None:
+            self._read_cache_bytes -= len(cached[1])
+
+        stale = [p for p in self._read_cache if path in p.parents]
+        for p in stale:
+            self._read_cache_bytes -= len(self._read_cache.pop(p)[1])
+
+    # Серверы, инструменты которых выполняются локально
+    LOCAL_SERVERS = frozenset({"git", "filesystem"})
+
+    def _ttl_cacheable(self, call: MCPToolCall) -> bool:
+        """
+        TTL кэш — только для вызовов, ушедших на MCP серверы
 
-    async def call_tool(self, call: MCPToolCall, timeout: int = 30) -> MCPToolResult:
+        Локальные инструменты читают актуальное состояние (read_file
+        проверяет mtime сам), иначе правки вне клиента терялись бы на время TTL.
+        """
+        return call.server not in self.LOCAL_SERVERS and super()._ttl_cacheable(call)
+
+    async def _call_tool(self, call: MCPToolCall, timeout: int = 30) -> MCPToolResult:
         """Выполнить инструмент локально"""
         try:
             if call.server == "git":
@@ -261,71 +425,56 @@ class LocalMCPClient(MCPClient):
                 return await self._filesystem_tool(call.tool, call.params)
             else:
                 # Fallback к MCP серверу
-                return await super().call_tool(call, timeout)
+                return await super()._call_tool(call, timeout)
 
         except Exception as e:
             return MCPToolResult(success=False, error=str(e))
 
-    async def _git_tool(self, tool: str, params: dict) -> MCPToolResult:
-        """Выполнить git команду локально"""
-        repo_path = params.get("repo_path", str(self.working_dir))
-
-        git_commands = {
-            "git_status": ["git", "status", "--porcelain"],
-            "git_diff_unstaged": ["git", "diff"],
-            "git_diff_staged": ["git", "diff", "--staged"],
-            "git_log": ["git", "log", "--oneline", "-10"],
-            "git_branch": ["git", "branch", "-a"],
-        }
+    # Read-only git инструменты -> аргументы git
+    GIT_READ_COMMANDS = {
+        "git_status": ("status", "--porcelain"),
+        "git_diff_unstaged": ("diff",),
+        "git_diff_staged": ("diff", "--staged"),
+        "git_log": ("log", "--oneline", "-10"),
+        "git_branch": ("branch", "-a"),
+    }
 
-        if tool in git_commands:
-            result = await asyncio.create_subprocess_exec(
-                *git_commands[tool],
+    async def _run_git(self, repo_path: str, *args: str) -> Tuple[int, bytes, bytes]:
+        """Запустить git и вернуть (код, stdout, stderr)"""
+        async with spawn_semaphore():
+            proc = await asyncio.create_subprocess_exec(
+                "git", *args,
                 cwd=repo_path,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
-            stdout, stderr = await result.communicate()
+            stdout, stderr = await proc.communicate()
+        return proc.returncode, stdout, stderr
 
-            if result.returncode == 0:
-                return MCPToolResult(success=True, data=stdout.decode())
-            else:
-                return MCPToolResult(success=False, error=stderr.decode())
+    async def _git_tool(self, tool: str, params: dict) -> MCPToolResult:
+        """Выполнить git команду локально"""
+        repo_path = params.get("repo_path", self._working_dir_str)
 
+        if tool in self.GIT_READ_COMMANDS:
+            args = self.GIT_READ_COMMANDS[tool]
+            success_data = None
         elif tool == "git_commit":
-            message = params.get("message", "")
-            result = await asyncio.create_subprocess_exec(
-                "git", "commit", "-m", message,
-                cwd=repo_path,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await result.communicate()
-
-            if result.returncode == 0:
-                return MCPToolResult(success=True, data=stdout.decode())
-            else:
-                return MCPToolResult(success=False, error=stderr.decode())
-
+            args = ("commit", "-m", params.get("message", ""))
+            success_data = None
         elif tool == "git_add":
             files = params.get("files", ["."])
             if isinstance(files, str):
                 files = [files]
+            args = ("add", *files)
+            success_data = "Files added"
+        else:
+            return MCPToolResult(success=False, error=f"Unknown git tool: {tool}")
 
-            result = await asyncio.create_subprocess_exec(
-                "git", "add", *files,
-                cwd=repo_path,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await result.communicate()
-
-            if result.returncode == 0:
-                return MCPToolResult(success=True, data="Files added")
-            else:
-                return MCPToolResult(success=False, error=stderr.decode())
+        code, stdout, stderr = await self._run_git(repo_path, *args)
 
-        return MCPToolResult(success=False, error=f"Unknown git tool: {tool}")
+        if code == 0:
+            return MCPToolResult(success=True, data=success_data or stdout.decode())
+        return MCPToolResult(success=False, error=stderr.decode())
 
     async def _filesystem_tool(self, tool: str, params: dict) -> MCPToolResult:
         """Выполнить filesystem команду локально"""
@@ -337,7 +486,14 @@ class LocalMCPClient(MCPClient):
             if not path.exists():
                 return MCPToolResult(success=False, error=f"File not found: {path}")
 
-            content = path.read_text(encoding="utf-8", errors="replace")
+            mtime_ns = path.stat().st_mtime_ns
+            content = self._cache_get(path, mtime_ns)
+            if content is None:
+                content = await asyncio.to_thread(
+                    path.read_text, encoding="utf-8", errors="replace"
+                )
+                self._cache_put(path, mtime_ns, content)
+
             return MCPToolResult(success=True, data=content)
 
         elif tool == "write_file":
@@ -347,8 +503,9 @@ class LocalMCPClient(MCPClient):
             if not path.is_absolute():
                 path = self.working_dir / path
 
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content, encoding="utf-8")
+            self._cache_invalidate(path)
+            await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(path.write_text, content, encoding="utf-8")
             return MCPToolResult(success=True, data=f"Written: {path}")
 
         elif tool == "list_directory":
@@ -359,7 +516,7 @@ class LocalMCPClient(MCPClient):
             if not path.exists():
                 return MCPToolResult(success=False, error=f"Directory not found: {path}")
 
-            files = sorted([f.name for f in path.iterdir()])
+            files = await asyncio.to_thread(lambda: sorted(f.name for f in path.iterdir()))
             return MCPToolResult(success=True, data=files)
 
         elif tool == "create_directory":
@@ -367,7 +524,8 @@ class LocalMCPClient(MCPClient):
             if not path.is_absolute():
                 path = self.working_dir / path
 
-            path.mkdir(parents=True, exist_ok=True)
+            self._cache_invalidate(path)
+            await asyncio.to_thread(path.mkdir, parents=True, exist_ok=True)
             return MCPToolResult(success=True, data=f"Created: {path}")
 
         return MCPToolResult(success=False, error=f"Unknown filesystem tool: {tool}")
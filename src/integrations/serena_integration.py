@@ -4,14 +4,173 @@ Serena Integration
 Интеграция с Serena MCP для семантического анализа кода.
 """
 
+import ast
 import asyncio
+import base64
+import hashlib
 import json
+import mmap
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+from ._procs import spawn_semaphore
 from .mcp_client import MCPClient, MCPToolCall, MCPToolResult, LocalMCPClient
 
+# watchdog опционален: без него индекс проверяется по mtime при каждом запросе
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Ниже этого числа файлов разбор идёт в текущем процессе
+_PARALLEL_MIN_FILES = 16
+
+# Функции и методы, включая async
+_FUNC_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# Директории, в которые обход не спускается
+_EXCLUDED_DIRS = frozenset({".venv", "venv", "__pycache__", "node_modules", ".git"})
+
+# Тот же набор файлов для ripgrep, что и у _iter_py_files: без .gitignore,
+# со скрытыми файлами, только .py, без исключённых директорий
+_RG_FILE_ARGS = (
+    "--no-ignore", "--hidden", "--glob", "*.py",
+    *(arg for name in sorted(_EXCLUDED_DIRS) for arg in ("--glob", f"!{name}")),
+)
+
+# (name, kind, path, line, end_line, docstring) — picklable представление Symbol
+SymbolTuple = Tuple[str, str, str, int, int, Optional[str]]
+
+# (mtime_ns, size, строк, символы, с docstring) — запись кэша разобранного файла
+FileCacheEntry = Tuple[int, int, int, List[SymbolTuple], bool]
+
+
+def _iter_py_files(root: str, excluded: frozenset = _EXCLUDED_DIRS) -> Iterator[str]:
+    """Обойти .py файлы через os.scandir, отсекая исключённые директории целиком"""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in excluded:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".py") and entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+
+
+class _SymbolCollector(ast.NodeVisitor):
+    """Сбор символов файла за один обход AST"""
+
+    def __init__(self, with_docstrings: bool = False):
+        self.with_docstrings = with_docstrings
+        self.symbols: List[SymbolTuple] = []
+        self._class_stack: List[str] = []
+        self._function_depth = 0
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.symbols.append((
+            node.name, "class", node.name, node.lineno, node.end_lineno, self._docstring(node),
+        ))
+
+        # Методы класса (фильтр по depth — при выдаче, чтобы кэш был общим)
+        for item in node.body:
+            if isinstance(item, _FUNC_TYPES):
+                self.symbols.append((
+                    item.name,
+                    "method",
+                    f"{node.name}/{item.name}",
+                    item.lineno,
+                    item.end_lineno,
+                    self._docstring(item),
+                ))
+
+        self._class_stack.append(node.name)
+        self.generic_visit(node)
+        self._class_stack.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        # Только функции верхнего уровня
+        if not self._class_stack and not self._function_depth:
+            self.symbols.append((
+                node.name, "function", node.name, node.lineno, node.end_lineno, self._docstring(node),
+            ))
+
+        self._function_depth += 1
+        self.generic_visit(node)
+        self._function_depth -= 1
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _docstring(self, node: ast.AST) -> Optional[str]:
+        # ast.get_docstring заметно дороже остального обхода — только по запросу
+        return ast.get_docstring(node) if self.with_docstrings else None
+
+
+class _SymbolWatchHandler(FileSystemEventHandler):
+    """Передаёт изменения .py файлов из потока watchdog в event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback):
+        self._loop = loop
+        self._callback = callback
+
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+
+        if event.is_directory:
+            # modified у директории приходит на каждое изменение файла в ней
+            if event.event_type != "modified":
+                self._notify(None)
+            return
+
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            path = os.fsdecode(path)
+            if path.endswith(".py"):
+                self._notify(path)
+
+    def _notify(self, path: Optional[str]):
+        try:
+            self._loop.call_soon_threadsafe(self._callback, path)
+        except RuntimeError:
+            pass  # loop уже закрыт
+
+
+def _parse_file(path_str: str, with_docstrings: bool = False) -> Tuple[int, List[SymbolTuple]]:
+    """
+    Разобрать один .py файл (выполняется в worker процессе)
+
+    Args:
+        path_str: Абсолютный путь к файлу
+        with_docstrings: Извлекать docstring символов
+
+    Returns:
+        (количество строк, список символов)
+    """
+    with open(path_str, "rb") as f:
+        content = f.read()
+    lines = content.count(b"\n") + 1
+
+    # ast.parse принимает bytes и сам учитывает encoding cookie
+    try:
+        tree = ast.parse(content, type_comments=False)
+    except (SyntaxError, ValueError):
+        return lines, []
+
+    collector = _SymbolCollector(with_docstrings)
+    collector.visit(tree)
+    return lines, collector.symbols
+
 
 @dataclass
 class Symbol:
@@ -47,6 +206,11 @@ class SerenaIntegration:
     - Память проекта (memories)
     """
 
+    # Каталог кэша символов (рядом с semcache.npz, не в анализируемом проекте)
+    CACHE_DIR = Path.home() / ".cache" / "claude-auto-dev"
+    # Версия формата: увеличивается при изменении набора собираемых символов
+    CACHE_VERSION = 1
+
     def __init__(
         self,
         project_path: Path,
@@ -60,6 +224,10 @@ class SerenaIntegration:
         self.project_path = Path(project_path)
         self.use_local = use_local
 
+        # Абсолютный корень с разделителем: относительный путь = срез строки
+        self._root_str = os.path.join(os.path.abspath(self.project_path), "")
+        self._root_len = len(self._root_str)
+
         if use_local:
             self.client = LocalMCPClient(self.project_path)
         else:
@@ -68,10 +236,31 @@ class SerenaIntegration:
         # Кэш символов
         self._symbol_cache: Dict[str, List[Symbol]] = {}
 
+        # Пул процессов для разбора AST (создаётся при первой необходимости)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # path -> FileCacheEntry, загружается с диска при первом обращении
+        self._file_symbol_cache: Optional[Dict[str, FileCacheEntry]] = None
+        self._file_symbol_cache_dirty = False
+
+        # name -> [(абсолютный путь, SymbolTuple)], перестраивается при изменении файлов
+        self._name_index: Optional[Dict[str, List[Tuple[str, SymbolTuple]]]] = None
+        self._name_index_files = 0
+
+        # Наблюдатель за файлами (watchdog), запускается при первом поиске
+        self._observer = None
+
+        # Скомпилированные bytes-паттерны поиска референсов по имени
+        self._ref_patterns: Dict[str, "re.Pattern[bytes]"] = {}
+
+        # ripgrep для поиска референсов, если установлен
+        self._rg_path = shutil.which("rg")
+
     async def get_symbols_overview(
         self,
         relative_path: Optional[str] = None,
-        depth: int = 2
+        depth: int = 2,
+        with_docstrings: bool = False
     ) -> CodeOverview:
         """
         Получить обзор символов в файле или директории
@@ -79,12 +268,13 @@ class SerenaIntegration:
         Args:
             relative_path: Относительный путь (None = весь проект)
             depth: Глубина анализа символов
+            with_docstrings: Заполнять docstring символов (локальный режим)
 
         Returns:
             CodeOverview со списком символов
         """
         if self.use_local:
-            return await self._local_symbols_overview(relative_path, depth)
+            return await self._local_symbols_overview(relative_path, depth, with_docstrings)
 
         result = await self.client.call_tool(MCPToolCall(
             server="serena",
@@ -226,168 +416,273 @@ class SerenaIntegration:
 
     # Локальная реализация (без MCP сервера)
 
+    @property
+    def _cache_path(self) -> Path:
+        """Файл кэша символов для проекта: имя — хеш абсолютного пути"""
+        digest = hashlib.blake2b(
+            str(self.project_path.resolve()).encode(), digest_size=8
+        ).hexdigest()
+        return self.CACHE_DIR / f"symbols-{digest}.json"
+
+    def _load_file_cache(self) -> Dict[str, FileCacheEntry]:
+        """Загрузить кэш символов с диска"""
+        if self._file_symbol_cache is None:
+            self._file_symbol_cache = {}
+            cache_path = self._cache_path
+            if cache_path.exists():
+                try:
+                    data = json.loads(cache_path.read_text())
+                    if data.get("version") == self.CACHE_VERSION:
+                        self._file_symbol_cache = {
+                            path: (mtime_ns, size, lines, [tuple(sym) for sym in syms], docs)
+                            for path, (mtime_ns, size, lines, syms, docs) in data["files"].items()
+                        }
+                except Exception:
+                    pass
+        return self._file_symbol_cache
+
+    def _save_file_cache(self):
+        """Сохранить кэш символов, если он менялся"""
+        if not self._file_symbol_cache_dirty or self._file_symbol_cache is None:
+            return
+        cache_path = self._cache_path
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({
+                "version": self.CACHE_VERSION,
+                "files": self._file_symbol_cache,
+            }))
+            self._file_symbol_cache_dirty = False
+        except OSError:
+            pass
+
+    async def _get_file_entries(
+        self,
+        py_files: List[str],
+        with_docstrings: bool = False
+    ) -> Dict[str, FileCacheEntry]:
+        """
+        Записи кэша для файлов, разбирая только изменённые
+
+        Ключ инвалидации — (st_mtime_ns, st_size). Запись без docstring
+        разбирается заново, если они запрошены.
+        """
+        cache = self._load_file_cache()
+        stale: List[Tuple[str, os.stat_result]] = []
+
+        for path_str in py_files:
+            try:
+                st = os.stat(path_str)
+            except OSError:
+                continue  # удалён после обхода дерева
+            cached = cache.get(path_str)
+            if (
+                cached is None
+                or cached[0] != st.st_mtime_ns
+                or cached[1] != st.st_size
+                or (with_docstrings and not cached[4])
+            ):
+                stale.append((path_str, st))
+
+        if len(stale) >= _PARALLEL_MIN_FILES:
+            loop = asyncio.get_running_loop()
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+            parsed = await asyncio.gather(*[
+                loop.run_in_executor(self._pool, _parse_file, path_str, with_docstrings)
+                for path_str, _ in stale
+            ])
+        else:
+            parsed = [_parse_file(path_str, with_docstrings) for path_str, _ in stale]
+
+        for (path_str, st), (file_lines, file_symbols) in zip(stale, parsed, strict=True):
+            cache[path_str] = (st.st_mtime_ns, st.st_size, file_lines, file_symbols, with_docstrings)
+
+        if stale:
+            self._file_symbol_cache_dirty = True
+            self._name_index = None
+
+        return cache
+
     async def _local_symbols_overview(
         self,
         relative_path: Optional[str],
-        depth: int
+        depth: int,
+        with_docstrings: bool = False
     ) -> CodeOverview:
         """Локальный анализ символов через AST"""
-        import ast
-
         target_path = self.project_path
         if relative_path:
             target_path = self.project_path / relative_path
 
-        symbols = []
-        files = 0
-        lines = 0
-
         # Определяем файлы для анализа
-        if target_path.is_file():
-            py_files = [target_path] if target_path.suffix == ".py" else []
+        target_str = os.path.abspath(target_path)
+        if os.path.isfile(target_str):
+            py_files = [target_str] if target_str.endswith(".py") else []
         else:
-            py_files = list(target_path.rglob("*.py"))
-
-        for py_file in py_files:
-            # Пропускаем виртуальные окружения и кэши
-            path_str = str(py_file)
-            if any(skip in path_str for skip in [
-                "/.venv/", "/venv/", "/__pycache__/",
-                "/node_modules/", "/.git/"
-            ]):
-                continue
+            py_files = list(_iter_py_files(target_str))
 
-            files += 1
+        entries = await self._get_file_entries(py_files, with_docstrings)
 
-            try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
-                lines += len(content.split("\n"))
-
-                tree = ast.parse(content)
-
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.ClassDef):
-                        symbols.append(Symbol(
-                            name=node.name,
-                            kind="class",
-                            path=node.name,
-                            file=str(py_file.relative_to(self.project_path)),
-                            line=node.lineno,
-                            docstring=ast.get_docstring(node),
-                        ))
-
-                        # Методы класса
-                        if depth >= 1:
-                            for item in node.body:
-                                if isinstance(item, ast.FunctionDef):
-                                    symbols.append(Symbol(
-                                        name=item.name,
-                                        kind="method",
-                                        path=f"{node.name}/{item.name}",
-                                        file=str(py_file.relative_to(self.project_path)),
-                                        line=item.lineno,
-                                        docstring=ast.get_docstring(item),
-                                    ))
-
-                    elif isinstance(node, ast.FunctionDef):
-                        # Только функции верхнего уровня
-                        if not any(isinstance(p, ast.ClassDef) for p in ast.walk(tree)):
-                            symbols.append(Symbol(
-                                name=node.name,
-                                kind="function",
-                                path=node.name,
-                                file=str(py_file.relative_to(self.project_path)),
-                                line=node.lineno,
-                                docstring=ast.get_docstring(node),
-                            ))
-
-            except SyntaxError:
-                continue
+        symbols = []
+        lines = 0
+        n_classes = n_functions = 0
+        root_len = self._root_len
+
+        for path_str in py_files:
+            entry = entries.get(path_str)
+            if entry is None:
+                continue  # удалён, пока шёл разбор
+            _, _, file_lines, file_symbols, _ = entry
+            lines += file_lines
+            rel_file = path_str[root_len:]
+            for name, kind, path, line, _, docstring in file_symbols:
+                if kind == "class":
+                    n_classes += 1
+                elif kind == "method" and depth < 1:
+                    continue
+                else:
+                    n_functions += 1
+                symbols.append(Symbol(
+                    name=name,
+                    kind=kind,
+                    path=path,
+                    file=rel_file,
+                    line=line,
+                    docstring=docstring if with_docstrings else None,
+                ))
 
         return CodeOverview(
-            files=files,
-            classes=len([s for s in symbols if s.kind == "class"]),
-            functions=len([s for s in symbols if s.kind in ["function", "method"]]),
+            files=len(py_files),
+            classes=n_classes,
+            functions=n_functions,
             lines=lines,
             symbols=symbols,
         )
 
+    async def _get_name_index(self) -> Dict[str, List[Tuple[str, SymbolTuple]]]:
+        """Индекс символов проекта по имени (на основе кэша разобранных файлов)"""
+        # Под наблюдением watchdog индекс обновляется по событиям — без stat
+        if self._name_index is not None and self._observer is not None:
+            return self._name_index
+
+        self._start_watcher()
+
+        # find_symbol возвращает docstring, поэтому индекс строится с ними
+        py_files = list(_iter_py_files(self._root_str))
+        entries = await self._get_file_entries(py_files, with_docstrings=True)
+
+        # Изменённые файлы сбрасывают индекс в _get_file_entries, удалённые — меняют число файлов
+        if self._name_index is None or self._name_index_files != len(py_files):
+            index: Dict[str, List[Tuple[str, SymbolTuple]]] = {}
+            for path_str in py_files:
+                entry = entries.get(path_str)
+                if entry is None:
+                    continue  # удалён, пока шёл разбор
+                for sym in entry[3]:
+                    index.setdefault(sym[0], []).append((path_str, sym))
+            self._name_index = index
+            self._name_index_files = len(py_files)
+
+        return self._name_index
+
+    def _start_watcher(self):
+        """Запустить watchdog наблюдение за проектом (если доступен)"""
+        if Observer is None or not self.use_local or self._observer is not None:
+            return
+
+        observer = Observer()
+        observer.daemon = True
+        observer.schedule(
+            _SymbolWatchHandler(asyncio.get_running_loop(), self._reparse_file),
+            self._root_str,
+            recursive=True,
+        )
+        try:
+            observer.start()
+        except OSError:
+            return  # например, исчерпан лимит inotify — остаёмся на проверке mtime
+        self._observer = observer
+
+    def _reparse_file(self, path_str: Optional[str]):
+        """
+        Обновить кэш и индекс символов для одного файла
+
+        Args:
+            path_str: Абсолютный путь; None — изменилась директория, индекс перестраивается
+        """
+        cache = self._file_symbol_cache
+        if path_str is None or cache is None:
+            self._name_index = None
+            return
+
+        path_str = os.path.abspath(path_str)
+        if not path_str.startswith(self._root_str):
+            return
+        if not _EXCLUDED_DIRS.isdisjoint(path_str[self._root_len:].split(os.sep)):
+            return
+
+        old = cache.pop(path_str, None)
+        try:
+            st = os.stat(path_str)
+            file_lines, symbols = _parse_file(path_str, with_docstrings=True)
+            cache[path_str] = (st.st_mtime_ns, st.st_size, file_lines, symbols, True)
+        except OSError:
+            symbols = []  # файл удалён
+        self._file_symbol_cache_dirty = True
+
+        index = self._name_index
+        if index is None:
+            return
+
+        if old is not None:
+            for name in {sym[0] for sym in old[3]}:
+                remaining = [item for item in index.get(name, ()) if item[0] != path_str]
+                if remaining:
+                    index[name] = remaining
+                else:
+                    index.pop(name, None)
+        for sym in symbols:
+            index.setdefault(sym[0], []).append((path_str, sym))
+
+        self._name_index_files += (path_str in cache) - (old is not None)
+
     async def _local_find_symbol(
         self,
         name_path: str,
         include_body: bool
     ) -> Optional[Symbol]:
         """Локальный поиск символа"""
-        import ast
-
         parts = name_path.split("/")
         target_name = parts[-1]
         parent_name = parts[0] if len(parts) > 1 else None
+        index = await self._get_name_index()
 
-        for py_file in self.project_path.rglob("*.py"):
-            path_str = str(py_file)
-            if any(skip in path_str for skip in [
-                "/.venv/", "/venv/", "/__pycache__/"
-            ]):
+        for path_str, (name, kind, path, line, end_line, docstring) in index.get(target_name, ()):
+            if parent_name is not None and (
+                kind != "method" or path.split("/", 1)[0] != parent_name
+            ):
                 continue
 
-            try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
-                tree = ast.parse(content)
-                lines = content.split("\n")
-
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.ClassDef) and node.name == target_name:
-                        if parent_name is None:
-                            body = None
-                            if include_body:
-                                body = "\n".join(lines[node.lineno - 1:node.end_lineno])
-
-                            return Symbol(
-                                name=node.name,
-                                kind="class",
-                                path=node.name,
-                                file=str(py_file.relative_to(self.project_path)),
-                                line=node.lineno,
-                                docstring=ast.get_docstring(node),
-                                body=body,
-                            )
-
-                    elif isinstance(node, ast.ClassDef) and node.name == parent_name:
-                        for item in node.body:
-                            if isinstance(item, ast.FunctionDef) and item.name == target_name:
-                                body = None
-                                if include_body:
-                                    body = "\n".join(lines[item.lineno - 1:item.end_lineno])
-
-                                return Symbol(
-                                    name=item.name,
-                                    kind="method",
-                                    path=f"{node.name}/{item.name}",
-                                    file=str(py_file.relative_to(self.project_path)),
-                                    line=item.lineno,
-                                    docstring=ast.get_docstring(item),
-                                    body=body,
-                                )
-
-                    elif isinstance(node, ast.FunctionDef) and node.name == target_name:
-                        if parent_name is None:
-                            body = None
-                            if include_body:
-                                body = "\n".join(lines[node.lineno - 1:node.end_lineno])
-
-                            return Symbol(
-                                name=node.name,
-                                kind="function",
-                                path=node.name,
-                                file=str(py_file.relative_to(self.project_path)),
-                                line=node.lineno,
-                                docstring=ast.get_docstring(node),
-                                body=body,
-                            )
-
-            except SyntaxError:
-                continue
+            # Файл читаем только ради тела символа
+            body = None
+            if include_body:
+                try:
+                    with open(path_str, encoding="utf-8", errors="replace") as f:
+                        lines = f.read().split("\n")
+                except OSError:
+                    continue
+                body = "\n".join(lines[line - 1:end_line])
+
+            return Symbol(
+                name=name,
+                kind=kind,
+                path=path,
+                file=path_str[self._root_len:],
+                line=line,
+                docstring=docstring,
+                body=body,
+            )
 
         return None
 
@@ -397,34 +692,116 @@ class SerenaIntegration:
         relative_path: Optional[str]
     ) -> List[Dict[str, Any]]:
         """Локальный поиск референсов через grep"""
-        import re
-
         symbol_name = symbol_path.split("/")[-1]
-        references = []
 
         target_path = self.project_path
         if relative_path:
             target_path = self.project_path / relative_path
 
-        # Простой поиск по имени
-        pattern = re.compile(rf'\b{re.escape(symbol_name)}\b')
+        if self._rg_path:
+            references = await self._rg_find_references(symbol_name, target_path)
+            if references is not None:
+                return references
 
-        py_files = target_path.rglob("*.py") if target_path.is_dir() else [target_path]
+        return self._python_find_references(symbol_name, target_path)
 
-        for py_file in py_files:
-            path_str = str(py_file)
-            if any(skip in path_str for skip in ["/.venv/", "/venv/", "/__pycache__/"]):
-                continue
+    async def _rg_find_references(
+        self,
+        symbol_name: str,
+        target_path: Path
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Поиск референсов через ripgrep (None — ошибка rg, нужен fallback)"""
+        root = self.project_path.resolve()
+
+        async with spawn_semaphore():
+            proc = await asyncio.create_subprocess_exec(
+                self._rg_path, "--json", "--word-regexp", "--fixed-strings", *_RG_FILE_ARGS,
+                "--", symbol_name, str(target_path.resolve()),
+                cwd=str(root),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=16 * 1024 * 1024,  # строки JSON могут быть длинными
+            )
+
+            references = []
+            try:
+                async for raw_line in proc.stdout:
+                    event = json.loads(raw_line)
+                    if event.get("type") != "match":
+                        continue
+
+                    data = event["data"]
+                    # Не-UTF-8 путь rg присылает как {"bytes": base64}
+                    path = data["path"]
+                    path_str = path.get("text")
+                    if path_str is None:
+                        path_str = os.fsdecode(base64.b64decode(path["bytes"]))
+                    references.append({
+                        "file": os.path.relpath(path_str, root),
+                        "line": data["line_number"],
+                        "text": data["lines"].get("text", "").strip(),
+                    })
+            except ValueError:
+                # Строка длиннее limit (LimitOverrunError) или битый JSON — поиск через mmap
+                proc.kill()
+                await proc.wait()
+                return None
+
+            await proc.wait()
+
+        # rg: 0 — есть совпадения, 1 — нет совпадений, 2 — ошибка
+        if proc.returncode not in (0, 1):
+            return None
+        return references
+
+    def _python_find_references(
+        self,
+        symbol_name: str,
+        target_path: Path
+    ) -> List[Dict[str, Any]]:
+        """Поиск референсов на Python (fallback без ripgrep)"""
+        references = []
+
+        # Простой поиск по имени
+        pattern = self._ref_patterns.get(symbol_name)
+        if pattern is None:
+            pattern = re.compile(rb"\b" + re.escape(symbol_name.encode()) + rb"\b")
+            self._ref_patterns[symbol_name] = pattern
+
+        target_str = os.path.abspath(target_path)
+        py_files = _iter_py_files(target_str) if os.path.isdir(target_str) else [target_str]
+        root_len = self._root_len
 
+        for path_str in py_files:
             try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
+                with open(path_str, "rb") as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    rel_file = path_str[root_len:]
+                    line_no = 1
+                    line_start = 0
+                    last_line = 0
+
+                    for match in pattern.finditer(mm):
+                        start = match.start()
+                        if start >= line_start:
+                            # Номер строки считаем только между совпадениями
+                            new_start = mm.rfind(b"\n", line_start, start) + 1
+                            if new_start:
+                                line_no += mm[line_start:new_start].count(b"\n")
+                                line_start = new_start
+
+                        if line_no == last_line:
+                            continue
+                        last_line = line_no
+
+                        line_end = mm.find(b"\n", match.end())
+                        if line_end == -1:
+                            line_end = len(mm)
 
-                for i, line in enumerate(content.split("\n"), 1):
-                    if pattern.search(line):
                         references.append({
-                            "file": str(py_file.relative_to(self.project_path)),
-                            "line": i,
-                            "text": line.strip(),
+                            "file": rel_file,
+                            "line": line_no,
+                            "text": mm[line_start:line_end].decode("utf-8", "replace").strip(),
                         })
 
             except Exception:
@@ -465,4 +842,12 @@ class SerenaIntegration:
 
     async def close(self):
         """Закрыть клиент"""
+        if self._observer is not None:
+            self._observer.stop()
+            await asyncio.to_thread(self._observer.join)
+            self._observer = None
+        self._save_file_cache()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
         await self.client.close()
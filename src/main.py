@@ -9,8 +9,13 @@ Code RAG System - Main Application.
 """
 
 import asyncio
+import atexit
+import functools
+import re
+import zlib
 from pathlib import Path
 from typing import Optional
+import httpx
 import numpy as np
 
 from qdrant_client import QdrantClient
@@ -23,6 +28,86 @@ from search.hybrid_search import HybridSearchEngine, MultiLevelSearch, SearchQue
 from context.context_assembler import ContextAssembler, AssembledContext
 
 
+def _token_hash(token: str) -> int:
+    """
+    Индекс токена для sparse vector — crc32 из stdlib
+
+    Хэш одинаков в любом окружении и между процессами: индекс, построенный
+    в одном, совпадает с запросами из другого.
+    """
+    return zlib.crc32(token.encode())
+
+
+# Токенизация для sparse embeddings
+TOKEN_RE = re.compile(r"\w+")
+SPARSE_VOCAB_SIZE = 30000
+
+
+@functools.cache
+def _qdrant_client(host: str, port: int, grpc_port: int) -> QdrantClient:
+    """Общий на процесс Qdrant клиент: один gRPC канал для всех CodeRAG.
+
+    Канал закрывается один раз при выходе из процесса, а не в CodeRAG.close:
+    другие живые экземпляры продолжают им пользоваться.
+    """
+    client = QdrantClient(host=host, port=port, grpc_port=grpc_port, prefer_grpc=True)
+    atexit.register(client.close)
+    return client
+
+
+class _EmbedBatcher:
+    """
+    Micro-batching одиночных embedding запросов.
+
+    Запросы, пришедшие в течение window секунд (или до max_batch штук),
+    уходят в Ollama одним вызовом batch-функции.
+    """
+
+    def __init__(self, embed_batch, window: float = 0.01, max_batch: int = 64):
+        self._embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await self._embed_batch([text for text, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            # Ни один future не должен остаться без результата
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors, strict=True):
+            if not future.done():
+                future.set_result(vector)
+
+
 class CodeRAG:
     """
     Main Code RAG System.
@@ -41,6 +126,7 @@ class CodeRAG:
         repo_path: str | Path,
         qdrant_host: str = "localhost",
         qdrant_port: int = 6333,
+        qdrant_grpc_port: int = 6334,
         embedding_model: str = "nomic-embed-text",
         max_context_tokens: int = 8000,
     ):
@@ -48,8 +134,15 @@ class CodeRAG:
         self.embedding_model = embedding_model
         self.max_context_tokens = max_context_tokens
 
-        # Qdrant client
-        self.qdrant = QdrantClient(host=qdrant_host, port=qdrant_port)
+        # Qdrant client (gRPC, общий канал)
+        self.qdrant = _qdrant_client(qdrant_host, qdrant_port, qdrant_grpc_port)
+
+        # Пул keep-alive соединений к Ollama
+        self._http = httpx.AsyncClient(
+            base_url="http://localhost:11434",
+            timeout=120.0,
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
 
         # Components (initialized later)
         self._chunker: Optional[ASTChunker] = None
@@ -60,9 +153,13 @@ class CodeRAG:
 
         # Embedding function (set during initialize)
         self._embed_fn = None
+        self._embed_batch_fn = None
         self._sparse_embed_fn = None
         self._rerank_fn = None
 
+        # Конкурентные запросы embeddings одного текста -> один /api/embed
+        self._embed_batcher = _EmbedBatcher(self._ollama_embed_batch)
+
     async def initialize(self, create_collections: bool = True):
         """
         Инициализирует все компоненты.
@@ -70,20 +167,12 @@ class CodeRAG:
         Args:
             create_collections: Создать коллекции в Qdrant
         """
-        # 1. Setup embedding functions
-        await self._setup_embeddings()
-
-        # 2. Create Qdrant collections
+        # 1-2. Embeddings (с прогревом модели) и коллекции Qdrant независимы —
+        # выполняем параллельно
+        startup = [self._setup_embeddings()]
         if create_collections:
-            schema_manager = QdrantSchemaManager(
-                host="localhost",
-                port=6333,
-                config=QdrantConfig(),
-            )
-            try:
-                schema_manager.create_all_collections(recreate=False)
-            except Exception:
-                pass  # Collections may already exist
+            startup.append(self._create_collections())
+        await asyncio.gather(*startup)
 
         # 3. Initialize components
         self._chunker = ASTChunker(language="python")
@@ -93,6 +182,7 @@ class CodeRAG:
             qdrant_client=self.qdrant,
             chunker=self._chunker,
             embedder=self._embed_fn,
+            batch_embedder=self._embed_batch_fn,
         )
 
         self._search_engine = HybridSearchEngine(
@@ -108,65 +198,105 @@ class CodeRAG:
             max_tokens=self.max_context_tokens,
         )
 
+        # 4. Компоненты готовы — публичные методы больше не проверяют инициализацию
+        self.index = self._index_initialized
+        self.search = self._search_initialized
+        self.assemble_context = self._assemble_initialized
+
+    async def _create_collections(self):
+        """Создает коллекции Qdrant (blocking client — в thread pool)."""
+        schema_manager = QdrantSchemaManager(
+            config=QdrantConfig(),
+            client=self.qdrant,
+        )
+        try:
+            await asyncio.to_thread(schema_manager.create_all_collections, recreate=False)
+        except Exception:
+            pass  # Collections may already exist
+
     async def _setup_embeddings(self):
-        """Настраивает embedding функции."""
+        """Настраивает embedding функции и прогревает модель."""
         if self.embedding_model == "nomic-embed-text":
             self._embed_fn = self._ollama_embed
+            self._embed_batch_fn = self._ollama_embed_batch
             # Sparse через Qdrant built-in
             self._sparse_embed_fn = self._simple_sparse_embed
+
+            # Первый запрос загружает модель в Ollama
+            try:
+                await self._ollama_embed_batch(["warmup"])
+            except (httpx.HTTPError, KeyError):
+                pass  # Ollama недоступна — ошибка всплывет при индексации
         else:
             # Fallback to sentence-transformers
             self._embed_fn = self._st_embed
+            self._embed_batch_fn = self._st_embed_batch
+            await asyncio.to_thread(self._load_st_model)
+
+    async def _ollama_embed(self, text: str) -> np.ndarray:
+        """Embedding через Ollama (конкурентные запросы объединяются в батч)."""
+        return await self._embed_batcher.embed(text)
 
-    def _ollama_embed(self, text: str) -> np.ndarray:
-        """Embedding через Ollama."""
-        import requests
+    async def _ollama_embed_batch(self, texts: list[str]) -> np.ndarray:
+        """
+        Батчевый embedding через Ollama /api/embed.
 
-        response = requests.post(
-            "http://localhost:11434/api/embeddings",
+        Один HTTP запрос и один forward pass на весь батч.
+        """
+        response = await self._http.post(
+            "/api/embed",
             json={
                 "model": self.embedding_model,
-                "prompt": text,
+                "input": texts,
             },
         )
-        data = response.json()
-        return np.array(data["embedding"])
+        # 404 (модель не скачана) / 500 — HTTPStatusError, а не KeyError ниже
+        response.raise_for_status()
+        return np.asarray(response.json()["embeddings"])
 
-    def _st_embed(self, text: str) -> np.ndarray:
-        """Embedding через sentence-transformers."""
+    def _load_st_model(self):
+        """Загружает модель sentence-transformers."""
         from sentence_transformers import SentenceTransformer
 
         if not hasattr(self, "_st_model"):
             self._st_model = SentenceTransformer("all-MiniLM-L6-v2")
 
+    def _st_embed(self, text: str) -> np.ndarray:
+        """Embedding через sentence-transformers."""
+        self._load_st_model()
         return self._st_model.encode(text)
 
+    async def _st_embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Батчевый embedding через sentence-transformers (в thread pool)."""
+        return await asyncio.to_thread(
+            self._st_model.encode,
+            texts,
+            batch_size=64,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+
     def _simple_sparse_embed(self, text: str) -> tuple[list[int], list[float]]:
         """
         Простой sparse embedding на основе TF.
 
         Для production лучше использовать SPLADE.
         """
-        from collections import Counter
-        import re
-
         # Токенизация
-        tokens = re.findall(r'\w+', text.lower())
+        tokens = TOKEN_RE.findall(text.lower())
 
-        # Term frequency
-        tf = Counter(tokens)
-
-        # Конвертируем в indices/values
-        # Используем hash для indices (простой подход)
-        indices = []
-        values = []
+        # Стабильный между процессами hash -> индекс в словаре
+        hashed = np.fromiter(
+            (_token_hash(t) % SPARSE_VOCAB_SIZE for t in tokens),
+            dtype=np.int64,
+            count=len(tokens),
+        )
 
-        for token, count in tf.items():
-            idx = hash(token) % 30000  # Vocabulary size
-            indices.append(abs(idx))
-            values.append(float(count))
+        # Term frequency: уникальные индексы (требование Qdrant) и их счетчики
+        indices, inverse = np.unique(hashed, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(indices))
 
-        return indices, values
+        return indices.tolist(), counts.astype(np.float32).tolist()
 
     # === Public API ===
 
@@ -188,6 +318,14 @@ class CodeRAG:
         if not self._indexer:
             raise RuntimeError("Call initialize() first")
 
+        return await self._index_initialized(full, extensions)
+
+    async def _index_initialized(
+        self,
+        full: bool = False,
+        extensions: list[str] = None,
+    ) -> dict:
+        """index() без проверки инициализации."""
         return await self._indexer.index(
             full_reindex=full,
             extensions=extensions,
@@ -214,6 +352,16 @@ class CodeRAG:
         if not self._multi_search:
             raise RuntimeError("Call initialize() first")
 
+        return await self._search_initialized(query, limit, mode, **kwargs)
+
+    async def _search_initialized(
+        self,
+        query: str,
+        limit: int = 10,
+        mode: SearchMode = SearchMode.HYBRID,
+        **kwargs,
+    ) -> list:
+        """search() без проверки инициализации."""
         search_query = SearchQuery(
             text=query,
             mode=mode,
@@ -241,6 +389,14 @@ class CodeRAG:
         if not self._context_assembler:
             raise RuntimeError("Call initialize() first")
 
+        return self._assemble_initialized(search_results, query)
+
+    def _assemble_initialized(
+        self,
+        search_results: list,
+        query: str,
+    ) -> AssembledContext:
+        """assemble_context() без проверки инициализации."""
         return self._context_assembler.assemble(
             search_results=search_results,
             query=query,
@@ -261,6 +417,10 @@ class CodeRAG:
         context = self.assemble_context(results, question)
         return results, context
 
+    async def close(self):
+        """Закрывает HTTP соединения экземпляра (общий канал Qdrant закрывается при выходе)."""
+        await self._http.aclose()
+
 
 # === CLI Interface ===
 
@@ -304,6 +464,8 @@ async def main():
         print(f"Files included: {context.files_included}")
         print(f"Budget used: {context.budget_used:.1%}")
 
+    await rag.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -3,9 +3,10 @@
 
 from .task_parser import TaskParser, Task, TaskGraph
 from .model_router import ModelRouter, ModelConfig
-from .agent_router import AgentRouter, AgentType
+from .agent_router import AgentRouter, AgentType, get_router
 from .executor import ExecutionScheduler, ExecutionResult
 from .main_orchestrator import LocalSwarmOrchestrator, OrchestratorConfig
+from ._logging import setup_logging
 
 __all__ = [
     "TaskParser",
@@ -15,8 +16,10 @@ __all__ = [
     "ModelConfig",
     "AgentRouter",
     "AgentType",
+    "get_router",
     "ExecutionScheduler",
     "ExecutionResult",
     "LocalSwarmOrchestrator",
     "OrchestratorConfig",
+    "setup_logging",
 ]
@@ -0,0 +1,55 @@
+"""
+Logging Setup
+
+Вывод логов оркестратора через очередь: форматирование и запись
+в stdout выполняет фоновый поток QueueListener, а не event loop.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Подключить QueueHandler к логгеру пакета (повторный вызов меняет только уровень)"""
+    global _listener
+
+    package_logger = logging.getLogger(__package__)
+    package_logger.setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    package_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    package_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def ensure_logging() -> None:
+    """
+    Подключить вывод, если приложение не настроило логирование само
+
+    Без обработчиков logging печатает только WARNING и выше — фазы и
+    прогресс оркестратора пропали бы.
+    """
+    if _listener is not None or logging.getLogger(__package__).handlers or logging.getLogger().handlers:
+        return
+    setup_logging()
+
+
+def flush_logging() -> None:
+    """Дождаться вывода всех записей из очереди (перед интерактивным вводом)"""
+    if _listener is not None:
+        _listener.queue.join()
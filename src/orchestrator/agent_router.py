@@ -5,14 +5,36 @@ Agent Router
 Каждый агент имеет свой system prompt и специализацию.
 """
 
-from dataclasses import dataclass, field
+import functools
+import sys
+import threading
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, Callable
-import json
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
 
+try:
+    from enum import StrEnum
+except ImportError:  # Python 3.10
+    class StrEnum(str, Enum):
+        """Enum, элементы которого — строки (аналог enum.StrEnum из 3.11)"""
 
-class AgentType(Enum):
+        def __str__(self) -> str:
+            return self.value
+
+# pyahocorasick опционален: без него ключевые слова проверяются через `in`
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class AgentType(StrEnum):
     """Типы агентов"""
+    # Хэш как у строки-значения: AgentType.CODER и "coder" — один ключ словаря
+    __hash__ = str.__hash__
+
     ARCHITECT = "architect"
     CODER = "coder"
     REVIEWER = "reviewer"
@@ -22,7 +44,13 @@ class AgentType(Enum):
     DEBUGGER = "debugger"
 
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def _load_prompt(path: str) -> str:
+    """Прочитать system prompt с диска (один раз на файл)"""
+    return Path(path).read_text(encoding="utf-8").rstrip("\n")
+
+
+@dataclass(slots=True, frozen=True)
 class AgentConfig:
     """Конфигурация агента"""
     type: AgentType
@@ -34,222 +62,66 @@ class AgentConfig:
     fallback_model: str
 
     # Специализации
-    capabilities: List[str] = field(default_factory=list)
+    capabilities: Tuple[str, ...] = ()
 
-    # System prompt
-    system_prompt: str = ""
+    # Путь к файлу system prompt
+    system_prompt_path: str = ""
 
     # Настройки генерации
     temperature: float = 0.3
     max_tokens: int = 4096
 
     # MCP tools доступные агенту
-    allowed_tools: List[str] = field(default_factory=list)
+    allowed_tools: Tuple[str, ...] = ()
+
+    @property
+    def system_prompt(self) -> str:
+        """System prompt (загружается с диска при первом обращении)"""
+        if not self.system_prompt_path:
+            return ""
+        return _load_prompt(self.system_prompt_path)
+
+    def to_dict(self) -> dict:
+        """Конвертация в словарь (JSON-совместимый)"""
+        return {
+            "type": self.type.value,
+            "name": self.name,
+            "description": self.description,
+            "primary_model": self.primary_model,
+            "fallback_model": self.fallback_model,
+            "capabilities": list(self.capabilities),
+            "system_prompt_path": self.system_prompt_path,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "allowed_tools": list(self.allowed_tools),
+        }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "AgentConfig":
+        return cls(
+            type=AgentType(data["type"]),
+            name=data["name"],
+            description=data["description"],
+            primary_model=data["primary_model"],
+            fallback_model=data["fallback_model"],
+            capabilities=tuple(data.get("capabilities", ())),
+            system_prompt_path=data.get("system_prompt_path", ""),
+            temperature=data.get("temperature", 0.3),
+            max_tokens=data.get("max_tokens", 4096),
+            allowed_tools=tuple(data.get("allowed_tools", ())),
+        )
 
-# Системные промпты для агентов
-AGENT_PROMPTS = {
-    AgentType.ARCHITECT: '''Ты — Chief Software Architect с 20+ годами опыта.
 
-## Твоя роль
-Проектирование архитектуры, принятие технических решений, создание ADR.
+# Системные промпты агентов: prompts/<agent>.md, читаются при первом обращении
+PROMPTS_DIR = Path(__file__).parent / "prompts"
 
-## Принципы
-1. Simplicity first (KISS)
-2. Design for change
-3. Оценивай риски
-4. Документируй ключевые решения
-
-## Формат ответа
-При проектировании всегда включай:
-- Обоснование решения
-- Альтернативы и почему отклонены
-- Риски и митигация
-- Диаграмму (Mermaid если нужно)
 
-## Инструменты
-Используй Serena для анализа кода и памяти проекта.''',
+def _prompt_path(agent_type: AgentType) -> str:
+    return sys.intern(str(PROMPTS_DIR / f"{agent_type}.md"))
 
-    AgentType.CODER: '''Ты — Senior Full-Stack Developer.
-
-## Твоя роль
-Написание чистого, поддерживаемого кода согласно спецификациям.
-
-## Принципы
-1. Читай существующий код перед написанием нового
-2. Следуй паттернам проекта
-3. Пиши самодокументируемый код
-4. DRY, SOLID
-5. Обрабатывай ошибки
-
-## Перед кодированием
-1. Изучи релевантные файлы через Serena
-2. Проверь memories проекта
-3. Пойми существующие паттерны
-
-## После кодирования
-1. Проверь что код компилируется
-2. Запусти линтер
-3. Убедись в отсутствии очевидных багов
-
-## Формат кода
-- Используй типизацию
-- Комментируй сложную логику
-- Следуй code style проекта''',
-
-    AgentType.REVIEWER: '''Ты — Code Review Specialist & Security Expert.
-
-## Твоя роль
-Проверка качества, безопасности и соответствия best practices.
-
-## Чеклист
-### Security
-- [ ] Input validation
-- [ ] Auth/authz проверки
-- [ ] SQL injection, XSS защита
-- [ ] Нет захардкоженных секретов
-
-### Code Quality
-- [ ] Читаемость
-- [ ] Error handling
-- [ ] Edge cases
-- [ ] Performance
-
-### Architecture
-- [ ] Соответствует паттернам проекта
-- [ ] Proper separation of concerns
-- [ ] Зависимости управляемы
-
-## Формат ответа
-### 🚫 BLOCKING (обязательно исправить)
-- ...
-
-### ⚠️ WARNING (желательно исправить)
-- ...
-
-### 💡 SUGGESTION (на усмотрение)
-- ...
-
-### ✅ GOOD (что сделано хорошо)
-- ...''',
-
-    AgentType.TESTER: '''Ты — QA Engineer & Test Automation Specialist.
-
-## Твоя роль
-Написание тестов, анализ coverage, поиск edge cases.
-
-## Стратегия тестирования
-### Unit Tests
-- Тестируй чистые функции
-- Мокай внешние зависимости
-- Покрывай edge cases
-- Быстрое выполнение (<1s на тест)
-
-### Integration Tests
-- Тестируй взаимодействие компонентов
-- Используй тестовые БД/сервисы
-
-### E2E Tests
-- Критические user flows
-- Реальный браузер (Puppeteer)
-
-## Targets Coverage
-- Critical code: >90%
-- Normal code: >70%
-- Utils: >80%
-
-## Формат отчёта
-```
-Tests: X passed, Y failed
-Coverage: Z%
-Issues found: [список]
-```''',
-
-    AgentType.DOCS: '''Ты — Technical Writer.
-
-## Твоя роль
-Написание понятной документации для разработчиков и пользователей.
-
-## Принципы
-1. Простой язык
-2. Примеры для всего
-3. Структурированность
-4. Актуальность
-
-## Типы документации
-### README.md
-- Что это
-- Как установить
-- Quick start
-- Примеры
-
-### API Docs
-- Описание endpoint
-- Request/response примеры
-- Error codes
-- Auth
-
-### CHANGELOG.md
-- Keep a Changelog format
-- Added/Changed/Fixed/Removed
-
-## Формат
-Используй Markdown с правильным форматированием.''',
-
-    AgentType.DEVOPS: '''Ты — DevOps Engineer & Infrastructure Specialist.
-
-## Твоя роль
-CI/CD, контейнеризация, деплой, мониторинг.
-
-## Принципы
-1. Everything as Code
-2. Immutable infrastructure
-3. Blue-green deployments
-4. Automated rollbacks
-
-## Stack
-- Docker, Docker Compose
-- GitHub Actions
-- Yandex Cloud
-- Nginx
-
-## Security
-- Не коммить секреты
-- Используй переменные окружения
-- Минимальные права''',
-
-    AgentType.DEBUGGER: '''Ты — Debugging Specialist.
-
-## Твоя роль
-Поиск и исправление багов, анализ ошибок.
-
-## Методология
-1. Воспроизведи проблему
-2. Изолируй причину
-3. Сформулируй гипотезу
-4. Проверь гипотезу
-5. Исправь и протестируй
-
-## Инструменты
-- Логи и stack traces
-- Debugger
-- Print debugging
-- Git bisect
-
-## Формат отчёта
-### Проблема
-[описание]
-
-### Root Cause
-[причина]
-
-### Fix
-[решение]
-
-### Prevention
-[как избежать в будущем]'''
-}
 
+# Общий набор инструментов агентов, работающих с кодом
+_TOOLS_CODE = ("serena", "git", "filesystem")
 
 # Конфигурации агентов
 AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
@@ -259,11 +131,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="System design, architecture decisions, ADRs",
         primary_model="deepseek-r1:32b",
         fallback_model="llama3:70b",
-        capabilities=["architecture", "planning", "adr", "tech_decisions"],
-        system_prompt=AGENT_PROMPTS[AgentType.ARCHITECT],
+        capabilities=("architecture", "planning", "adr", "tech_decisions"),
+        system_prompt_path=_prompt_path(AgentType.ARCHITECT),
         temperature=0.3,
         max_tokens=4096,
-        allowed_tools=["serena", "memory", "filesystem"],
+        allowed_tools=("serena", "memory", "filesystem"),
     ),
 
     AgentType.CODER: AgentConfig(
@@ -272,11 +144,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="Implementation, refactoring, bug fixes",
         primary_model="qwen3-coder:30b",
         fallback_model="deepseek-coder:33b-instruct",
-        capabilities=["implementation", "refactoring", "bugfix", "feature"],
-        system_prompt=AGENT_PROMPTS[AgentType.CODER],
+        capabilities=("implementation", "refactoring", "bugfix", "feature"),
+        system_prompt_path=_prompt_path(AgentType.CODER),
         temperature=0.2,
         max_tokens=8192,
-        allowed_tools=["serena", "git", "filesystem"],
+        allowed_tools=_TOOLS_CODE,
     ),
 
     AgentType.REVIEWER: AgentConfig(
@@ -285,11 +157,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="Code review, security audit, quality checks",
         primary_model="deepseek-r1:32b",
         fallback_model="codellama:34b",
-        capabilities=["review", "security", "quality", "best_practices"],
-        system_prompt=AGENT_PROMPTS[AgentType.REVIEWER],
+        capabilities=("review", "security", "quality", "best_practices"),
+        system_prompt_path=_prompt_path(AgentType.REVIEWER),
         temperature=0.1,
         max_tokens=4096,
-        allowed_tools=["serena", "git"],
+        allowed_tools=("serena", "git"),
     ),
 
     AgentType.TESTER: AgentConfig(
@@ -298,11 +170,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="Test writing, coverage analysis, QA",
         primary_model="qwen3-coder:30b",
         fallback_model="devstral",
-        capabilities=["testing", "unit_tests", "integration_tests", "e2e"],
-        system_prompt=AGENT_PROMPTS[AgentType.TESTER],
+        capabilities=("testing", "unit_tests", "integration_tests", "e2e"),
+        system_prompt_path=_prompt_path(AgentType.TESTER),
         temperature=0.2,
         max_tokens=6144,
-        allowed_tools=["serena", "filesystem", "puppeteer"],
+        allowed_tools=("serena", "filesystem", "puppeteer"),
     ),
 
     AgentType.DOCS: AgentConfig(
@@ -311,11 +183,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="Documentation, README, API docs",
         primary_model="qwen3:8b",
         fallback_model="qwen3-coder:30b",
-        capabilities=["documentation", "readme", "api_docs", "changelog"],
-        system_prompt=AGENT_PROMPTS[AgentType.DOCS],
+        capabilities=("documentation", "readme", "api_docs", "changelog"),
+        system_prompt_path=_prompt_path(AgentType.DOCS),
         temperature=0.4,
         max_tokens=4096,
-        allowed_tools=["serena", "filesystem"],
+        allowed_tools=("serena", "filesystem"),
     ),
 
     AgentType.DEVOPS: AgentConfig(
@@ -324,11 +196,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="CI/CD, deployment, infrastructure",
         primary_model="qwen3-coder:30b",
         fallback_model="deepseek-r1:32b",
-        capabilities=["devops", "ci_cd", "docker", "deployment"],
-        system_prompt=AGENT_PROMPTS[AgentType.DEVOPS],
+        capabilities=("devops", "ci_cd", "docker", "deployment"),
+        system_prompt_path=_prompt_path(AgentType.DEVOPS),
         temperature=0.2,
         max_tokens=4096,
-        allowed_tools=["filesystem", "git"],
+        allowed_tools=("filesystem", "git"),
     ),
 
     AgentType.DEBUGGER: AgentConfig(
@@ -337,11 +209,11 @@ AGENT_CONFIGS: Dict[AgentType, AgentConfig] = {
         description="Bug investigation, error analysis",
         primary_model="deepseek-r1:32b",
         fallback_model="qwen3-coder:30b",
-        capabilities=["debugging", "error_analysis", "troubleshooting"],
-        system_prompt=AGENT_PROMPTS[AgentType.DEBUGGER],
+        capabilities=("debugging", "error_analysis", "troubleshooting"),
+        system_prompt_path=_prompt_path(AgentType.DEBUGGER),
         temperature=0.2,
         max_tokens=4096,
-        allowed_tools=["serena", "filesystem", "git"],
+        allowed_tools=_TOOLS_CODE,
     ),
 }
 
@@ -383,15 +255,232 @@ TASK_AGENT_MAPPING = {
     "troubleshoot": AgentType.DEBUGGER,
 }
 
+# Общие для всех роутеров read-only представления (копия — только при изменении)
+_AGENTS_RO: Mapping[AgentType, AgentConfig] = MappingProxyType(AGENT_CONFIGS)
+_TASK_MAPPING_RO: Mapping[str, AgentType] = MappingProxyType(TASK_AGENT_MAPPING)
+
+# Ключевые слова описания задачи -> агент (порядок = приоритет)
+KEYWORDS_TO_AGENT = {
+    AgentType.ARCHITECT: ["архитектур", "design", "проектир", "adr", "решени"],
+    AgentType.CODER: ["реализ", "implement", "напис", "создай", "добав", "код"],
+    AgentType.REVIEWER: ["review", "провер", "audit", "безопас", "security"],
+    AgentType.TESTER: ["тест", "test", "coverage", "qa", "проверк"],
+    AgentType.DOCS: ["документ", "readme", "changelog", "doc"],
+    AgentType.DEVOPS: ["deploy", "ci/cd", "docker", "деплой"],
+    AgentType.DEBUGGER: ["debug", "ошибк", "error", "баг", "bug", "исправ"],
+}
+
+# Приоритет агента при совпадении нескольких ключевых слов
+_AGENT_PRIORITY = {agent_type: i for i, agent_type in enumerate(KEYWORDS_TO_AGENT)}
+
+
+def _build_keyword_automaton():
+    """Автомат Aho-Corasick: ключевое слово -> агент (первый по приоритету)"""
+    automaton = ahocorasick.Automaton()
+    for agent_type, keywords in KEYWORDS_TO_AGENT.items():
+        for kw in keywords:
+            if not automaton.exists(kw):
+                automaton.add_word(kw, agent_type)
+    automaton.make_automaton()
+    return automaton
+
+
+def _char_mask(chars) -> int:
+    """64-битная сигнатура набора символов (фильтр Блума по ord(ch) % 64)"""
+    mask = 0
+    for ch in chars:
+        mask |= 1 << (ord(ch) & 63)
+    return mask
+
+
+def _build_keyword_masks():
+    """Ключевые слова с сигнатурами: слово не может входить в описание без всех своих символов"""
+    return tuple(
+        (agent_type, tuple((_char_mask(set(kw)), kw) for kw in keywords))
+        for agent_type, keywords in KEYWORDS_TO_AGENT.items()
+    )
+
+
+# (автомат, сигнатуры) — строятся при первом выборе агента по описанию
+_heuristics = None
+_heuristics_lock = threading.Lock()
+
+
+def _get_heuristics():
+    """Структуры эвристики по описанию (ленивая потокобезопасная сборка)"""
+    global _heuristics
+    if _heuristics is None:
+        with _heuristics_lock:
+            if _heuristics is None:
+                if ahocorasick is not None:
+                    _heuristics = (_build_keyword_automaton(), None)
+                else:
+                    _heuristics = (None, _build_keyword_masks())
+    return _heuristics
+
+# (агент, категория ошибки) -> агент для повторной попытки; иначе — Architect
+_RETRY_TABLE: Dict[Tuple[AgentType, str], AgentType] = {
+    # Если Coder не справился из-за ошибки/бага — попробуем Debugger
+    (AgentType.CODER, "error"): AgentType.DEBUGGER,
+    (AgentType.CODER, "bug"): AgentType.DEBUGGER,
+    # Если Tester не справился — попробуем Coder исправить
+    (AgentType.TESTER, "error"): AgentType.CODER,
+    (AgentType.TESTER, "bug"): AgentType.CODER,
+    (AgentType.TESTER, ""): AgentType.CODER,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _classify_error(error_type: str) -> str:
+    """Категория ошибки для _RETRY_TABLE: "error", "bug" или пустая строка"""
+    error_lower = error_type.lower()
+    if "error" in error_lower:
+        return "error"
+    if "bug" in error_lower:
+        return "bug"
+    return ""
+
+
+# Описания длиннее не кэшируются, чтобы не держать в кэше большие строки
+_RESOLVE_CACHE_MAX_LEN = 1024
+
+
+def _resolve_agent_type_uncached(description_lower: str) -> AgentType:
+    """Тип агента по ключевым словам описания задачи"""
+    automaton, keyword_masks = _get_heuristics()
+    if automaton is not None:
+        # Один проход по описанию; среди совпадений — агент с высшим приоритетом
+        matched = {agent_type for _, agent_type in automaton.iter(description_lower)}
+        if matched:
+            return min(matched, key=_AGENT_PRIORITY.__getitem__)
+    else:
+        # Подстроку ищем только для слов, прошедших фильтр по сигнатуре
+        desc_mask = _char_mask(set(description_lower))
+        for agent_type, keywords in keyword_masks:
+            for mask, kw in keywords:
+                if mask & desc_mask == mask and kw in description_lower:
+                    return agent_type
+
+    # По умолчанию — Coder
+    return AgentType.CODER
+
+
+_resolve_agent_type_cached = functools.lru_cache(maxsize=1024)(_resolve_agent_type_uncached)
+
+
+def _resolve_agent_type(description_lower: str) -> AgentType:
+    """Мемоизированный выбор типа агента (одни и те же задачи повторяются за прогон)"""
+    if len(description_lower) > _RESOLVE_CACHE_MAX_LEN:
+        return _resolve_agent_type_uncached(description_lower)
+    return _resolve_agent_type_cached(description_lower)
+
+
+class _RouterTable(dict):
+    """Собственная копия таблицы роутера: изменение пересобирает производные таблицы"""
+
+    __slots__ = ("_on_change",)
+
+    def __init__(self, data: Mapping, on_change: Callable[[], None]):
+        super().__init__(data)
+        self._on_change = on_change
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._on_change()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._on_change()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._on_change()
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._on_change()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._on_change()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_change()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._on_change()
+
 
 class AgentRouter:
     """
     Роутер для выбора агента
+
+    agents и task_mapping до первого обращения к ним — общие read-only
+    представления; обращение делает собственные копии (copy-on-write),
+    изменения которых сразу учитываются при выборе агента.
     """
 
     def __init__(self):
-        self.agents = AGENT_CONFIGS.copy()
-        self.task_mapping = TASK_AGENT_MAPPING.copy()
+        self._agents: Mapping[AgentType, AgentConfig] = _AGENTS_RO
+        self._task_mapping: Mapping[str, AgentType] = _TASK_MAPPING_RO
+
+        # Шаблоны промптов агентов (с контекстом проекта, без), собираются при первом использовании
+        self._prompt_templates: Dict[AgentType, Tuple[str, str]] = {}
+        self._build_lookups()
+
+    @property
+    def agents(self) -> Dict[AgentType, AgentConfig]:
+        self._ensure_mutable()
+        return self._agents
+
+    @agents.setter
+    def agents(self, value: Mapping[AgentType, AgentConfig]) -> None:
+        self._agents = _RouterTable(value, self._tables_changed)
+        self._tables_changed()
+
+    @property
+    def task_mapping(self) -> Dict[str, AgentType]:
+        self._ensure_mutable()
+        return self._task_mapping
+
+    @task_mapping.setter
+    def task_mapping(self, value: Mapping[str, AgentType]) -> None:
+        self._task_mapping = _RouterTable(value, self._tables_changed)
+        self._tables_changed()
+
+    def _ensure_mutable(self):
+        """Заменить общие read-only представления собственными копиями"""
+        if isinstance(self._agents, _RouterTable) and isinstance(self._task_mapping, _RouterTable):
+            return
+        if not isinstance(self._agents, _RouterTable):
+            self._agents = _RouterTable(self._agents, self._tables_changed)
+        if not isinstance(self._task_mapping, _RouterTable):
+            self._task_mapping = _RouterTable(self._task_mapping, self._tables_changed)
+        self._tables_changed()
+
+    def _tables_changed(self):
+        """agents/task_mapping изменены — пересобрать производные таблицы"""
+        self._prompt_templates.clear()
+        self._build_lookups()
+
+    def _build_lookups(self):
+        """Производные таблицы из agents/task_mapping"""
+        # Тип задачи -> конфигурация: один поиск в словаре вместо двух
+        self._task_to_config: Dict[str, AgentConfig] = {
+            task: self._agents[agent_type] for task, agent_type in self._task_mapping.items()
+        }
+
+        # Все агенты — неизменяемый кортеж, без копирования на каждый вызов
+        self._all_agents: Tuple[AgentConfig, ...] = tuple(self._agents.values())
 
     def select_agent(
         self,
@@ -411,41 +500,28 @@ class AgentRouter:
             AgentConfig
         """
         if force_agent:
-            return self.agents[force_agent]
+            return self._agents[force_agent]
 
         # Прямой маппинг
-        task_type_lower = task_type.lower()
-        if task_type_lower in self.task_mapping:
-            agent_type = self.task_mapping[task_type_lower]
-            return self.agents[agent_type]
+        config = self._task_to_config.get(task_type.lower())
+        if config is not None:
+            return config
 
         # Эвристика по описанию
-        description_lower = task_description.lower()
-
-        keywords_to_agent = {
-            AgentType.ARCHITECT: ["архитектур", "design", "проектир", "adr", "решени"],
-            AgentType.CODER: ["реализ", "implement", "напис", "создай", "добав", "код"],
-            AgentType.REVIEWER: ["review", "провер", "audit", "безопас", "security"],
-            AgentType.TESTER: ["тест", "test", "coverage", "qa", "проверк"],
-            AgentType.DOCS: ["документ", "readme", "changelog", "doc"],
-            AgentType.DEVOPS: ["deploy", "ci/cd", "docker", "деплой"],
-            AgentType.DEBUGGER: ["debug", "ошибк", "error", "баг", "bug", "исправ"],
-        }
+        return self._agents[_resolve_agent_type(task_description.lower())]
 
-        for agent_type, keywords in keywords_to_agent.items():
-            if any(kw in description_lower for kw in keywords):
-                return self.agents[agent_type]
-
-        # По умолчанию — Coder
-        return self.agents[AgentType.CODER]
+    @staticmethod
+    def cache_clear():
+        """Сбросить кэш выбора агентов (после изменения маппингов)"""
+        _resolve_agent_type_cached.cache_clear()
 
     def get_agent(self, agent_type: AgentType) -> AgentConfig:
         """Получить конфигурацию агента по типу"""
-        return self.agents[agent_type]
+        return self._agents[agent_type]
 
-    def get_all_agents(self) -> List[AgentConfig]:
+    def get_all_agents(self) -> Tuple[AgentConfig, ...]:
         """Получить все агенты"""
-        return list(self.agents.values())
+        return self._all_agents
 
     def get_agent_for_retry(
         self,
@@ -457,17 +533,11 @@ class AgentRouter:
 
         При неудаче одного агента может помочь другой
         """
-        # Если Coder не справился — попробуем Debugger
-        if failed_agent == AgentType.CODER:
-            if "error" in error_type.lower() or "bug" in error_type.lower():
-                return self.agents[AgentType.DEBUGGER]
-
-        # Если Tester не справился — попробуем Coder исправить
-        if failed_agent == AgentType.TESTER:
-            return self.agents[AgentType.CODER]
-
         # По умолчанию — Architect для анализа
-        return self.agents[AgentType.ARCHITECT]
+        agent_type = _RETRY_TABLE.get(
+            (failed_agent, _classify_error(error_type)), AgentType.ARCHITECT
+        )
+        return self._agents[agent_type]
 
     def build_agent_prompt(
         self,
@@ -486,28 +556,44 @@ class AgentRouter:
         Returns:
             Полный промпт
         """
-        parts = [agent.system_prompt]
+        templates = self._prompt_templates.get(agent.type)
+        if templates is None:
+            templates = self._prompt_templates[agent.type] = self._build_prompt_templates(agent)
+        with_ctx, no_ctx = templates
 
         if project_context:
-            parts.append(f"\n## Контекст проекта\n{project_context}")
-
-        parts.append(f"\n## Задача\n{task_context}")
+            return with_ctx.format_map({
+                "project_context": project_context,
+                "task_context": task_context,
+            })
+        return no_ctx.format_map({"task_context": task_context})
+
+    @staticmethod
+    def _build_prompt_templates(agent: AgentConfig) -> Tuple[str, str]:
+        """Шаблоны format_map для промпта агента: (с контекстом проекта, без)"""
+        system_prompt = agent.system_prompt.replace("{", "{{").replace("}", "}}")
+        task = "\n\n## Задача\n{task_context}"
+        return (
+            system_prompt + "\n\n## Контекст проекта\n{project_context}" + task,
+            system_prompt + task,
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_router() -> AgentRouter:
+    """
+    Общий на процесс AgentRouter
 
-        return "\n".join(parts)
+    Состояние роутера разделяется всеми вызывающими: изменять его
+    небезопасно между потоками. После изменения — get_router.cache_clear().
+    """
+    return AgentRouter()
 
 
 # CLI для тестирования
 if __name__ == "__main__":
     router = AgentRouter()
 
-    print("🤖 Agent Router")
-    print("=" * 50)
-
-    print("\n📋 Available Agents:")
-    for agent in router.get_all_agents():
-        print(f"  {agent.type.value:12} | {agent.primary_model:25} | {agent.capabilities[:3]}")
-
-    print("\n🔍 Task → Agent Mapping:")
     test_tasks = [
         ("architecture", "Спроектировать систему аутентификации"),
         ("implementation", "Написать API endpoint"),
@@ -515,7 +601,20 @@ if __name__ == "__main__":
         ("testing", "Написать unit тесты"),
         ("documentation", "Обновить README"),
     ]
+    routed = [
+        (task_type, router.select_agent(task_type, description))
+        for task_type, description in test_tasks
+    ]
 
-    for task_type, description in test_tasks:
-        agent = router.select_agent(task_type, description)
-        print(f"  {task_type:15} → {agent.name:12} ({agent.primary_model})")
+    # Весь вывод собирается и пишется одним вызовом
+    lines = ["🤖 Agent Router", "=" * 50, "", "📋 Available Agents:"]
+    lines.extend(
+        f"  {agent.type:12} | {agent.primary_model:25} | {list(agent.capabilities[:3])}"
+        for agent in router.get_all_agents()
+    )
+    lines.extend(["", "🔍 Task → Agent Mapping:"])
+    lines.extend(
+        f"  {task_type:15} → {agent.name:12} ({agent.primary_model})"
+        for task_type, agent in routed
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
@@ -6,18 +6,63 @@ Execution Scheduler
 """
 
 import asyncio
+import atexit
+import dataclasses
+import functools
+import hashlib
+import io
 import json
+import logging
+import mmap
+import os
+import random
+import struct
+import threading
 import time
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Callable, Any
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Callable, Any, Tuple, Union
 from concurrent.futures import ThreadPoolExecutor
 import httpx
 
 from .task_parser import Task, TaskGraph, TaskStatus, TaskType
 from .model_router import ModelRouter, ModelConfig
-from .agent_router import AgentRouter, AgentConfig, AgentType
+from .agent_router import AgentConfig, AgentType, get_router
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:  # orjson опционален — fallback на stdlib
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# HTTP статусы Ollama: повтор бессмысленен / повтор после паузы
+_NON_RETRYABLE_STATUS = frozenset({400, 404, 422})
+_BACKOFF_STATUS = frozenset({429, 503, 504})
+
+# Общий пул потоков процесса (env: THREAD_POOL_SIZE); передаётся явно, а не
+# ставится default executor event loop — его закрывает asyncio.run
+THREAD_POOL_SIZE = int(
+    os.environ.get("THREAD_POOL_SIZE", 0)
+    or min(32, (os.cpu_count() or 1) + 4)
+)
+
+
+_POOL = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="exec-sched")
+atexit.register(_POOL.shutdown, wait=False)
 
 
 class ExecutionMode(Enum):
@@ -27,7 +72,7 @@ class ExecutionMode(Enum):
     INTERACTIVE = "interactive"  # С подтверждениями
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionResult:
     """Результат выполнения задачи"""
     task_id: str
@@ -40,6 +85,7 @@ class ExecutionResult:
     execution_time_seconds: float = 0
     model_used: str = ""
     agent_used: str = ""
+    status_code: Optional[int] = None  # HTTP статус ошибки Ollama
 
     # Артефакты
     files_created: List[str] = field(default_factory=list)
@@ -57,8 +103,12 @@ class ExecutionResult:
             "agent": self.agent_used,
         }
 
+    def to_json(self) -> bytes:
+        """Сериализация to_dict в JSON (orjson, если установлен)"""
+        return _dumps(self.to_dict())
+
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionContext:
     """Контекст выполнения"""
     task: Task
@@ -76,13 +126,222 @@ class ExecutionContext:
     max_tokens: int = 32000
     timeout_seconds: int = 300
 
+    # Ключ содержимого задачи, RAG контекста и памяти (кэш промптов)
+    context_key: str = ""
+
+
+class ResultLog(Mapping):
+    """
+    Append-only лог результатов на диске
+
+    Запись: длина (uint32 LE) + JSON результата. В памяти — только смещения,
+    результат читается из mmap при обращении. Существующий лог при открытии
+    переиндексируется (восстановление после падения).
+    """
+
+    _HEADER = struct.Struct("<I")
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab+")
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Восстановить индекс по уже записанным результатам (оборванный хвост отрезается)"""
+        size = os.fstat(self._file.fileno()).st_size
+        offset = 0
+        while offset + self._HEADER.size <= size:
+            (length,) = self._HEADER.unpack(self._read(offset, self._HEADER.size))
+            start = offset + self._HEADER.size
+            if start + length > size:
+                break
+            self._index[_loads(self._read(start, length))["task_id"]] = (start, length)
+            offset = start + length
+
+        if offset < size:
+            # Иначе новые записи встанут после обрывка и не прочитаются при следующем открытии
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._file.truncate(offset)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._mmap is None or len(self._mmap) < offset + length:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap[offset:offset + length]
+
+    def __setitem__(self, task_id: str, result: ExecutionResult) -> None:
+        blob = _dumps(dataclasses.asdict(result))
+        self._file.seek(0, os.SEEK_END)
+        start = self._file.tell() + self._HEADER.size
+        self._file.write(self._HEADER.pack(len(blob)))
+        self._file.write(blob)
+        self._file.flush()
+
+        self._index[task_id] = (start, len(blob))
+
+    def __getitem__(self, task_id: str) -> ExecutionResult:
+        start, length = self._index[task_id]
+        return ExecutionResult(**_loads(self._read(start, length)))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def _content_key(*texts: str) -> str:
+    """Короткий хэш содержимого для ключей кэша"""
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Async клиенты процесса: на каждый event loop (соединения привязаны к своему loop) и base_url
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@functools.cache
+def _sync_client() -> httpx.Client:
+    """Общий синхронный клиент (создаётся при первом синхронном вызове)"""
+    return httpx.Client(timeout=300.0)
+
+
+def _async_client(base_url: str, max_connections: int) -> httpx.AsyncClient:
+    """Общий AsyncClient для текущего event loop — один пул keep-alive на все планировщики"""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=300.0,
+            limits=httpx.Limits(
+                max_keepalive_connections=max_connections,
+                max_connections=max_connections * 2,
+            ),
+        )
+        clients[base_url] = client
+    return client
+
 
 class LLMClient:
     """Клиент для работы с Ollama"""
 
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        max_connections: int = 16,
+        keep_alive: Any = -1,
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        Args:
+            base_url: URL Ollama
+            max_connections: Размер пула keep-alive соединений (для первого клиента event loop)
+            keep_alive: Сколько Ollama держит модель в памяти (-1 — не выгружать, "5m" и т.п.)
+            max_concurrency: Максимум одновременных запросов генерации (по умолчанию max_connections)
+        """
         self.base_url = base_url
-        self.client = httpx.Client(timeout=300.0)
+        self.keep_alive = keep_alive
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency or max_connections
+
+        # Одинаковые запросы в полёте: ключ содержимого -> Future ответа
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Семафор на каждый event loop: asyncio примитивы привязаны к своему loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        """Синхронный клиент (общий для процесса)"""
+        return _sync_client()
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        """Асинхронный клиент (общий для текущего event loop)"""
+        return _async_client(self.base_url, self.max_connections)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Лимит одновременных запросов к Ollama для текущего event loop"""
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = sem
+        return sem
+
+    def _chat_request(
+        self,
+        prompt: str,
+        model: str,
+        system: str,
+        temperature: float,
+        max_tokens: int,
+        format: Optional[str] = None,
+        stream: bool = False,
+    ) -> Dict[str, Any]:
+        """Тело запроса /api/chat"""
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        request = {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+            }
+        }
+        if format:
+            request["format"] = format
+        return request
+
+    @staticmethod
+    def _chat_result(data: Dict[str, Any], model: str, elapsed: float) -> Dict[str, Any]:
+        """Ответ /api/chat -> результат generate"""
+        return {
+            "response": data.get("message", {}).get("content", ""),
+            "tokens": data.get("eval_count", 0) + data.get("prompt_eval_count", 0),
+            "time": elapsed,
+            "model": model,
+        }
+
+    @staticmethod
+    def _error_result(error: Exception, model: str, elapsed: float) -> Dict[str, Any]:
+        status_code = None
+        if isinstance(error, httpx.HTTPStatusError):
+            status_code = error.response.status_code
+        return {
+            "response": "",
+            "error": str(error),
+            "status_code": status_code,
+            "tokens": 0,
+            "time": elapsed,
+            "model": model,
+        }
 
     def generate(
         self,
@@ -98,46 +357,149 @@ class LLMClient:
         Returns:
             dict: {"response": str, "tokens": int, "time": float}
         """
-        start_time = time.time()
-
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
+        start_time = time.monotonic()
 
         try:
             response = self.client.post(
                 f"{self.base_url}/api/chat",
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "num_predict": max_tokens,
-                    }
-                }
+                json=self._chat_request(prompt, model, system, temperature, max_tokens),
             )
             response.raise_for_status()
-            data = response.json()
+            return self._chat_result(response.json(), model, time.monotonic() - start_time)
 
-            elapsed = time.time() - start_time
+        except Exception as e:
+            return self._error_result(e, model, time.monotonic() - start_time)
 
-            return {
-                "response": data.get("message", {}).get("content", ""),
-                "tokens": data.get("eval_count", 0) + data.get("prompt_eval_count", 0),
-                "time": elapsed,
-                "model": model,
-            }
+    async def agenerate(
+        self,
+        prompt: str,
+        model: str,
+        system: str = "",
+        temperature: float = 0.3,
+        max_tokens: int = 4096,
+        format: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Асинхронная генерация через Ollama API (см. generate)
+
+        Идентичный запрос, который уже выполняется, не отправляется повторно —
+        вызывающий дожидается ответа первого.
+
+        Args:
+            format: "json" — ответ модели ограничен валидным JSON
+        """
+        key = _content_key(model, str(temperature), str(max_tokens), format or "", system, prompt)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return dict(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._agenerate(prompt, model, system, temperature, max_tokens, format)
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.cancel()
+
+    async def _agenerate(
+        self,
+        prompt: str,
+        model: str,
+        system: str,
+        temperature: float,
+        max_tokens: int,
+        format: Optional[str],
+    ) -> Dict[str, Any]:
+        start_time = time.monotonic()
+
+        try:
+            async with self._semaphore():
+                response = await self.aclient.post(
+                    "/api/chat",
+                    json=self._chat_request(prompt, model, system, temperature, max_tokens, format),
+                )
+            response.raise_for_status()
+            return self._chat_result(response.json(), model, time.monotonic() - start_time)
 
         except Exception as e:
-            return {
-                "response": "",
-                "error": str(e),
-                "tokens": 0,
-                "time": time.time() - start_time,
-                "model": model,
-            }
+            return self._error_result(e, model, time.monotonic() - start_time)
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        model: str,
+        system: str = "",
+        temperature: float = 0.3,
+        max_tokens: int = 4096,
+        cancel: Optional[asyncio.Event] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Потоковая генерация через Ollama API (NDJSON)
+
+        Args:
+            cancel: Событие отмены — генерация прерывается, возвращается накопленный ответ
+            on_token: Вызывается для каждого фрагмента ответа
+
+        Returns:
+            dict как у generate + "ttft" (время до первого токена) и "cancelled"
+        """
+        start_time = time.monotonic()
+        parts = []
+        ttft = None
+        cancelled = False
+        data: Dict[str, Any] = {}
+
+        try:
+            async with self._semaphore(), self.aclient.stream(
+                "POST",
+                "/api/chat",
+                json=self._chat_request(prompt, model, system, temperature, max_tokens, stream=True),
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if cancel is not None and cancel.is_set():
+                        cancelled = True
+                        break
+                    if not line:
+                        continue
+
+                    data = _loads(line)
+                    chunk = data.get("message", {}).get("content", "")
+                    if chunk:
+                        if ttft is None:
+                            ttft = time.monotonic() - start_time
+                        parts.append(chunk)
+                        if on_token:
+                            on_token(chunk)
+                    if data.get("done"):
+                        break
+
+        except Exception as e:
+            return self._error_result(e, model, time.monotonic() - start_time)
+
+        return {
+            "response": "".join(parts),
+            "tokens": data.get("eval_count", 0) + data.get("prompt_eval_count", 0),
+            "time": time.monotonic() - start_time,
+            "ttft": ttft,
+            "cancelled": cancelled,
+            "model": model,
+        }
+
+    async def warmup(self, model: str) -> bool:
+        """Загрузить модель в Ollama заранее (пустой промпт), чтобы первый запрос не ждал загрузки"""
+        try:
+            response = await self.aclient.post(
+                "/api/generate",
+                json={"model": model, "keep_alive": self.keep_alive},
+            )
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
 
     def check_health(self) -> bool:
         """Проверить доступность Ollama"""
@@ -147,6 +509,62 @@ class LLMClient:
         except:
             return False
 
+    async def aclose(self):
+        """Закрыть общий асинхронный клиент текущего event loop"""
+        client = _async_clients.get(asyncio.get_running_loop(), {}).pop(self.base_url, None)
+        if client is not None:
+            await client.aclose()
+
+
+class _Scheduler:
+    """
+    Топологический планировщик графа (алгоритм Кана)
+
+    Счётчики невыполненных зависимостей ведёт сам граф (reset_ready в начале
+    прогона, mark_completed по завершении задачи): завершение освобождает
+    только её последователей — O(N + E) на весь граф.
+
+    Готовые задачи выдаются сгруппированными по bucket (имя модели), внутри
+    группы — по приоритету: задачи одной модели уходят подряд, и Ollama
+    реже перегружает модели.
+    """
+
+    def __init__(self, graph: TaskGraph, bucket: Optional[Callable[[Task], str]] = None):
+        self.graph = graph
+        self.tasks = graph.tasks
+        self.bucket = bucket
+
+        graph.reset_ready()
+        self.ready: deque = deque(graph.get_ready_tasks())
+        self.done = 0
+
+    def _order(self, task: Task) -> Tuple[str, int]:
+        return (self.bucket(task) if self.bucket else "", task.priority.value)
+
+    def take(self, limit: Optional[int] = None) -> List[Task]:
+        """Забрать готовые задачи (не больше limit, по модели и приоритету)"""
+        if limit is None or limit >= len(self.ready):
+            batch = sorted(self.ready, key=self._order)
+            self.ready.clear()
+            return batch
+
+        self.ready = deque(sorted(self.ready, key=self._order))
+        return [self.ready.popleft() for _ in range(limit)]
+
+    def complete(self, task_id: str) -> None:
+        """Отметить задачу выполненной и освободить её последователей"""
+        self.done += 1
+        self.graph.mark_completed(task_id)
+        self.ready.extend(self.graph.get_ready_tasks())
+
+    @property
+    def finished(self) -> bool:
+        return self.done == len(self.tasks)
+
+    def blocked(self) -> List[str]:
+        """Задачи, которые так и не стали готовыми"""
+        return [task_id for task_id, task in self.tasks.items() if task.remaining_deps > 0]
+
 
 class ExecutionScheduler:
     """
@@ -164,60 +582,190 @@ class ExecutionScheduler:
         ollama_url: str = "http://localhost:11434",
         max_parallel: int = 2,
         max_retries: int = 3,
-        mode: ExecutionMode = ExecutionMode.PARALLEL
+        mode: ExecutionMode = ExecutionMode.PARALLEL,
+        batch_size: int = 1,
+        max_batch_prompt_tokens: int = 8000,
+        keep_alive: Any = -1,
+        results_log: Optional[Union[str, Path]] = None
     ):
-        self.llm = LLMClient(ollama_url)
+        """
+        Args:
+            ollama_url: URL Ollama
+            max_parallel: Максимум одновременно выполняемых задач
+            max_retries: Попыток на задачу
+            mode: Режим выполнения
+            batch_size: Сколько готовых задач с одинаковыми моделью и агентом
+                объединять в один запрос (1 — без объединения)
+            max_batch_prompt_tokens: Лимит оценки токенов промпта объединённого запроса
+            keep_alive: Сколько Ollama держит модели в памяти (-1 — не выгружать)
+            results_log: Файл append-only лога результатов (см. ResultLog); без него —
+                результаты в памяти
+        """
+        self.llm = LLMClient(
+            ollama_url,
+            max_connections=max_parallel,
+            keep_alive=keep_alive,
+            max_concurrency=max_parallel,
+        )
         self.model_router = ModelRouter(ollama_url)
-        self.agent_router = AgentRouter()
+        self.agent_router = get_router()
+
+        # Выбор агента зависит только от (тип, описание) — запоминается на время
+        # жизни планировщика. Выбор модели не кешируется: он учитывает свободную RAM.
+        self._select_agent = functools.lru_cache(maxsize=256)(self.agent_router.select_agent)
 
         self.max_parallel = max_parallel
         self.max_retries = max_retries
         self.mode = mode
+        self.batch_size = batch_size
+        self.max_batch_prompt_tokens = max_batch_prompt_tokens
 
-        self.executor = ThreadPoolExecutor(max_workers=max_parallel)
+        # Статистика объединённых запросов (fallbacks — ответ не разобран)
+        self.batch_stats = {"batches": 0, "fallbacks": 0}
+
+        self.executor = _POOL
 
         # Callbacks
         self.on_task_start: Optional[Callable[[Task], None]] = None
         self.on_task_complete: Optional[Callable[[Task, ExecutionResult], None]] = None
         self.on_human_approval: Optional[Callable[[str], bool]] = None
 
-        # Результаты
-        self.results: Dict[str, ExecutionResult] = {}
+        # Результаты: в памяти или в логе на диске (накапливается между запусками графов)
+        self._results_log = ResultLog(results_log) if results_log else None
+        self.results: Mapping[str, ExecutionResult] = self._results_log if self._results_log is not None else {}
+
+        # LRU промптов: (task_id, context_key) -> промпт; retry и батчи не пересобирают строку
+        self._prompt_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._prompt_cache_size = 512
+        self._prompt_lock = threading.Lock()  # execute_tasks собирает промпты в потоках
+
+    def _model_name(self, task: Task) -> str:
+        """Имя модели для задачи (ключ группировки в планировщике)"""
+        return self.model_router.select_model(task.type.value, "medium")[0].name
 
     def _build_prompt(
         self,
         context: ExecutionContext
     ) -> str:
-        """Построить промпт для выполнения задачи"""
-        parts = []
+        """Построить промпт для выполнения задачи (с кэшем по содержимому контекста)"""
+        if context.previous_results:
+            return self._render_prompt(context)
+
+        key = (context.task.id, context.context_key)
+        with self._prompt_lock:
+            prompt = self._prompt_cache.get(key)
+            if prompt is not None:
+                self._prompt_cache.move_to_end(key)
+                return prompt
+
+        prompt = self._render_prompt(context)
+        with self._prompt_lock:
+            self._prompt_cache[key] = prompt
+            if len(self._prompt_cache) > self._prompt_cache_size:
+                self._prompt_cache.popitem(last=False)
+        return prompt
+
+    @staticmethod
+    def _render_prompt(context: ExecutionContext) -> str:
+        """Собрать текст промпта из контекста (одним буфером, без промежуточных строк)"""
+        task = context.task
+        buf = io.StringIO()
+        w = buf.write
 
         # Описание задачи
-        parts.append(f"## Задача: {context.task.title}")
-        parts.append(f"\n{context.task.description}")
+        w("## Задача: ")
+        w(task.title)
+        w("\n\n")
+        w(task.description)
 
         # Файлы для работы
-        if context.task.files_to_read:
-            parts.append(f"\n## Файлы для чтения:\n- " + "\n- ".join(context.task.files_to_read))
+        if task.files_to_read:
+            w("\n\n## Файлы для чтения:\n- ")
+            w("\n- ".join(task.files_to_read))
 
-        if context.task.files_to_modify:
-            parts.append(f"\n## Файлы для изменения:\n- " + "\n- ".join(context.task.files_to_modify))
+        if task.files_to_modify:
+            w("\n\n## Файлы для изменения:\n- ")
+            w("\n- ".join(task.files_to_modify))
 
         # RAG контекст
         if context.relevant_code:
-            parts.append(f"\n## Релевантный код:\n```\n{context.relevant_code}\n```")
+            w("\n\n## Релевантный код:\n```\n")
+            w(context.relevant_code)
+            w("\n```")
 
         # Память проекта
         if context.project_memories:
-            parts.append(f"\n## Память проекта:\n{context.project_memories}")
+            w("\n\n## Память проекта:\n")
+            w(context.project_memories)
 
         # Предыдущие результаты
         if context.previous_results:
-            parts.append("\n## Предыдущие шаги:")
+            w("\n\n## Предыдущие шаги:")
             for result in context.previous_results[-3:]:  # Последние 3
-                status = "✅" if result.success else "❌"
-                parts.append(f"- {status} {result.task_id}: {result.output[:200]}...")
+                w("\n- ✅ " if result.success else "\n- ❌ ")
+                w(result.task_id)
+                w(": ")
+                w(result.output[:200])
+                w("...")
+
+        return buf.getvalue()
+
+    def _create_context(
+        self,
+        task: Task,
+        project_context: str = "",
+        rag_context: str = ""
+    ) -> ExecutionContext:
+        """Выбрать агента и модель, создать контекст выполнения"""
+        # Выбрать агента
+        agent = self._select_agent(task.type.value, task.description)
+
+        # Выбрать модель
+        model, reason = self.model_router.select_model(task.type.value, "medium")
+
+        return ExecutionContext(
+            task=task,
+            agent=agent,
+            model=model,
+            relevant_code=rag_context,
+            project_memories=project_context,
+            context_key=_content_key(
+                task.title,
+                task.description,
+                "\n".join(task.files_to_read),
+                "\n".join(task.files_to_modify),
+                rag_context,
+                project_context,
+            ),
+        )
+
+    def _make_result(
+        self,
+        task: Task,
+        context: ExecutionContext,
+        llm_result: Dict[str, Any],
+        elapsed: float
+    ) -> ExecutionResult:
+        """Результат задачи из ответа LLM"""
+        error = llm_result.get("error")
+        failed = error is not None
+        result = ExecutionResult(
+            task_id=task.id,
+            success=not failed,
+            output="" if failed else llm_result["response"],
+            error=error,
+            tokens_used=0 if failed else llm_result["tokens"],
+            execution_time_seconds=elapsed,
+            model_used=context.model.name,
+            agent_used=context.agent.name,
+            status_code=llm_result.get("status_code"),
+        )
+
+        # Callback: завершение
+        if self.on_task_complete:
+            self.on_task_complete(task, result)
 
-        return "\n".join(parts)
+        return result
 
     def _execute_single_task(
         self,
@@ -225,7 +773,7 @@ class ExecutionScheduler:
         context: ExecutionContext
     ) -> ExecutionResult:
         """Выполнить одну задачу"""
-        start_time = time.time()
+        start_time = time.monotonic()
 
         # Callback: начало
         if self.on_task_start:
@@ -243,34 +791,88 @@ class ExecutionScheduler:
             max_tokens=context.agent.max_tokens,
         )
 
-        elapsed = time.time() - start_time
-
-        # Проверить на ошибку
-        if "error" in llm_result:
-            result = ExecutionResult(
-                task_id=task.id,
-                success=False,
-                error=llm_result["error"],
-                execution_time_seconds=elapsed,
-                model_used=context.model.name,
-                agent_used=context.agent.name,
-            )
-        else:
-            result = ExecutionResult(
-                task_id=task.id,
-                success=True,
-                output=llm_result["response"],
-                tokens_used=llm_result["tokens"],
-                execution_time_seconds=elapsed,
-                model_used=context.model.name,
-                agent_used=context.agent.name,
+        return self._make_result(task, context, llm_result, time.monotonic() - start_time)
+
+    async def _aexecute_single_task(
+        self,
+        task: Task,
+        context: ExecutionContext
+    ) -> ExecutionResult:
+        """Выполнить одну задачу (асинхронно)"""
+        start_time = time.monotonic()
+
+        # Callback: начало
+        if self.on_task_start:
+            self.on_task_start(task)
+
+        # Построить промпт
+        prompt = self._build_prompt(context)
+
+        # Вызвать LLM
+        llm_result = await self.llm.agenerate(
+            prompt=prompt,
+            model=context.model.name,
+            system=context.agent.system_prompt,
+            temperature=context.agent.temperature,
+            max_tokens=context.agent.max_tokens,
+        )
+
+        return self._make_result(task, context, llm_result, time.monotonic() - start_time)
+
+    def _prepare_retry(
+        self,
+        context: ExecutionContext,
+        attempt: int,
+        last_error: Optional[str]
+    ) -> None:
+        """Для retry используем другого агента или модель"""
+        logger.warning("  ⚠️ Attempt %d failed: %s", attempt + 1, last_error)
+
+        if attempt == 1:
+            # Попробовать fallback модель
+            fallback_model = self.model_router.models.get(context.agent.fallback_model)
+            if fallback_model:
+                context.model = fallback_model
+                logger.info("  🔄 Switching to fallback model: %s", fallback_model.name)
+
+        elif attempt == 2:
+            # Попробовать другого агента
+            retry_agent = self.agent_router.get_agent_for_retry(
+                context.agent.type,
+                last_error or ""
             )
+            context.agent = retry_agent
+            logger.info("  🔄 Switching to retry agent: %s", retry_agent.name)
 
-        # Callback: завершение
-        if self.on_task_complete:
-            self.on_task_complete(task, result)
+    @staticmethod
+    def _retry_delay(result: ExecutionResult, attempt: int) -> Optional[float]:
+        """
+        Пауза перед следующей попыткой
 
-        return result
+        Returns:
+            None — ошибка не исправится повтором, иначе секунды ожидания
+            (экспоненциальный backoff с jitter для перегруженной Ollama)
+        """
+        if result.status_code in _NON_RETRYABLE_STATUS:
+            return None
+        if result.status_code in _BACKOFF_STATUS:
+            return min(30.0, 0.5 * 2 ** attempt + random.random() * 0.5)
+        return 0.0
+
+    def _retries_exhausted(
+        self,
+        task: Task,
+        context: ExecutionContext,
+        last_error: Optional[str]
+    ) -> ExecutionResult:
+        """Все попытки исчерпаны"""
+        return ExecutionResult(
+            task_id=task.id,
+            success=False,
+            error=f"All {self.max_retries} attempts failed. Last error: {last_error}",
+            model_used=context.model.name,
+            agent_used=context.agent.name,
+        )
 
     def _execute_with_retry(
         self,
@@ -279,62 +881,141 @@ class ExecutionScheduler:
         rag_context: str = ""
     ) -> ExecutionResult:
         """Выполнить задачу с retry логикой"""
-        # Выбрать агента
-        agent = self.agent_router.select_agent(
-            task.type.value,
-            task.description
-        )
+        context = self._create_context(task, project_context, rag_context)
 
-        # Выбрать модель
-        model, reason = self.model_router.select_model(
-            task.type.value,
-            complexity="medium"
-        )
+        last_error = None
+        for attempt in range(self.max_retries):
+            result = self._execute_single_task(task, context)
 
-        # Создать контекст
-        context = ExecutionContext(
-            task=task,
-            agent=agent,
-            model=model,
-            relevant_code=rag_context,
-            project_memories=project_context,
-        )
+            if result.success:
+                return result
+
+            last_error = result.error
+            delay = self._retry_delay(result, attempt)
+            if delay is None:
+                # Ошибка запроса (400/404/422) — повтор не поможет
+                return result
+            self._prepare_retry(context, attempt, last_error)
+            if delay and attempt + 1 < self.max_retries:
+                time.sleep(delay)
+
+        return self._retries_exhausted(task, context, last_error)
+
+    async def _aexecute_with_retry(
+        self,
+        task: Task,
+        project_context: str = "",
+        rag_context: str = "",
+        context: Optional[ExecutionContext] = None
+    ) -> ExecutionResult:
+        """Выполнить задачу с retry логикой (асинхронно)"""
+        if context is None:
+            context = self._create_context(task, project_context, rag_context)
 
         last_error = None
         for attempt in range(self.max_retries):
-            result = self._execute_single_task(task, context)
+            result = await self._aexecute_single_task(task, context)
 
             if result.success:
                 return result
 
             last_error = result.error
-            print(f"  ⚠️ Attempt {attempt + 1} failed: {last_error}")
-
-            # Для retry используем другого агента или модель
-            if attempt == 1:
-                # Попробовать fallback модель
-                fallback_model = self.model_router.models.get(agent.fallback_model)
-                if fallback_model:
-                    context.model = fallback_model
-                    print(f"  🔄 Switching to fallback model: {fallback_model.name}")
-
-            elif attempt == 2:
-                # Попробовать другого агента
-                retry_agent = self.agent_router.get_agent_for_retry(
-                    agent.type,
-                    last_error or ""
-                )
-                context.agent = retry_agent
-                print(f"  🔄 Switching to retry agent: {retry_agent.name}")
+            delay = self._retry_delay(result, attempt)
+            if delay is None:
+                # Ошибка запроса (400/404/422) — повтор не поможет
+                return result
+            self._prepare_retry(context, attempt, last_error)
+            if delay and attempt + 1 < self.max_retries:
+                await asyncio.sleep(delay)
 
-        # Все попытки исчерпаны
-        return ExecutionResult(
-            task_id=task.id,
-            success=False,
-            error=f"All {self.max_retries} attempts failed. Last error: {last_error}",
-            model_used=context.model.name,
-            agent_used=context.agent.name,
+        return self._retries_exhausted(task, context, last_error)
+
+    def _group_for_batching(
+        self,
+        items: List[Tuple[Task, ExecutionContext]]
+    ) -> List[List[Tuple[Task, ExecutionContext]]]:
+        """Разбить задачи на группы для объединённых запросов (одна модель и агент)"""
+        if self.batch_size <= 1:
+            return [[item] for item in items]
+
+        buckets: Dict[Tuple[str, str], List[Tuple[Task, ExecutionContext]]] = {}
+        for item in items:
+            context = item[1]
+            buckets.setdefault((context.model.name, context.agent.name), []).append(item)
+
+        groups = []
+        for bucket in buckets.values():
+            group: List[Tuple[Task, ExecutionContext]] = []
+            group_tokens = 0
+            for item in bucket:
+                tokens = len(self._build_prompt(item[1])) // 4
+                if group and (
+                    len(group) >= self.batch_size
+                    or group_tokens + tokens > self.max_batch_prompt_tokens
+                ):
+                    groups.append(group)
+                    group, group_tokens = [], 0
+                group.append(item)
+                group_tokens += tokens
+            groups.append(group)
+
+        return groups
+
+    async def _aexecute_batch(
+        self,
+        group: List[Tuple[Task, ExecutionContext]]
+    ) -> List[ExecutionResult]:
+        """
+        Выполнить группу задач одним запросом с ответом {task_id: ответ}
+
+        Если ответ не разобран — каждая задача выполняется отдельно.
+        """
+        if len(group) == 1:
+            task, context = group[0]
+            return [await self._aexecute_with_retry(task, context=context)]
+
+        start_time = time.monotonic()
+        for task, _ in group:
+            if self.on_task_start:
+                self.on_task_start(task)
+
+        parts = ["Return JSON {task_id: answer} for the following tasks:"]
+        for task, context in group:
+            parts.append(f"\n### task_id: {task.id}\n{self._build_prompt(context)}")
+
+        context = group[0][1]
+        llm_result = await self.llm.agenerate(
+            prompt="\n".join(parts),
+            model=context.model.name,
+            system=context.agent.system_prompt,
+            temperature=context.agent.temperature,
+            max_tokens=context.agent.max_tokens * len(group),
+            format="json",
         )
+        self.batch_stats["batches"] += 1
+
+        answers = None
+        if llm_result.get("error") is None:
+            try:
+                answers = _loads(llm_result["response"])
+            except ValueError:
+                pass
+        if not isinstance(answers, dict) or not all(
+            isinstance(answers.get(task.id), str) for task, _ in group
+        ):
+            self.batch_stats["fallbacks"] += 1
+            return list(await asyncio.gather(*(
+                self._aexecute_with_retry(task, context=context) for task, context in group
+            )))
+
+        elapsed = time.monotonic() - start_time
+        tokens = llm_result["tokens"] // len(group)
+        return [
+            self._make_result(
+                task, context, {"response": answers[task.id], "tokens": tokens}, elapsed
+            )
+            for task, context in group
+        ]
 
     def execute_task(
         self,
@@ -355,23 +1036,133 @@ class ExecutionScheduler:
         """
         task.status = TaskStatus.IN_PROGRESS
         task.started_at = datetime.now()
+        start = time.monotonic()
 
         result = self._execute_with_retry(task, project_context, rag_context)
 
+        self._complete_task(task, result, time.monotonic() - start)
+        return result
+
+    async def aexecute_task(
+        self,
+        task: Task,
+        project_context: str = "",
+        rag_context: str = ""
+    ) -> ExecutionResult:
+        """Выполнить одну задачу (асинхронно, см. execute_task)"""
+        task.status = TaskStatus.IN_PROGRESS
+        task.started_at = datetime.now()
+        start = time.monotonic()
+
+        result = await self._aexecute_with_retry(task, project_context, rag_context)
+
+        self._complete_task(task, result, time.monotonic() - start)
+        return result
+
+    def execute_tasks(
+        self,
+        tasks: List[Task],
+        project_context: str = ""
+    ) -> List[ExecutionResult]:
+        """
+        Выполнить независимые задачи параллельно (синхронно)
+
+        В потоки пула уходят только запросы к модели; статусы задач и results
+        обновляются в вызывающем потоке.
+        """
+        start = time.monotonic()
+        for task in tasks:
+            task.status = TaskStatus.IN_PROGRESS
+            task.started_at = datetime.now()
+
+        futures = [
+            self.executor.submit(self._execute_with_retry, task, project_context)
+            for task in tasks
+        ]
+        results = [future.result() for future in futures]
+
+        elapsed = time.monotonic() - start
+        for task, result in zip(tasks, results, strict=True):
+            self._complete_task(task, result, elapsed)
+        return results
+
+    def record_result(self, task: Task, result: ExecutionResult) -> None:
+        """Учесть готовый результат (например, из кэша) как выполненную задачу"""
+        task.started_at = datetime.now()
+        self._complete_task(task, result, 0.0)
+
+        if self.on_task_complete:
+            self.on_task_complete(task, result)
+
+    def _complete_task(self, task: Task, result: ExecutionResult, elapsed: float) -> None:
+        """Записать результат в задачу и в results (elapsed — монотонная длительность)"""
         task.result = result.output if result.success else None
         task.error = result.error
         task.status = TaskStatus.COMPLETED if result.success else TaskStatus.FAILED
-        task.completed_at = datetime.now()
+        task.completed_at = task.started_at + timedelta(seconds=elapsed)
 
         self.results[task.id] = result
-        return result
+
+    async def warmup_models(self, graph: TaskGraph) -> None:
+        """Параллельно загрузить в Ollama модели, которые понадобятся задачам графа"""
+        models = {self._model_name(task) for task in graph.tasks.values()}
+        await asyncio.gather(*(self.llm.warmup(model) for model in models))
+
+    async def _run_parallel(
+        self,
+        scheduler: _Scheduler,
+        project_context: str,
+        rag_retriever: Optional[Callable[[str], str]]
+    ) -> None:
+        """
+        Параллельное выполнение: запускаются все готовые задачи
+
+        Число одновременных запросов к Ollama ограничивает семафор LLMClient
+        (max_parallel). Завершение любой задачи сразу запускает ставших
+        готовыми последователей, не дожидаясь остальных задач волны.
+        """
+        in_flight: Dict[asyncio.Task, Tuple[List[Tuple[Task, ExecutionContext]], float]] = {}
+
+        while scheduler.ready or in_flight:
+            if scheduler.ready:
+                batch = scheduler.take()
+
+                logger.info("\n📦 Executing batch of %d tasks:", len(batch))
+                items = []
+                for task in batch:
+                    logger.info("   - %s: %s", task.id, task.title)
+                    task.status = TaskStatus.IN_PROGRESS
+                    task.started_at = datetime.now()
+
+                    # Получить RAG контекст если есть retriever
+                    rag_context = ""
+                    if rag_retriever:
+                        rag_context = rag_retriever(task.description)
+
+                    items.append((task, self._create_context(task, project_context, rag_context)))
+
+                # Задачи с одинаковыми моделью и агентом — одним запросом
+                start = time.monotonic()
+                for group in self._group_for_batching(items):
+                    in_flight[asyncio.create_task(self._aexecute_batch(group))] = (group, start)
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                group, start = in_flight.pop(future)
+                elapsed = time.monotonic() - start
+                for (task, _), result in zip(group, future.result(), strict=True):
+                    self._complete_task(task, result, elapsed)
+                    scheduler.complete(task.id)
+
+                    status = "✅" if result.success else "❌"
+                    logger.info("   %s %s: %.1fs", status, task.id, result.execution_time_seconds)
 
     async def execute_graph_async(
         self,
         graph: TaskGraph,
         project_context: str = "",
         rag_retriever: Optional[Callable[[str], str]] = None
-    ) -> Dict[str, ExecutionResult]:
+    ) -> Mapping[str, ExecutionResult]:
         """
         Асинхронное выполнение графа задач
 
@@ -383,105 +1174,68 @@ class ExecutionScheduler:
         Returns:
             Dict task_id -> ExecutionResult
         """
-        completed = set()
-        results = {}
-
-        while len(completed) < len(graph.tasks):
-            # Найти готовые задачи
-            ready_tasks = graph.get_ready_tasks(completed)
-
-            if not ready_tasks:
-                # Проверяем на deadlock
-                pending = [t for t in graph.tasks.values()
-                          if t.id not in completed]
-                if pending:
-                    print(f"⚠️ Deadlock detected. Pending tasks: {[t.id for t in pending]}")
-                    break
-                continue
-
-            # Ограничить параллельность
-            batch = ready_tasks[:self.max_parallel]
-
-            print(f"\n📦 Executing batch of {len(batch)} tasks:")
-            for task in batch:
-                print(f"   - {task.id}: {task.title}")
+        scheduler = _Scheduler(graph, self._model_name)
+        # Результаты прогона пишет _complete_task — в лог на диске или в новый словарь
+        self.results = self._results_log if self._results_log is not None else {}
 
-            # Выполнить параллельно
-            if self.mode == ExecutionMode.PARALLEL and len(batch) > 1:
-                tasks_coro = []
-                for task in batch:
-                    # Получить RAG контекст если есть retriever
-                    rag_context = ""
-                    if rag_retriever:
-                        rag_context = rag_retriever(task.description)
+        if rag_retriever:
+            # Одинаковые описания задач не запрашивают RAG повторно
+            rag_retriever = functools.lru_cache(maxsize=256)(rag_retriever)
 
-                    # Создать корутину
-                    coro = asyncio.get_event_loop().run_in_executor(
-                        self.executor,
-                        self._execute_with_retry,
-                        task,
-                        project_context,
-                        rag_context
-                    )
-                    tasks_coro.append((task, coro))
-
-                # Ждать завершения
-                for task, coro in tasks_coro:
-                    result = await coro
-                    results[task.id] = result
-                    completed.add(task.id)
+        await self.warmup_models(graph)
 
-                    status = "✅" if result.success else "❌"
-                    print(f"   {status} {task.id}: {result.execution_time_seconds:.1f}s")
+        if self.mode == ExecutionMode.PARALLEL:
+            await self._run_parallel(scheduler, project_context, rag_retriever)
 
-            else:
-                # Последовательное выполнение
-                for task in batch:
-                    rag_context = ""
-                    if rag_retriever:
-                        rag_context = rag_retriever(task.description)
+        while scheduler.ready:
+            # Последовательное выполнение с учётом ограничения параллельности
+            batch = scheduler.take(self.max_parallel)
 
-                    result = self.execute_task(task, project_context, rag_context)
-                    results[task.id] = result
-                    completed.add(task.id)
+            logger.info("\n📦 Executing batch of %d tasks:", len(batch))
+            for task in batch:
+                logger.info("   - %s: %s", task.id, task.title)
 
-                    status = "✅" if result.success else "❌"
-                    print(f"   {status} {task.id}: {result.execution_time_seconds:.1f}s")
+            for task in batch:
+                rag_context = ""
+                if rag_retriever:
+                    rag_context = rag_retriever(task.description)
 
-        self.results = results
-        return results
+                result = await self.aexecute_task(task, project_context, rag_context)
+                scheduler.complete(task.id)
+
+                status = "✅" if result.success else "❌"
+                logger.info("   %s %s: %.1fs", status, task.id, result.execution_time_seconds)
+
+        if not scheduler.finished:
+            logger.warning("⚠️ Deadlock detected. Pending tasks: %s", scheduler.blocked())
+
+        return self.results
 
     def execute_graph_sync(
         self,
         graph: TaskGraph,
         project_context: str = "",
         rag_retriever: Optional[Callable[[str], str]] = None
-    ) -> Dict[str, ExecutionResult]:
+    ) -> Mapping[str, ExecutionResult]:
         """
         Полностью синхронная версия выполнения графа задач
         Выполняет задачи последовательно с учётом зависимостей
         """
-        completed = set()
-        results = {}
-
-        while len(completed) < len(graph.tasks):
-            # Найти задачи, готовые к выполнению
-            ready_tasks = [
-                task for task in graph.tasks.values()
-                if task.id not in completed
-                and all(dep in completed for dep in task.depends_on)
-            ]
-
-            if not ready_tasks:
-                # Deadlock или все выполнены
-                remaining = set(graph.tasks.keys()) - completed
-                if remaining:
-                    print(f"⚠️ Deadlock: {remaining}")
-                break
+        scheduler = _Scheduler(graph, self._model_name)
+        # Результаты прогона пишет _complete_task — в лог на диске или в новый словарь
+        self.results = self._results_log if self._results_log is not None else {}
+
+        if rag_retriever:
+            # Одинаковые описания задач не запрашивают RAG повторно
+            rag_retriever = functools.lru_cache(maxsize=256)(rag_retriever)
+
+        while scheduler.ready:
+            # Все задачи, готовые к выполнению
+            ready_tasks = scheduler.take()
 
-            print(f"\n📦 Executing {len(ready_tasks)} task(s):")
+            logger.info("\n📦 Executing %d task(s):", len(ready_tasks))
             for task in ready_tasks:
-                print(f"   - {task.id}: {task.title}")
+                logger.info("   - %s: %s", task.id, task.title)
 
             # Последовательное выполнение
             for task in ready_tasks:
@@ -490,21 +1244,22 @@ class ExecutionScheduler:
                     rag_context = rag_retriever(task.description)
 
                 result = self.execute_task(task, project_context, rag_context)
-                results[task.id] = result
-                completed.add(task.id)
+                scheduler.complete(task.id)
 
                 status = "✅" if result.success else "❌"
-                print(f"   {status} {task.id}: {result.execution_time_seconds:.1f}s")
+                logger.info("   %s %s: %.1fs", status, task.id, result.execution_time_seconds)
 
-        self.results = results
-        return results
+        if not scheduler.finished:
+            logger.warning("⚠️ Deadlock: %s", set(scheduler.blocked()))
+
+        return self.results
 
     def execute_graph(
         self,
         graph: TaskGraph,
         project_context: str = "",
         rag_retriever: Optional[Callable[[str], str]] = None
-    ) -> Dict[str, ExecutionResult]:
+    ) -> Mapping[str, ExecutionResult]:
         """
         Синхронная версия выполнения графа задач
         """
@@ -512,15 +1267,23 @@ class ExecutionScheduler:
 
     def get_summary(self) -> dict:
         """Получить сводку выполнения"""
-        total = len(self.results)
-        successful = sum(1 for r in self.results.values() if r.success)
-        failed = total - successful
-
-        total_tokens = sum(r.tokens_used for r in self.results.values())
-        total_time = sum(r.execution_time_seconds for r in self.results.values())
+        total = successful = total_tokens = 0
+        total_time = 0.0
+        models = set()
+        agents = set()
+
+        # Один проход: с ResultLog каждое обращение к результату — чтение с диска
+        for r in self.results.values():
+            total += 1
+            successful += r.success
+            total_tokens += r.tokens_used
+            total_time += r.execution_time_seconds
+            models.add(r.model_used)
+            agents.add(r.agent_used)
 
-        models_used = list(set(r.model_used for r in self.results.values()))
-        agents_used = list(set(r.agent_used for r in self.results.values()))
+        failed = total - successful
+        models_used = list(models)
+        agents_used = list(agents)
 
         return {
             "total_tasks": total,
@@ -536,8 +1299,11 @@ class ExecutionScheduler:
 
 # CLI для тестирования
 if __name__ == "__main__":
+    from ._logging import setup_logging
     from .task_parser import TaskParser
 
+    setup_logging()
+
     # Проверяем Ollama
     scheduler = ExecutionScheduler()
 
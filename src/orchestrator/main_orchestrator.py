@@ -5,17 +5,46 @@ Main Orchestrator
 Связывает все компоненты: TaskParser, ModelRouter, AgentRouter, Executor, RAG.
 """
 
+import asyncio
+import dataclasses
+import io
 import json
+import logging
 import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, FrozenSet, List, Optional, Callable, Any, Tuple
 
 from .task_parser import TaskParser, TaskGraph, Task, TaskType, TaskStatus
 from .model_router import ModelRouter
-from .agent_router import AgentRouter, AgentType
+from .agent_router import AgentType, get_router
 from .executor import ExecutionScheduler, ExecutionResult, ExecutionMode
+from ._logging import ensure_logging, flush_logging, setup_logging
+from .semantic_cache import SemanticCache
+
+try:
+    import orjson
+
+    def _pretty_json(obj: Any) -> str:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str
+        ).decode()
+except ImportError:  # orjson опционален — fallback на stdlib
+    def _pretty_json(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+logger = logging.getLogger(__name__)
+
+_RULE = "=" * 50
+
+# Типы задач, после которых запускаются тесты
+_CODE_TASK_TYPES: FrozenSet[TaskType] = frozenset(
+    {TaskType.IMPLEMENTATION, TaskType.REFACTORING, TaskType.BUGFIX}
+)
+
+# Ответы, означающие одобрение в CLI
+_APPROVE_ANSWERS = frozenset({"y", "yes", "да"})
 
 
 @dataclass
@@ -24,7 +53,9 @@ class OrchestratorConfig:
     # Ollama
     ollama_url: str = "http://localhost:11434"
 
-    # Параллельность
+    # Параллельность: одновременных запросов к Ollama. Имеет смысл держать равным
+    # OLLAMA_NUM_PARALLEL сервера (слоты на модель), а число разных моделей графа —
+    # не больше OLLAMA_MAX_LOADED_MODELS, иначе Ollama выгружает модели между задачами
     max_parallel_tasks: int = 2
     max_retries: int = 3
 
@@ -41,6 +72,10 @@ class OrchestratorConfig:
     enable_rag: bool = True
     rag_top_k: int = 10
 
+    # Кэш ответов: классификация и план — по смыслу, review и тесты — по точному коду
+    enable_semantic_cache: bool = True
+    semantic_cache_threshold: float = 0.95  # Косинусная близость для попадания
+
 
 @dataclass
 class OrchestratorState:
@@ -48,6 +83,7 @@ class OrchestratorState:
     current_task: Optional[str] = None
     phase: str = "idle"  # idle, planning, building, testing, reviewing, deploying
     task_graph: Optional[TaskGraph] = None
+    estimate: Optional[dict] = None  # Оценка плана для task_graph
     results: Dict[str, ExecutionResult] = field(default_factory=dict)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -83,7 +119,7 @@ class LocalSwarmOrchestrator:
             smart_model=self.config.smart_model
         )
         self.model_router = ModelRouter(self.config.ollama_url)
-        self.agent_router = AgentRouter()
+        self.agent_router = get_router()
         self.executor = ExecutionScheduler(
             ollama_url=self.config.ollama_url,
             max_parallel=self.config.max_parallel_tasks,
@@ -94,6 +130,15 @@ class LocalSwarmOrchestrator:
         # RAG
         self.rag_retriever = rag_retriever
 
+        # Семантический кэш: повторные/перефразированные запросы без генерации
+        self.semantic_cache: Optional[SemanticCache] = None
+        if self.config.enable_semantic_cache:
+            self.semantic_cache = SemanticCache(
+                self.model_router.embed_batch,
+                threshold=self.config.semantic_cache_threshold,
+            )
+            self.task_parser.semantic_cache = self.semantic_cache
+
         # Состояние
         self.state = OrchestratorState()
 
@@ -107,9 +152,7 @@ class LocalSwarmOrchestrator:
         self.state.phase = phase
         if self.on_phase_change:
             self.on_phase_change(phase)
-        print(f"\n{'='*50}")
-        print(f"📍 Phase: {phase.upper()}")
-        print(f"{'='*50}")
+        logger.info("\n%s\n📍 Phase: %s\n%s", _RULE, phase.upper(), _RULE)
 
     def _request_approval(self, checkpoint: str, data: dict) -> bool:
         """Запросить одобрение пользователя"""
@@ -120,10 +163,50 @@ class LocalSwarmOrchestrator:
             return self.on_approval_needed(checkpoint, data)
 
         # CLI fallback
+        flush_logging()
         print(f"\n⭐ CHECKPOINT: {checkpoint}")
-        print(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+        print(_pretty_json(data))
         response = input("\n✅ Approve? (y/n): ").strip().lower()
-        return response in ["y", "yes", "да"]
+        return response in _APPROVE_ANSWERS
+
+    def _cached_result(self, namespace: str, key_text: str, task: Task) -> Optional[ExecutionResult]:
+        """
+        Результат из точного кэша по key_text (None — промах)
+
+        Review и тесты относятся к конкретному коду, поэтому ключ — digest
+        текста, а не смысловая близость. Попадание учитывается в executor
+        как выполненная задача (results, сводка, on_task_complete).
+        """
+        if self.semantic_cache is None:
+            return None
+
+        cached = self.semantic_cache.get_exact(namespace, key_text)
+        if cached is None:
+            return None
+        result = ExecutionResult(**cached)
+        self.executor.record_result(task, result)
+        return result
+
+    def _store_result(self, namespace: str, key_text: str, result: ExecutionResult) -> None:
+        """Сохранить успешный результат в точный кэш"""
+        if self.semantic_cache is not None and result.success:
+            self.semantic_cache.put_exact(namespace, key_text, dataclasses.asdict(result))
+
+    def _execute_cached(self, namespace: str, key_text: str, task: Task) -> ExecutionResult:
+        """execute_task через точный кэш по key_text (сохраняются только успешные результаты)"""
+        result = self._cached_result(namespace, key_text, task)
+        if result is None:
+            result = self.executor.execute_task(task)
+            self._store_result(namespace, key_text, result)
+        return result
+
+    async def _aexecute_cached(self, namespace: str, key_text: str, task: Task) -> ExecutionResult:
+        """Асинхронный вариант _execute_cached: задача выполняется на event loop"""
+        result = self._cached_result(namespace, key_text, task)
+        if result is None:
+            result = await self.executor.aexecute_task(task)
+            self._store_result(namespace, key_text, result)
+        return result
 
     def classify_task(self, task_description: str) -> dict:
         """
@@ -134,12 +217,9 @@ class LocalSwarmOrchestrator:
         """
         self._set_phase("classifying")
 
+        # Семантический кэш подключён к task_parser
         classification = self.task_parser.classify_task(task_description)
-
-        print(f"  Type: {classification['workflow_type']}")
-        print(f"  Complexity: {classification['complexity']}")
-        print(f"  Estimated tasks: {classification['estimated_tasks']}")
-
+        self._show_classification(classification)
         return classification
 
     def decompose_task(
@@ -155,30 +235,97 @@ class LocalSwarmOrchestrator:
         """
         self._set_phase("planning")
 
-        # Если есть RAG — получить контекст
+        project_context = self._with_rag(task_description, project_context)
+        graph = self.task_parser.decompose_task(task_description, project_context)
+        self._show_plan(graph)
+        return graph
+
+    def plan_task(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> Tuple[dict, TaskGraph]:
+        """
+        Phases 1-2: классификация и декомпозиция одним запросом к модели
+
+        Returns:
+            (классификация, TaskGraph)
+        """
+        self._set_phase("planning")
+
+        project_context = self._with_rag(task_description, project_context)
+        classification, graph = self.task_parser.plan(task_description, project_context)
+        self._show_classification(classification)
+        self._show_plan(graph)
+        return classification, graph
+
+    async def aplan_task(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> Tuple[dict, TaskGraph]:
+        """Phases 1-2 (асинхронно, см. plan_task): в поток уходит только RAG"""
+        self._set_phase("planning")
+
+        project_context = await asyncio.to_thread(self._with_rag, task_description, project_context)
+        classification, graph = await self.task_parser.aplan(task_description, project_context)
+        self._show_classification(classification)
+        self._show_plan(graph)
+        return classification, graph
+
+    def _with_rag(self, task_description: str, project_context: str) -> str:
+        """Дополнить контекст проекта релевантным кодом из RAG"""
         if self.rag_retriever and self.config.enable_rag:
             rag_context = self.rag_retriever(task_description)
             project_context = f"{project_context}\n\nRelevant code:\n{rag_context}"
+        return project_context
+
+    @staticmethod
+    def _show_classification(classification: dict) -> None:
+        logger.info(
+            "  Type: %s\n  Complexity: %s\n  Estimated tasks: %s",
+            classification["workflow_type"],
+            classification["complexity"],
+            classification["estimated_tasks"],
+        )
 
-        graph = self.task_parser.decompose_task(task_description, project_context)
+    def _show_plan(self, graph: TaskGraph) -> None:
+        """Запомнить план в состоянии и показать его"""
         self.state.task_graph = graph
+        self.state.estimate = None
 
         # Показать план
-        print(f"\n📋 Plan created: {len(graph.tasks)} tasks")
+        logger.info("\n📋 Plan created: %d tasks", len(graph.tasks))
         for task in graph.tasks.values():
-            deps = f" → depends on: {task.depends_on}" if task.depends_on else ""
-            print(f"  [{task.type.value}] {task.title}{deps}")
+            if task.depends_on:
+                logger.info("  [%s] %s → depends on: %s", task.type.value, task.title, task.depends_on)
+            else:
+                logger.info("  [%s] %s", task.type.value, task.title)
 
         # Оценка
-        estimate = self.task_parser.estimate_complexity(graph)
-        print(f"\n⏱️ Estimate: {estimate['estimated_time_minutes']} minutes")
-        print(f"   Parallel groups: {estimate['parallel_groups']}")
+        estimate = self._estimate(graph)
+        logger.info(
+            "\n⏱️ Estimate: %s minutes\n   Parallel groups: %s",
+            estimate["estimated_time_minutes"],
+            estimate["parallel_groups"],
+        )
+        if estimate["unreachable_tasks"]:
+            logger.warning(
+                "⚠️ Tasks that will never run (cycle or missing dependency): %s",
+                estimate["unreachable_tasks"],
+            )
 
         # Mermaid диаграмма
-        print(f"\n📈 Dependency graph:")
-        print(graph.to_mermaid())
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n📈 Dependency graph:\n%s", graph.to_mermaid())
 
-        return graph
+    def _estimate(self, graph: TaskGraph) -> dict:
+        """Оценка плана, вычисляется один раз на граф"""
+        if self.state.task_graph is not graph:
+            return self.task_parser.estimate_complexity(graph)
+        if self.state.estimate is None:
+            self.state.estimate = self.task_parser.estimate_complexity(graph)
+        return self.state.estimate
 
     def approve_plan(self, graph: TaskGraph) -> bool:
         """
@@ -187,13 +334,18 @@ class LocalSwarmOrchestrator:
         Returns:
             bool: одобрен ли план
         """
-        estimate = self.task_parser.estimate_complexity(graph)
+        # Автономный режим: данные для проверки человеком не нужны
+        if not self.config.require_human_approval:
+            return True
+
+        estimate = self._estimate(graph)
 
         data = {
             "total_tasks": len(graph.tasks),
             "tasks": [t.to_dict() for t in graph.tasks.values()],
             "estimated_time_minutes": estimate["estimated_time_minutes"],
             "models_needed": estimate["models_needed"],
+            "unreachable_tasks": estimate["unreachable_tasks"],
         }
 
         return self._request_approval("Plan Approval", data)
@@ -212,15 +364,7 @@ class LocalSwarmOrchestrator:
         self._set_phase("building")
 
         self.state.started_at = datetime.now()
-
-        # Настроить callbacks
-        def on_complete(task: Task, result: ExecutionResult):
-            status = "✅" if result.success else "❌"
-            print(f"  {status} [{task.type.value}] {task.title} ({result.execution_time_seconds:.1f}s)")
-            if self.on_task_complete:
-                self.on_task_complete(task, result)
-
-        self.executor.on_task_complete = on_complete
+        self.executor.on_task_complete = self._report_task
 
         # Выполнить
         results = self.executor.execute_graph(
@@ -232,6 +376,44 @@ class LocalSwarmOrchestrator:
         self.state.results = results
         return results
 
+    async def aexecute_plan(
+        self,
+        graph: TaskGraph,
+        project_context: str = ""
+    ) -> Dict[str, ExecutionResult]:
+        """
+        Phase 4: Выполнение плана (асинхронно)
+
+        Все готовые задачи отправляются в Ollama конкурентно через общий AsyncClient,
+        одновременно — не больше max_parallel_tasks запросов.
+
+        Returns:
+            Dict task_id -> ExecutionResult
+        """
+        self._set_phase("building")
+
+        self.state.started_at = datetime.now()
+        self.executor.on_task_complete = self._report_task
+
+        results = await self.executor.execute_graph_async(
+            graph,
+            project_context=project_context,
+            rag_retriever=self.rag_retriever if self.config.enable_rag else None
+        )
+
+        self.state.results = results
+        return results
+
+    def _report_task(self, task: Task, result: ExecutionResult) -> None:
+        """Callback завершения задачи"""
+        status = "✅" if result.success else "❌"
+        logger.info(
+            "  %s [%s] %s (%.1fs)",
+            status, task.type.value, task.title, result.execution_time_seconds
+        )
+        if self.on_task_complete:
+            self.on_task_complete(task, result)
+
     def run_review(self, results: Dict[str, ExecutionResult]) -> ExecutionResult:
         """
         Phase 5: Code Review
@@ -243,25 +425,40 @@ class LocalSwarmOrchestrator:
             return ExecutionResult(task_id="review", success=True, output="Review skipped")
 
         self._set_phase("reviewing")
+        return self._execute_cached(*self._review_job(results))
 
-        # Собрать код для review
-        code_to_review = []
-        for task_id, result in results.items():
-            if result.success and result.output:
-                code_to_review.append(f"## {task_id}\n{result.output}")
+    async def arun_review(self, results: Dict[str, ExecutionResult]) -> ExecutionResult:
+        """Phase 5: Code Review (асинхронно, см. run_review)"""
+        if not self.config.enable_review:
+            return ExecutionResult(task_id="review", success=True, output="Review skipped")
 
-        review_content = "\n\n".join(code_to_review)
+        self._set_phase("reviewing")
+        return await self._aexecute_cached(*self._review_job(results))
+
+    @staticmethod
+    def _review_job(results: Dict[str, ExecutionResult]) -> Tuple[str, str, Task]:
+        """Задача review: (namespace кэша, ключ кэша, задача)"""
+        # Собрать код для review сразу в текст задачи (без промежуточного списка)
+        buf = io.StringIO()
+        buf.write("Проведи code review следующего кода:\n\n")
+        separator = ""
+        # Порядок задач, а не завершения: иначе один и тот же код даёт разные ключи кэша
+        for task_id, result in sorted(results.items()):
+            if result.success and result.output:
+                buf.write(separator)
+                buf.write("## ")
+                buf.write(task_id)
+                buf.write("\n")
+                buf.write(result.output)
+                separator = "\n\n"
 
-        # Создать задачу для review
         review_task = Task(
             id="review",
             title="Code Review",
-            description=f"Проведи code review следующего кода:\n\n{review_content}",
+            description=buf.getvalue(),
             type=TaskType.REVIEW,
         )
-
-        # Выполнить
-        return self.executor.execute_task(review_task)
+        return "review", review_task.description, review_task
 
     def run_tests(self, results: Dict[str, ExecutionResult]) -> ExecutionResult:
         """
@@ -274,8 +471,19 @@ class LocalSwarmOrchestrator:
             return ExecutionResult(task_id="testing", success=True, output="Testing skipped")
 
         self._set_phase("testing")
+        return self._execute_cached(*self._test_job(results))
+
+    async def arun_tests(self, results: Dict[str, ExecutionResult]) -> ExecutionResult:
+        """Phase 6: Тестирование (асинхронно, см. run_tests)"""
+        if not self.config.enable_testing:
+            return ExecutionResult(task_id="testing", success=True, output="Testing skipped")
+
+        self._set_phase("testing")
+        return await self._aexecute_cached(*self._test_job(results))
 
-        # Создать задачу для тестирования
+    @staticmethod
+    def _test_job(results: Dict[str, ExecutionResult]) -> Tuple[str, str, Task]:
+        """Задача тестирования: (namespace кэша, ключ кэша, задача)"""
         test_task = Task(
             id="testing",
             title="Generate and Run Tests",
@@ -283,7 +491,11 @@ class LocalSwarmOrchestrator:
             type=TaskType.TESTING,
         )
 
-        return self.executor.execute_task(test_task)
+        # Ключ кэша — реализованный код: описание задачи тестирования не меняется
+        code = "\n\n".join(
+            r.output for _, r in sorted(results.items()) if r.success and r.output
+        )
+        return "testing", code, test_task
 
     def approve_deploy(self, summary: dict) -> bool:
         """
@@ -309,63 +521,205 @@ class LocalSwarmOrchestrator:
         Returns:
             dict: Результаты выполнения
         """
-        print(f"\n🚀 Local Swarm Orchestrator")
-        print(f"📝 Task: {task_description}")
+        plan = self._plan(task_description, project_context)
+        if plan is None:
+            return {"status": "rejected", "phase": "planning"}
+        classification, graph = plan
 
-        # Phase 1: Classify
-        classification = self.classify_task(task_description)
+        # Phase 4: Execute
+        # Снимок: review и тесты сами добавляют свои результаты в executor.results
+        results = dict(self.execute_plan(graph, project_context))
 
-        # Phase 2: Decompose
-        graph = self.decompose_task(task_description, project_context)
+        # Phases 5-6: Review + Test
+        has_code = self._check_results(graph, results)
+        if self._can_review_and_test_concurrently(has_code):
+            review_result, test_result = self._review_and_test_in_threads(results)
+        else:
+            review_result = self.run_review(results)
+            test_result = self.run_tests(results) if has_code else None
+        self._report_quality(review_result, test_result)
 
-        # Phase 3: Approve Plan
-        if not self.approve_plan(graph):
-            print("\n❌ Plan rejected by user")
+        return self._finish(classification, review_result)
+
+    async def arun(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> dict:
+        """
+        Полный цикл выполнения задачи (асинхронно, см. run)
+
+        Все фазы, callbacks и одобрения выполняются в потоке event loop;
+        в другие потоки уходят только блокирующие вызовы (RAG).
+        """
+        plan = await self._aplan(task_description, project_context)
+        if plan is None:
             return {"status": "rejected", "phase": "planning"}
+        classification, graph = plan
 
         # Phase 4: Execute
-        results = self.execute_plan(graph, project_context)
+        results = dict(await self.aexecute_plan(graph, project_context))
+
+        # Phases 5-6: Review + Test
+        has_code = self._check_results(graph, results)
+        review_result, test_result = await self._areview_and_test(results, has_code)
+        self._report_quality(review_result, test_result)
+
+        return self._finish(classification, review_result)
+
+    def _plan(
+        self,
+        task_description: str,
+        project_context: str
+    ) -> Optional[Tuple[dict, TaskGraph]]:
+        """Phases 1-3: классификация, декомпозиция, одобрение плана (None — план отклонён)"""
+        logger.info("\n🚀 Local Swarm Orchestrator\n📝 Task: %s", task_description)
+
+        # Phases 1-2: Classify + Decompose (один запрос к модели)
+        classification, graph = self.plan_task(task_description, project_context)
+        return self._approved_plan(classification, graph)
+
+    async def _aplan(
+        self,
+        task_description: str,
+        project_context: str
+    ) -> Optional[Tuple[dict, TaskGraph]]:
+        """Phases 1-3 (асинхронно, см. _plan)"""
+        logger.info("\n🚀 Local Swarm Orchestrator\n📝 Task: %s", task_description)
+
+        classification, graph = await self.aplan_task(task_description, project_context)
+        return self._approved_plan(classification, graph)
+
+    def _approved_plan(
+        self,
+        classification: dict,
+        graph: TaskGraph
+    ) -> Optional[Tuple[dict, TaskGraph]]:
+        """Phase 3: одобрение плана (None — план отклонён)"""
+        if not self.approve_plan(graph):
+            logger.info("\n❌ Plan rejected by user")
+            return None
+
+        return classification, graph
+
+    def _check_results(self, graph: TaskGraph, results: Dict[str, ExecutionResult]) -> bool:
+        """Сообщить об упавших задачах; True — есть успешные задачи с кодом"""
+        # Один проход: упавшие задачи и наличие успешных задач с кодом
+        failed = []
+        has_code = False
+        for task in graph.tasks.values():
+            result = results.get(task.id)
+            if result is None:
+                continue
+            if not result.success:
+                failed.append(result)
+            elif task.type in _CODE_TASK_TYPES:
+                has_code = True
 
-        # Проверить на failures
-        failed = [r for r in results.values() if not r.success]
         if failed:
-            print(f"\n⚠️ {len(failed)} tasks failed")
+            logger.warning("\n⚠️ %d tasks failed", len(failed))
             for r in failed:
-                print(f"  ❌ {r.task_id}: {r.error}")
+                logger.warning("  ❌ %s: %s", r.task_id, r.error)
 
-        # Phase 5: Review
-        review_result = self.run_review(results)
-        if not review_result.success:
-            print(f"\n⚠️ Review found issues: {review_result.output[:200]}")
+        return has_code
 
-        # Phase 6: Test (если были implementation задачи)
-        has_code = any(
-            results[t.id].success for t in graph.tasks.values()
-            if t.type in [TaskType.IMPLEMENTATION, TaskType.REFACTORING, TaskType.BUGFIX]
-        )
-        if has_code:
-            test_result = self.run_tests(results)
-            if not test_result.success:
-                print(f"\n⚠️ Tests failed: {test_result.error}")
+    def _can_review_and_test_concurrently(self, has_code: bool) -> bool:
+        """Review и тесты параллельно — если нужны оба и их модели помещаются в RAM вместе"""
+        if not (has_code and self.config.enable_review and self.config.enable_testing):
+            return False
 
+        review_model, _ = self.model_router.select_model(TaskType.REVIEW.value)
+        test_model, _ = self.model_router.select_model(TaskType.TESTING.value)
+        if review_model is test_model:
+            return True
+
+        status = self.model_router.get_status()
+        free_ram = status["available_ram_gb"] - status["loaded_ram_gb"]
+        return review_model.ram_gb + test_model.ram_gb <= free_ram
+
+    def _review_and_test_in_threads(
+        self,
+        results: Dict[str, ExecutionResult]
+    ) -> Tuple[ExecutionResult, ExecutionResult]:
+        """
+        Phases 5-6 параллельно (синхронно): в потоки уходят только запросы к модели
+
+        Фаза, кэш и callbacks обрабатываются в вызывающем потоке.
+        """
+        self._set_phase("reviewing+testing")
+
+        jobs = [self._review_job(results), self._test_job(results)]
+        outcomes = [self._cached_result(*job) for job in jobs]
+        fresh = iter(self.executor.execute_tasks(
+            [task for (_, _, task), outcome in zip(jobs, outcomes, strict=True) if outcome is None]
+        ))
+        for i, (namespace, key_text, _) in enumerate(jobs):
+            if outcomes[i] is None:
+                outcomes[i] = next(fresh)
+                self._store_result(namespace, key_text, outcomes[i])
+
+        review_result, test_result = outcomes
+        return review_result, test_result
+
+    async def _areview_and_test(
+        self,
+        results: Dict[str, ExecutionResult],
+        has_code: bool
+    ) -> Tuple[ExecutionResult, Optional[ExecutionResult]]:
+        """
+        Phases 5-6: review и тесты (тесты — только если были задачи с кодом)
+
+        Обе задачи выполняются на текущем event loop (aexecute_task), поэтому
+        фазы, callbacks и состояние executor меняются в вызывающем потоке.
+        """
+        if self._can_review_and_test_concurrently(has_code):
+            self._set_phase("reviewing+testing")
+            review_result, test_result = await asyncio.gather(
+                self._aexecute_cached(*self._review_job(results)),
+                self._aexecute_cached(*self._test_job(results)),
+            )
+            return review_result, test_result
+
+        review_result = await self.arun_review(results)
+        test_result = await self.arun_tests(results) if has_code else None
+        return review_result, test_result
+
+    @staticmethod
+    def _report_quality(
+        review_result: ExecutionResult,
+        test_result: Optional[ExecutionResult]
+    ) -> None:
+        """Сообщить о замечаниях review и упавших тестах"""
+        if not review_result.success:
+            logger.warning("\n⚠️ Review found issues: %.200s", review_result.output)
+        if test_result is not None and not test_result.success:
+            logger.warning("\n⚠️ Tests failed: %s", test_result.error)
+
+    def _finish(self, classification: dict, review_result: ExecutionResult) -> dict:
+        """Phase 7: сводка и одобрение деплоя"""
         # Summary
         self.state.completed_at = datetime.now()
         summary = self.executor.get_summary()
         summary["classification"] = classification
         summary["review"] = review_result.to_dict() if review_result else None
+        if self.semantic_cache is not None:
+            self.semantic_cache.flush()
 
         # Phase 7: Approve Deploy
         self._set_phase("deploying")
         if not self.approve_deploy(summary):
-            print("\n⏸️ Deploy postponed by user")
+            logger.info("\n⏸️ Deploy postponed by user")
             return {"status": "pending_deploy", **summary}
 
         # Done
         self._set_phase("completed")
-        print(f"\n✅ Completed!")
-        print(f"   Tasks: {summary['successful']}/{summary['total_tasks']} successful")
-        print(f"   Time: {summary['total_time_seconds']:.1f}s")
-        print(f"   Tokens: {summary['total_tokens']}")
+        logger.info(
+            "\n✅ Completed!\n   Tasks: %d/%d successful\n   Time: %.1fs\n   Tokens: %s",
+            summary["successful"],
+            summary["total_tasks"],
+            summary["total_time_seconds"],
+            summary["total_tokens"],
+        )
 
         return {"status": "completed", **summary}
 
@@ -377,6 +731,9 @@ def create_orchestrator(
     """
     Фабрика для создания оркестратора
 
+    Подключает вывод логов оркестратора, если приложение не настроило
+    логирование само.
+
     Args:
         config_path: Путь к YAML конфигу
         **kwargs: Override параметры
@@ -388,12 +745,15 @@ def create_orchestrator(
 
     if config_path:
         import yaml
+        # C-парсер libyaml, если PyYAML собран с ним
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(config_path) as f:
-            yaml_config = yaml.safe_load(f)
+            yaml_config = yaml.load(f, Loader=loader)
             for key, value in yaml_config.get("orchestrator", {}).items():
                 if hasattr(config, key):
                     setattr(config, key, value)
 
+    ensure_logging()
     return LocalSwarmOrchestrator(config)
 
 
@@ -408,6 +768,8 @@ if __name__ == "__main__":
 
     task_desc = " ".join(sys.argv[1:])
 
+    setup_logging()
+
     # Создать оркестратор
     orchestrator = create_orchestrator(
         require_human_approval=True,
@@ -421,4 +783,4 @@ if __name__ == "__main__":
     # Вывести результат
     print("\n" + "=" * 50)
     print("📊 Final Result:")
-    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+    print(_pretty_json(result))
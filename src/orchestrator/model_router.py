@@ -5,15 +5,26 @@ Model Router
 Учитывает: тип задачи, сложность, доступную RAM, загруженные модели.
 """
 
-import subprocess
+import atexit
+import heapq
 import json
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 import httpx
 import psutil
 
 
+# Общий HTTP клиент к Ollama для всех роутеров процесса (keep-alive пул)
+_HTTP = httpx.Client(
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20, keepalive_expiry=30.0),
+)
+atexit.register(_HTTP.close)
+
+
 class ModelTier(Enum):
     """Уровни моделей по производительности"""
     FAST = "fast"          # <8B параметров, мгновенные ответы
@@ -21,9 +32,9 @@ class ModelTier(Enum):
     POWERFUL = "powerful"  # 70B+, максимальное качество
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ModelConfig:
-    """Конфигурация модели"""
+    """Конфигурация модели (неизменяемая, общая для всех роутеров)"""
     name: str
     provider: str = "ollama"
     tier: ModelTier = ModelTier.BALANCED
@@ -31,28 +42,21 @@ class ModelConfig:
     context_window: int = 32768
 
     # Специализации
-    strengths: List[str] = field(default_factory=list)
+    strengths: Tuple[str, ...] = ("general",)
 
     # Производительность
     tokens_per_second: float = 40.0
     first_token_latency: float = 2.0
 
-    # Статус
-    is_loaded: bool = False
-
-    def __post_init__(self):
-        if not self.strengths:
-            self.strengths = ["general"]
 
-
-# Предопределённые модели
-AVAILABLE_MODELS: Dict[str, ModelConfig] = {
+# Предопределённые модели (только чтение — роутеры используют по ссылке)
+AVAILABLE_MODELS: Mapping[str, ModelConfig] = MappingProxyType({
     # Fast tier
     "qwen3:8b": ModelConfig(
         name="qwen3:8b",
         tier=ModelTier.FAST,
         ram_gb=5.2,
-        strengths=["classification", "summarization", "quick_tasks"],
+        strengths=("classification", "summarization", "quick_tasks"),
         tokens_per_second=80,
         first_token_latency=0.5
     ),
@@ -63,7 +67,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         tier=ModelTier.BALANCED,
         ram_gb=18,
         context_window=32768,
-        strengths=["implementation", "refactoring", "testing", "debugging"],
+        strengths=("implementation", "refactoring", "testing", "debugging"),
         tokens_per_second=50,
         first_token_latency=1.5
     ),
@@ -71,7 +75,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="deepseek-coder:33b-instruct",
         tier=ModelTier.BALANCED,
         ram_gb=18,
-        strengths=["implementation", "code_generation"],
+        strengths=("implementation", "code_generation"),
         tokens_per_second=45,
         first_token_latency=2.0
     ),
@@ -79,7 +83,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="codestral:latest",
         tier=ModelTier.BALANCED,
         ram_gb=12,
-        strengths=["fim", "autocomplete", "snippets"],
+        strengths=("fim", "autocomplete", "snippets"),
         tokens_per_second=55,
         first_token_latency=1.0
     ),
@@ -87,7 +91,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="devstral",
         tier=ModelTier.BALANCED,
         ram_gb=14,
-        strengths=["agentic", "swe_tasks", "multi_step"],
+        strengths=("agentic", "swe_tasks", "multi_step"),
         tokens_per_second=45,
         first_token_latency=1.5
     ),
@@ -97,7 +101,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="deepseek-r1:32b",
         tier=ModelTier.BALANCED,
         ram_gb=19,
-        strengths=["architecture", "review", "reasoning", "debugging", "planning"],
+        strengths=("architecture", "review", "reasoning", "debugging", "planning"),
         tokens_per_second=35,
         first_token_latency=2.5
     ),
@@ -105,7 +109,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="codellama:34b",
         tier=ModelTier.BALANCED,
         ram_gb=19,
-        strengths=["review", "analysis", "code_understanding"],
+        strengths=("review", "analysis", "code_understanding"),
         tokens_per_second=40,
         first_token_latency=2.0
     ),
@@ -116,7 +120,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         tier=ModelTier.POWERFUL,
         ram_gb=42,
         context_window=131072,
-        strengths=["general", "long_context", "complex_tasks"],
+        strengths=("general", "long_context", "complex_tasks"),
         tokens_per_second=25,
         first_token_latency=3.0
     ),
@@ -124,7 +128,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="llama3:70b",
         tier=ModelTier.POWERFUL,
         ram_gb=39,
-        strengths=["complex_reasoning", "fallback"],
+        strengths=("complex_reasoning", "fallback"),
         tokens_per_second=20,
         first_token_latency=4.0
     ),
@@ -134,7 +138,7 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="nomic-embed-text",
         tier=ModelTier.FAST,
         ram_gb=0.3,
-        strengths=["embeddings", "semantic_search"],
+        strengths=("embeddings", "semantic_search"),
         tokens_per_second=300,
         first_token_latency=0.01
     ),
@@ -142,11 +146,11 @@ AVAILABLE_MODELS: Dict[str, ModelConfig] = {
         name="qwen3-embedding:8b",
         tier=ModelTier.BALANCED,
         ram_gb=4.7,
-        strengths=["embeddings", "code_embeddings"],
+        strengths=("embeddings", "code_embeddings"),
         tokens_per_second=200,
         first_token_latency=0.05
     ),
-}
+})
 
 # Маппинг задач на модели
 TASK_MODEL_MAPPING = {
@@ -167,9 +171,38 @@ TASK_MODEL_MAPPING = {
 }
 
 
+# Ключ таблицы выбора: (task_type, complexity, RAM > 40GB, контекст > 32K)
+PolicyKey = Tuple[str, str, bool, bool]
+
+COMPLEXITIES = ("simple", "medium", "complex")
+
+# Типы задач, для которых сложная задача получает мощную модель
+_POWERFUL_TASK_TYPES = frozenset({"architecture", "research", "review"})
+
+# Как долго считать замер свободной RAM актуальным (секунды)
+RAM_TTL = 2.0
+
+# Последний замер свободной RAM (время, GB) — общий для всех роутеров процесса
+_ram_sample: Tuple[float, float] = (float("-inf"), 0.0)
+
+
+def _sample_available_ram() -> float:
+    """Свободная RAM в GB: psutil вызывается не чаще раза в RAM_TTL секунд"""
+    global _ram_sample
+    measured_at, available_gb = _ram_sample
+    now = time.monotonic()
+    if now - measured_at >= RAM_TTL:
+        available_gb = psutil.virtual_memory().available / (1024 ** 3)
+        _ram_sample = (now, available_gb)
+    return available_gb
+
+
 class ModelRouter:
     """
     Роутер для выбора оптимальной модели
+
+    Выбор заранее сведён в таблицу policy по всем типам задач, сложностям
+    и диапазонам RAM/контекста — select_model делает один поиск в словаре.
     """
 
     def __init__(
@@ -181,46 +214,51 @@ class ModelRouter:
         self.ollama_url = ollama_url
         self.max_ram_gb = max_ram_gb
         self.prefer_speed = prefer_speed
-        self.client = httpx.Client(timeout=30.0)
-
-        self.models = AVAILABLE_MODELS.copy()
+        self.client = _HTTP
+
+        self.models = AVAILABLE_MODELS
+        self._default_model = self.models.get("qwen3-coder:30b") or next(iter(self.models.values()))
+        self._embedding_model = (
+            self.models.get("nomic-embed-text")
+            or self.models.get("qwen3-embedding:8b")
+            or self._default_model
+        )
+        self.installed: Set[str] = set()  # Модели, скачанные в Ollama
         self.loaded_models: Dict[str, ModelConfig] = {}
 
         # Обновить список доступных моделей
         self._refresh_available_models()
 
-    def _refresh_available_models(self) -> None:
-        """Обновить список моделей из Ollama"""
-        try:
-            result = subprocess.run(
-                ["ollama", "list"],
-                capture_output=True,
-                text=True,
-                timeout=10
+        self._policy: Dict[PolicyKey, Tuple[ModelConfig, str]] = {
+            key: self._resolve(*key)
+            for key in (
+                (task_type, complexity, high_ram, large_context)
+                for task_type in TASK_MODEL_MAPPING
+                for complexity in COMPLEXITIES
+                for high_ram in (False, True)
+                for large_context in (False, True)
             )
+        }
 
-            if result.returncode == 0:
-                lines = result.stdout.strip().split("\n")[1:]  # Skip header
+    def _refresh_available_models(self) -> None:
+        """Обновить список моделей из Ollama (/api/tags, без запуска `ollama list`)"""
+        try:
+            response = self.client.get(f"{self.ollama_url}/api/tags", timeout=10.0)
+            response.raise_for_status()
 
-                available = set()
-                for line in lines:
-                    if line.strip():
-                        name = line.split()[0]
-                        available.add(name)
+            available = {m["name"] for m in response.json().get("models", [])}
 
-                # Обновить статус моделей
-                for model_name in self.models:
-                    if model_name in available or model_name.split(":")[0] in available:
-                        self.models[model_name].is_loaded = True
+            # Обновить статус моделей
+            for model_name in self.models:
+                if model_name in available or model_name.split(":")[0] in available:
+                    self.installed.add(model_name)
 
         except Exception as e:
             print(f"Warning: Could not refresh models: {e}")
 
     def _get_available_ram(self) -> float:
         """Получить доступную RAM в GB"""
-        mem = psutil.virtual_memory()
-        available_gb = mem.available / (1024 ** 3)
-        return min(available_gb, self.max_ram_gb)
+        return min(_sample_available_ram(), self.max_ram_gb)
 
     def _get_loaded_ram(self) -> float:
         """Получить RAM, используемую загруженными моделями"""
@@ -249,6 +287,20 @@ class ModelRouter:
         if force_model and force_model in self.models:
             return self.models[force_model], f"Forced: {force_model}"
 
+        key = (task_type, complexity, self._get_available_ram() > 40, context_size > 32000)
+        route = self._policy.get(key)
+        if route is None:
+            route = self._policy[key] = self._resolve(*key)
+        return route
+
+    def _resolve(
+        self,
+        task_type: str,
+        complexity: str,
+        high_ram: bool,
+        large_context: bool
+    ) -> Tuple[ModelConfig, str]:
+        """Правила выбора модели (заполняют таблицу policy)"""
         # Получить рекомендуемые модели для типа задачи
         primary, fallback = TASK_MODEL_MAPPING.get(
             task_type,
@@ -258,16 +310,13 @@ class ModelRouter:
         # Проверить доступность primary модели
         primary_config = self.models.get(primary)
         if not primary_config:
-            primary_config = self.models.get(fallback, list(self.models.values())[0])
-
-        # Проверить RAM
-        available_ram = self._get_available_ram()
+            primary_config = self.models.get(fallback) or self._default_model
 
         # Если сложная задача и есть RAM — используем мощную модель
-        if complexity == "complex" and available_ram > 40:
+        if complexity == "complex" and high_ram:
             # Попробовать более мощную модель
-            if task_type in ["architecture", "research", "review"]:
-                if "llama3:70b" in self.models and available_ram > 40:
+            if task_type in _POWERFUL_TASK_TYPES:
+                if "llama3:70b" in self.models:
                     return self.models["llama3:70b"], "Complex task, using powerful model"
 
         # Если простая задача или prefer_speed — используем быструю
@@ -277,18 +326,32 @@ class ModelRouter:
                 return fast_models[0], "Simple task, using fast model"
 
         # Проверить контекст
-        if context_size > 32000 and "llama3.3:latest" in self.models:
+        if large_context and "llama3.3:latest" in self.models:
             return self.models["llama3.3:latest"], "Large context, using 128K model"
 
         # Вернуть primary модель
         reason = f"Best fit for {task_type}"
         return primary_config, reason
 
+    def embed_batch(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """
+        Embeddings для списка текстов одним запросом Ollama /api/embed
+
+        Args:
+            texts: Тексты
+            model: Модель (по умолчанию get_embedding_model)
+        """
+        response = self.client.post(
+            f"{self.ollama_url}/api/embed",
+            json={"model": model or self.get_embedding_model().name, "input": texts},
+            timeout=60.0,
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
     def get_embedding_model(self) -> ModelConfig:
         """Получить модель для embeddings"""
-        if "nomic-embed-text" in self.models:
-            return self.models["nomic-embed-text"]
-        return self.models.get("qwen3-embedding:8b", list(self.models.values())[0])
+        return self._embedding_model
 
     def can_load_model(self, model_name: str) -> Tuple[bool, str]:
         """
@@ -322,28 +385,30 @@ class ModelRouter:
         Returns:
             Список моделей, которые можно выгрузить
         """
-        # Сортируем по "ненужности": давно не использовались, большие
-        candidates = []
-
-        for name, model in self.loaded_models.items():
-            if model.tier == ModelTier.FAST:
-                # Быстрые модели держим
-                continue
-            candidates.append((name, model.ram_gb))
-
-        # Сортируем по размеру (сначала большие)
-        candidates.sort(key=lambda x: -x[1])
+        # Кандидаты — все кроме быстрых моделей (их держим), сначала большие:
+        # куча строится за O(N), извлекаются только нужные модели
+        candidates = [
+            (-model.ram_gb, name)
+            for name, model in self.loaded_models.items()
+            if model.tier is not ModelTier.FAST
+        ]
+        heapq.heapify(candidates)
 
         to_unload = []
-        freed = 0
-        for name, ram in candidates:
+        freed = 0.0
+        while candidates:
+            neg_ram, name = heapq.heappop(candidates)
             to_unload.append(name)
-            freed += ram
+            freed -= neg_ram
             if freed >= needed_ram:
                 break
 
         return to_unload
 
+    def is_loaded(self, model_name: str) -> bool:
+        """Модель скачана в Ollama (прежний флаг ModelConfig.is_loaded)"""
+        return model_name in self.installed
+
     def get_model_info(self, model_name: str) -> Optional[dict]:
         """Получить информацию о модели"""
         model = self.models.get(model_name)
@@ -355,9 +420,9 @@ class ModelRouter:
             "tier": model.tier.value,
             "ram_gb": model.ram_gb,
             "context_window": model.context_window,
-            "strengths": model.strengths,
+            "strengths": list(model.strengths),
             "tokens_per_second": model.tokens_per_second,
-            "is_loaded": model.is_loaded,
+            "is_loaded": self.is_loaded(model_name),
         }
 
     def get_status(self) -> dict:
@@ -392,5 +457,5 @@ if __name__ == "__main__":
 
     print("\n📦 Available Models:")
     for name, model in router.models.items():
-        status_icon = "✅" if model.is_loaded else "⬜"
+        status_icon = "✅" if router.is_loaded(name) else "⬜"
         print(f"  {status_icon} {name:25} {model.ram_gb:5.1f}GB  {model.tier.value:10}  {model.strengths[:2]}")
@@ -0,0 +1,288 @@
+"""
+Semantic Cache
+
+Кэш ответов LLM по смысловой близости запроса: повторный или
+перефразированный запрос возвращает сохранённый ответ без генерации.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import io
+import json
+import os
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Без numba поиск идёт через numpy (BLAS)
+    numba = None
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "claude-auto-dev" / "semcache.npz"
+
+# Тексты -> матрица embeddings (например, ModelRouter.embed_batch)
+EmbedFn = Callable[[Sequence[str]], Any]
+
+
+def _best_match_numpy(matrix: np.ndarray, vector: np.ndarray) -> Tuple[int, float]:
+    """Индекс и близость ближайшей записи (matrix и vector нормированы)"""
+    scores = matrix @ vector
+    best = int(np.argmax(scores))
+    return best, float(scores[best])
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _best_match_kernel(matrix, vector):
+        scores = np.empty(matrix.shape[0], np.float32)
+        for i in numba.prange(matrix.shape[0]):
+            s = np.float32(0.0)
+            for k in range(matrix.shape[1]):
+                s += matrix[i, k] * vector[k]
+            scores[i] = s
+        best = scores.argmax()
+        return best, scores[best]
+
+    def _best_match(matrix: np.ndarray, vector: np.ndarray) -> Tuple[int, float]:
+        best, score = _best_match_kernel(matrix, vector)
+        return int(best), float(score)
+else:
+    _best_match = _best_match_numpy
+
+
+def _flush_at_exit(flush: "weakref.WeakMethod") -> None:
+    method = flush()
+    if method is not None:
+        method()
+
+
+@dataclass
+class _Space:
+    """Записи одного пространства имён: нормированные embeddings + ответы + области"""
+    matrix: np.ndarray
+    responses: List[Any] = field(default_factory=list)
+    scopes: List[str] = field(default_factory=list)
+
+
+class SemanticCache:
+    """
+    Кэш ответов по косинусной близости embeddings
+
+    Записи разделены по пространствам имён (classification, ...),
+    embeddings хранятся нормированной float32 матрицей — поиск одним
+    матричным умножением. Ответы должны сериализоваться в JSON.
+
+    scope — точная часть ключа (например, digest контекста проекта):
+    близкий запрос попадает в кэш, только если scope совпадает.
+
+    Для ответов, которые нельзя переносить на «похожий» запрос (review и
+    тесты конкретного кода), есть точный кэш по digest текста: get_exact/put_exact.
+
+    Изменения пишутся на диск не на каждую запись, а в flush()
+    (вызывается и при выходе из процесса).
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        threshold: float = 0.95,
+        path: Optional[Path] = DEFAULT_CACHE_PATH,
+        max_entries: int = 1024
+    ):
+        """
+        Args:
+            embed_fn: Функция embeddings для списка текстов
+            threshold: Минимальная косинусная близость для попадания
+            path: Файл .npz для сохранения между запусками (None — только в памяти)
+            max_entries: Максимум записей на пространство имён (старые вытесняются)
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+
+        self._spaces: Dict[str, _Space] = {}
+        self._exact: Dict[str, "OrderedDict[str, Any]"] = {}
+        self._dirty = False
+        self.stats = {"hits": 0, "misses": 0}
+
+        if self.path and self.path.exists():
+            self._load()
+
+        if self.path:
+            atexit.register(_flush_at_exit, weakref.WeakMethod(self.flush))
+
+        if numba is not None:
+            # Компиляция ядра сейчас, а не на первом запросе (cache=True — на диск)
+            _best_match(np.ones((1, 1), dtype=np.float32), np.ones(1, dtype=np.float32))
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Нормированный embedding запроса (None — embeddings недоступны)"""
+        try:
+            vector = np.asarray(self.embed_fn([text])[0], dtype=np.float32)
+        except (httpx.HTTPError, KeyError, IndexError, ValueError):
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, namespace: str, vector: np.ndarray, scope: str = "") -> Optional[Any]:
+        """Ближайший сохранённый ответ той же области, если близость не ниже threshold"""
+        space = self._spaces.get(namespace)
+        if space is None or not space.responses or space.matrix.shape[1] != vector.shape[0]:
+            return None
+
+        rows = [i for i, entry_scope in enumerate(space.scopes) if entry_scope == scope]
+        if not rows:
+            return None
+        if len(rows) == len(space.scopes):
+            best, score = _best_match(space.matrix, vector)
+        else:
+            best, score = _best_match(np.ascontiguousarray(space.matrix[rows]), vector)
+            best = rows[best]
+        if score < self.threshold:
+            return None
+        return space.responses[best]
+
+    def add(self, namespace: str, vector: np.ndarray, response: Any, scope: str = "") -> None:
+        """Сохранить ответ"""
+        space = self._spaces.get(namespace)
+        if space is None or space.matrix.shape[1] != vector.shape[0]:
+            space = self._spaces[namespace] = _Space(np.empty((0, vector.shape[0]), dtype=np.float32))
+
+        space.matrix = np.vstack([space.matrix, vector[None, :]])[-self.max_entries:]
+        space.responses.append(response)
+        del space.responses[:-self.max_entries]
+        space.scopes.append(scope)
+        del space.scopes[:-self.max_entries]
+        self._dirty = True
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get_exact(self, namespace: str, text: str) -> Optional[Any]:
+        """Ответ, сохранённый для точно такого же текста"""
+        response = self._exact.get(namespace, {}).get(self._digest(text))
+        self.stats["hits" if response is not None else "misses"] += 1
+        return response
+
+    def put_exact(self, namespace: str, text: str, response: Any) -> None:
+        """Сохранить ответ для точного текста"""
+        entries = self._exact.setdefault(namespace, OrderedDict())
+        entries[self._digest(text)] = response
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Записать изменения на диск (если были)"""
+        if self.path and self._dirty:
+            self._save()
+            self._dirty = False
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[], Any],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        scope: str = ""
+    ) -> Any:
+        """
+        Ответ из кэша для близкого запроса или compute() с сохранением
+
+        Args:
+            namespace: Пространство имён (тип запроса)
+            text: Текст запроса, по которому ищется близость
+            compute: Вычисление ответа при промахе
+            should_cache: Сохранять ли ответ (например, только успешные)
+            scope: Область, которая должна совпасть точно
+        """
+        vector = self._embed(text)
+        if vector is not None:
+            cached = self.lookup(namespace, vector, scope)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+
+        self.stats["misses"] += 1
+        response = compute()
+        if vector is not None and (should_cache is None or should_cache(response)):
+            self.add(namespace, vector, response, scope)
+        return response
+
+    async def aget_or_compute(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        scope: str = ""
+    ) -> Any:
+        """get_or_compute для асинхронного compute (embeddings и запись — в потоке)"""
+        vector = await asyncio.to_thread(self._embed, text)
+        if vector is not None:
+            cached = self.lookup(namespace, vector, scope)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+
+        self.stats["misses"] += 1
+        response = await compute()
+        if vector is not None and (should_cache is None or should_cache(response)):
+            await asyncio.to_thread(self.add, namespace, vector, response, scope)
+        return response
+
+    def _save(self) -> None:
+        """Атомарно записать кэш в .npz"""
+        arrays = {}
+        for namespace, space in self._spaces.items():
+            arrays[f"{namespace}.emb"] = space.matrix
+            arrays[f"{namespace}.resp"] = np.array(json.dumps(space.responses, ensure_ascii=False))
+            arrays[f"{namespace}.scope"] = np.array(json.dumps(space.scopes))
+        for namespace, entries in self._exact.items():
+            arrays[f"{namespace}.exact"] = np.array(json.dumps(list(entries.items()), ensure_ascii=False))
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_bytes(buffer.getvalue())
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        """Загрузить кэш (повреждённый файл игнорируется)"""
+        try:
+            with np.load(self.path) as data:
+                for key in data.files:
+                    if key.endswith(".exact"):
+                        self._exact[key[:-len(".exact")]] = OrderedDict(json.loads(str(data[key])))
+                        continue
+                    if not key.endswith(".emb"):
+                        continue
+                    namespace = key[:-len(".emb")]
+                    responses = json.loads(str(data[f"{namespace}.resp"]))
+                    scope_key = f"{namespace}.scope"
+                    scopes = json.loads(str(data[scope_key])) if scope_key in data.files else [""] * len(responses)
+                    self._spaces[namespace] = _Space(
+                        np.asarray(data[key], dtype=np.float32), responses, scopes
+                    )
+        except (OSError, ValueError, KeyError):
+            self._spaces.clear()
+            self._exact.clear()
+
+    def clear(self) -> None:
+        """Очистить кэш (и файл)"""
+        self._spaces.clear()
+        self._exact.clear()
+        self._dirty = False
+        if self.path and self.path.exists():
+            self.path.unlink()
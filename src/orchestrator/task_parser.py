@@ -5,14 +5,25 @@ Task Parser & Planner
 Использует быструю модель (qwen3:8b) для декомпозиции.
 """
 
+import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import re
+import string
+import weakref
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Dict, Optional, Set
+from functools import cached_property
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterator, List, Dict, Optional, Set, Tuple
 from datetime import datetime
 import httpx
 
+if TYPE_CHECKING:
+    from .semantic_cache import SemanticCache
+
 
 class TaskType(Enum):
     """Типы задач"""
@@ -72,6 +83,9 @@ class Task:
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
+    # Число невыполненных зависимостей (ведёт TaskGraph)
+    remaining_deps: int = field(default=0, init=False, repr=False, compare=False)
+
     def is_ready(self, completed_tasks: Set[str]) -> bool:
         """Проверяет, готова ли задача к выполнению"""
         return all(dep in completed_tasks for dep in self.depends_on)
@@ -98,9 +112,29 @@ class TaskGraph:
     tasks: Dict[str, Task] = field(default_factory=dict)
     root_task_id: Optional[str] = None
 
+    # Кэш to_mermaid: (статусы задач, диаграмма)
+    _mermaid_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    # Счётчики готовности: зависимость -> ожидающие её задачи, куча готовых
+    # (priority, порядок добавления, id), задачи, уже освободившие последователей
+    _dependents: Dict[str, List[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _ready: List[tuple] = field(default_factory=list, init=False, repr=False, compare=False)
+    _ready_seq: Iterator[int] = field(default_factory=itertools.count, init=False, repr=False, compare=False)
+    _released: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
     def add_task(self, task: Task) -> None:
         """Добавить задачу в граф"""
         self.tasks[task.id] = task
+        self.__dict__.pop("levels", None)
+        self._mermaid_cache = None
+
+        task.remaining_deps = 0
+        for dep_id in task.depends_on:
+            if dep_id not in self._released:
+                task.remaining_deps += 1
+                self._dependents.setdefault(dep_id, []).append(task.id)
+        if task.remaining_deps == 0 and task.status == TaskStatus.PENDING:
+            self._push_ready(task)
 
         # Обновить обратные связи
         for dep_id in task.depends_on:
@@ -108,8 +142,62 @@ class TaskGraph:
                 if task.id not in self.tasks[dep_id].blocks:
                     self.tasks[dep_id].blocks.append(task.id)
 
-    def get_ready_tasks(self, completed: Set[str]) -> List[Task]:
-        """Получить задачи, готовые к выполнению"""
+    def _push_ready(self, task: Task) -> None:
+        heapq.heappush(self._ready, (task.priority.value, next(self._ready_seq), task.id))
+
+    def reset_ready(self) -> None:
+        """
+        Пересчитать счётчики для нового прогона: все задачи снова ожидают выполнения
+
+        Зависимость вне графа никогда не освободится — задача остаётся заблокированной.
+        """
+        self._dependents = {}
+        self._ready = []
+        self._released = set()
+        for task in self.tasks.values():
+            task.remaining_deps = len(task.depends_on)
+            for dep_id in task.depends_on:
+                self._dependents.setdefault(dep_id, []).append(task.id)
+            if task.remaining_deps == 0:
+                self._push_ready(task)
+
+    def mark_completed(self, task_id: str) -> None:
+        """
+        Отметить задачу завершённой и освободить ожидающие её задачи — O(исходящих связей)
+
+        Статус, уже выставленный исполнителем (COMPLETED/FAILED), сохраняется.
+        Повторный вызов ничего не делает.
+        """
+        if task_id in self._released:
+            return
+        self._released.add(task_id)
+
+        task = self.tasks[task_id]
+        if task.status in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+            task.status = TaskStatus.COMPLETED
+
+        for child_id in self._dependents.get(task_id, ()):
+            child = self.tasks[child_id]
+            child.remaining_deps -= 1
+            if child.remaining_deps == 0:
+                self._push_ready(child)
+
+    def get_ready_tasks(self, completed: Optional[Set[str]] = None) -> List[Task]:
+        """
+        Получить задачи, готовые к выполнению (по приоритету)
+
+        Без completed — задачи, освобождённые счётчиками (add_task, reset_ready,
+        mark_completed); каждая выдаётся один раз. С completed — полный
+        просмотр графа через is_ready.
+        """
+        if completed is None:
+            ready = []
+            while self._ready:
+                task = self.tasks.get(heapq.heappop(self._ready)[2])
+                if task is not None:
+                    ready.append(task)
+            return ready
+
         ready = []
         for task in self.tasks.values():
             if task.status == TaskStatus.PENDING and task.is_ready(completed):
@@ -120,28 +208,64 @@ class TaskGraph:
         return ready
 
     def get_execution_order(self) -> List[str]:
-        """Топологическая сортировка для порядка выполнения"""
-        visited = set()
-        order = []
-
-        def dfs(task_id: str):
-            if task_id in visited:
-                return
-            visited.add(task_id)
+        """
+        Топологическая сортировка для порядка выполнения
 
-            task = self.tasks.get(task_id)
-            if task:
-                for dep_id in task.depends_on:
-                    dfs(dep_id)
-                order.append(task_id)
+        Уровни алгоритма Кана подряд, без рекурсии. Зависимости вне графа
+        не учитываются; задачи из циклов добавляются в конце.
+        """
+        order = [task_id for level in self._kahn_levels(skip_missing=True) for task_id in level]
+        if len(order) < len(self.tasks):
+            placed = set(order)
+            order.extend(task_id for task_id in self.tasks if task_id not in placed)
+        return order
 
-        for task_id in self.tasks:
-            dfs(task_id)
+    @cached_property
+    def levels(self) -> List[List[str]]:
+        """
+        Уровни топологического порядка (алгоритм Кана)
 
-        return order
+        Задачи одного уровня не зависят друг от друга и могут выполняться
+        параллельно. Задачи с зависимостью вне графа в уровни не попадают.
+        Сбрасывается при add_task.
+        """
+        return self._kahn_levels(skip_missing=False)
+
+    def _kahn_levels(self, skip_missing: bool) -> List[List[str]]:
+        """Уровни алгоритма Кана (skip_missing — игнорировать зависимости вне графа)"""
+        indegree: Dict[str, int] = {}
+        succ: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        for task_id, task in self.tasks.items():
+            degree = 0
+            for dep_id in task.depends_on:
+                if dep_id in succ:
+                    succ[dep_id].append(task_id)
+                    degree += 1
+                elif not skip_missing:
+                    degree += 1
+            indegree[task_id] = degree
+
+        level = [task_id for task_id, degree in indegree.items() if degree == 0]
+        levels = []
+
+        while level:
+            levels.append(level)
+            next_level = []
+            for task_id in level:
+                for succ_id in succ[task_id]:
+                    indegree[succ_id] -= 1
+                    if indegree[succ_id] == 0:
+                        next_level.append(succ_id)
+            level = next_level
+
+        return levels
 
     def to_mermaid(self) -> str:
-        """Генерация Mermaid диаграммы"""
+        """Генерация Mermaid диаграммы (кэшируется до смены статусов задач)"""
+        statuses = tuple(task.status for task in self.tasks.values())
+        if self._mermaid_cache is not None and self._mermaid_cache[0] == statuses:
+            return self._mermaid_cache[1]
+
         lines = ["graph TD"]
 
         for task in self.tasks.values():
@@ -160,7 +284,28 @@ class TaskGraph:
             for dep_id in task.depends_on:
                 lines.append(f'    {dep_id} --> {task.id}')
 
-        return "\n".join(lines)
+        mermaid = "\n".join(lines)
+        self._mermaid_cache = (statuses, mermaid)
+        return mermaid
+
+
+# Шаблон промпта, разобранный один раз: (текст, имя поля или None)
+_PromptParts = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile_prompt(template: str) -> _PromptParts:
+    """Разобрать str.format шаблон на куски (экранированные {{ }} раскрываются)"""
+    return tuple(
+        (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _render_prompt(parts: _PromptParts, **values: str) -> str:
+    """Собрать промпт из разобранного шаблона без повторного разбора"""
+    return "".join(
+        literal + values[field] if field is not None else literal
+        for literal, field in parts
+    )
 
 
 class TaskParser:
@@ -232,35 +377,235 @@ class TaskParser:
 }}
 ```'''
 
+    PLAN_PROMPT = '''Ты — эксперт по планированию задач разработки.
+
+Классифицируй задачу и разбей её на подзадачи.
+
+Классификация:
+- workflow_type: feature|bugfix|refactor|docs|test
+- complexity: simple|medium|complex
+- estimated_tasks: примерное количество подзадач (1-10)
+- needs_architecture: true/false — нужен ли этап проектирования
+- needs_testing: true/false — нужны ли тесты
+- primary_language: основной язык (python/javascript/go/etc)
+
+Для каждой подзадачи укажи:
+- id: уникальный идентификатор (task_1, task_2, ...)
+- title: короткое название
+- description: подробное описание что нужно сделать
+- type: тип задачи (architecture, implementation, refactoring, bugfix, testing, review, documentation, devops, research)
+- priority: приоритет (1=critical, 2=high, 3=medium, 4=low)
+- depends_on: список id задач, от которых зависит эта задача
+
+ЗАДАЧА: {task_description}
+
+КОНТЕКСТ ПРОЕКТА:
+{project_context}
+
+Ответь в формате JSON:
+```json
+{{
+  "workflow_type": "feature",
+  "complexity": "medium",
+  "estimated_tasks": 4,
+  "needs_architecture": true,
+  "needs_testing": true,
+  "primary_language": "python",
+  "summary": "краткое описание плана",
+  "tasks": [
+    {{
+      "id": "task_1",
+      "title": "...",
+      "description": "...",
+      "type": "...",
+      "priority": 2,
+      "depends_on": []
+    }}
+  ]
+}}
+```
+
+Важно:
+- Первая задача обычно research или architecture
+- Implementation зависит от architecture
+- Testing зависит от implementation
+- Review зависит от implementation
+- Documentation может быть параллельно'''
+
+    _CLASSIFICATION_PARTS = _compile_prompt(CLASSIFICATION_PROMPT)
+    _DECOMPOSITION_PARTS = _compile_prompt(DECOMPOSITION_PROMPT)
+    _PLAN_PARTS = _compile_prompt(PLAN_PROMPT)
+
+    # Keep-alive пул к Ollama (HTTP/1.1 — HTTP/2 Ollama не поддерживает)
+    HTTP_OPTIONS = {
+        "timeout": httpx.Timeout(120.0, connect=10.0),
+        "limits": httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=30.0),
+        "headers": {"User-Agent": "claude-auto-dev"},
+    }
+
     def __init__(
         self,
         ollama_url: str = "http://localhost:11434",
         fast_model: str = "codestral:latest",
-        smart_model: str = "devstral:latest"
+        smart_model: str = "devstral:latest",
+        semantic_cache: Optional["SemanticCache"] = None,
+        cache_size: int = 512
     ):
+        """
+        Args:
+            semantic_cache: Кэш по смысловой близости описания задачи
+                (перефразированный запрос не идёт в модель)
+            cache_size: Размер LRU кэша ответов по точному промпту
+        """
         self.ollama_url = ollama_url
         self.fast_model = fast_model
         self.smart_model = smart_model
-        self.client = httpx.Client(timeout=120.0)
+        self.client = httpx.Client(**self.HTTP_OPTIONS)
+
+        # Кэш ответов: точный (model, промпт) -> ответ, затем семантический
+        self.semantic_cache = semantic_cache
+        self.cache_size = cache_size
+        self._llm_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._llm_stats = {"hits": 0, "misses": 0}
+
+        # AsyncClient на каждый event loop: его соединения привязаны к своему loop
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def close(self) -> None:
+        """Закрыть HTTP соединения"""
+        self.client.close()
+
+    async def aclose(self) -> None:
+        """Закрыть HTTP соединения (включая AsyncClient текущего event loop)"""
+        aclient = self._aclients.pop(asyncio.get_running_loop(), None)
+        if aclient is not None:
+            await aclient.aclose()
+        self.close()
+
+    def __enter__(self) -> "TaskParser":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _aclient(self) -> httpx.AsyncClient:
+        """AsyncClient для текущего event loop"""
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            aclient = self._aclients[loop] = httpx.AsyncClient(**self.HTTP_OPTIONS)
+        return aclient
+
+    def _generate_request(self, prompt: str, model: Optional[str]) -> dict:
+        """Тело запроса Ollama /api/generate"""
+        return {
+            "model": model or self.fast_model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": 0.3,
+                "num_predict": 2048,
+            }
+        }
+
+    def _llm_cache_key(self, prompt: str, model: Optional[str]) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((model or self.fast_model).encode())
+        digest.update(b"\0")
+        digest.update(prompt.encode())
+        return digest.digest()
+
+    def _llm_cache_get(self, key: bytes) -> Optional[str]:
+        response = self._llm_cache.get(key)
+        if response is None:
+            self._llm_stats["misses"] += 1
+            return None
+        self._llm_cache.move_to_end(key)
+        self._llm_stats["hits"] += 1
+        return response
+
+    def _llm_cache_put(self, key: bytes, response: str) -> None:
+        self._llm_cache[key] = response
+        if len(self._llm_cache) > self.cache_size:
+            self._llm_cache.popitem(last=False)
+
+    def cache_stats(self) -> dict:
+        """Статистика кэшей ответов LLM"""
+        return {
+            "exact": {**self._llm_stats, "size": len(self._llm_cache)},
+            "semantic": dict(self.semantic_cache.stats) if self.semantic_cache else None,
+        }
 
     def _call_llm(self, prompt: str, model: str = None) -> str:
-        """Вызов LLM через Ollama API"""
-        model = model or self.fast_model
+        """Вызов LLM через Ollama API (повторный промпт — из LRU кэша)"""
+        key = self._llm_cache_key(prompt, model)
+        cached = self._llm_cache_get(key)
+        if cached is not None:
+            return cached
 
         response = self.client.post(
             f"{self.ollama_url}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "num_predict": 2048,
-                }
-            }
+            json=self._generate_request(prompt, model)
+        )
+        response.raise_for_status()
+        text = response.json()["response"]
+        self._llm_cache_put(key, text)
+        return text
+
+    async def _acall_llm(self, prompt: str, model: str = None) -> str:
+        """Вызов LLM через Ollama API (асинхронно, см. _call_llm)"""
+        key = self._llm_cache_key(prompt, model)
+        cached = self._llm_cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._aclient().post(
+            f"{self.ollama_url}/api/generate",
+            json=self._generate_request(prompt, model)
         )
         response.raise_for_status()
-        return response.json()["response"]
+        text = response.json()["response"]
+        self._llm_cache_put(key, text)
+        return text
+
+    def _semantic(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[], Any],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        scope: str = ""
+    ) -> Any:
+        """compute() через семантический кэш, если он подключён"""
+        if self.semantic_cache is None:
+            return compute()
+        return self.semantic_cache.get_or_compute(namespace, text, compute, should_cache, scope)
+
+    async def _asemantic(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+        scope: str = ""
+    ) -> Any:
+        """Асинхронный вариант _semantic"""
+        if self.semantic_cache is None:
+            return await compute()
+        return await self.semantic_cache.aget_or_compute(namespace, text, compute, should_cache, scope)
+
+    @staticmethod
+    def _context_scope(project_context: str) -> str:
+        """
+        Область кэша плана — digest контекста проекта
+
+        Близость ищется только по описанию задачи: длинный общий контекст
+        (код из RAG) иначе доминирует в embedding, и разные задачи одного
+        проекта получали бы чужой план. Планы разных проектов не смешиваются.
+        """
+        return hashlib.blake2b(project_context.encode(), digest_size=16).hexdigest()
 
     def _extract_json(self, text: str) -> dict:
         """Извлечь JSON из текста"""
@@ -296,12 +641,29 @@ class TaskParser:
         Returns:
             dict с полями: workflow_type, complexity, estimated_tasks, etc.
         """
-        prompt = self.CLASSIFICATION_PROMPT.format(
-            task_description=task_description
+        prompt = _render_prompt(self._CLASSIFICATION_PARTS, task_description=task_description)
+
+        return self._semantic(
+            "classification",
+            task_description,
+            lambda: self._parse_classification(self._call_llm(prompt, self.fast_model)),
         )
 
-        response = self._call_llm(prompt, self.fast_model)
-        result = self._extract_json(response)
+    async def aclassify_task(self, task_description: str) -> dict:
+        """Быстрая классификация задачи (асинхронно, см. classify_task)"""
+        prompt = _render_prompt(self._CLASSIFICATION_PARTS, task_description=task_description)
+
+        async def compute() -> dict:
+            return self._parse_classification(await self._acall_llm(prompt, self.fast_model))
+
+        return await self._asemantic("classification", task_description, compute)
+
+    def _parse_classification(self, response: str) -> dict:
+        """Классификация из ответа модели"""
+        return self._classification_from(self._extract_json(response))
+
+    def _classification_from(self, result: dict) -> dict:
+        """Классификация из разобранного JSON (с значениями по умолчанию)"""
 
         # Значения по умолчанию
         defaults = {
@@ -330,15 +692,109 @@ class TaskParser:
         Returns:
             TaskGraph с задачами и зависимостями
         """
-        prompt = self.DECOMPOSITION_PROMPT.format(
+        prompt = _render_prompt(
+            self._DECOMPOSITION_PARTS,
+            task_description=task_description,
+            project_context=project_context or "Контекст не предоставлен"
+        )
+
+        # Используем умную модель для декомпозиции; кэшируется ответ модели
+        # (граф изменяемый — строится заново на каждый вызов)
+        response = self._semantic(
+            "decomposition",
+            task_description,
+            lambda: self._call_llm(prompt, self.smart_model),
+            should_cache=self._has_tasks,
+            scope=self._context_scope(project_context),
+        )
+        return self._parse_graph(response)
+
+    async def adecompose_task(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> TaskGraph:
+        """Декомпозиция задачи на подзадачи (асинхронно, см. decompose_task)"""
+        prompt = _render_prompt(
+            self._DECOMPOSITION_PARTS,
+            task_description=task_description,
+            project_context=project_context or "Контекст не предоставлен"
+        )
+
+        response = await self._asemantic(
+            "decomposition",
+            task_description,
+            lambda: self._acall_llm(prompt, self.smart_model),
+            should_cache=self._has_tasks,
+            scope=self._context_scope(project_context),
+        )
+        return self._parse_graph(response)
+
+    def _has_tasks(self, response: str) -> bool:
+        """В ответе модели есть задачи (пустой план не кэшируется)"""
+        return bool(self._extract_json(response).get("tasks"))
+
+    def plan(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> Tuple[dict, TaskGraph]:
+        """
+        Классификация и декомпозиция одним запросом к модели
+
+        Returns:
+            (классификация как у classify_task, граф как у decompose_task)
+        """
+        prompt = _render_prompt(
+            self._PLAN_PARTS,
             task_description=task_description,
             project_context=project_context or "Контекст не предоставлен"
         )
 
-        # Используем умную модель для декомпозиции
-        response = self._call_llm(prompt, self.smart_model)
+        response = self._semantic(
+            "plan",
+            task_description,
+            lambda: self._call_llm(prompt, self.smart_model),
+            should_cache=self._has_tasks,
+            scope=self._context_scope(project_context),
+        )
+        return self._parse_plan(response)
+
+    async def aplan(
+        self,
+        task_description: str,
+        project_context: str = ""
+    ) -> Tuple[dict, TaskGraph]:
+        """Классификация и декомпозиция одним запросом (асинхронно, см. plan)"""
+        prompt = _render_prompt(
+            self._PLAN_PARTS,
+            task_description=task_description,
+            project_context=project_context or "Контекст не предоставлен"
+        )
+
+        response = await self._asemantic(
+            "plan",
+            task_description,
+            lambda: self._acall_llm(prompt, self.smart_model),
+            should_cache=self._has_tasks,
+            scope=self._context_scope(project_context),
+        )
+        return self._parse_plan(response)
+
+    def _parse_plan(self, response: str) -> Tuple[dict, TaskGraph]:
+        """Классификация и граф задач из ответа PLAN_PROMPT"""
         result = self._extract_json(response)
+        classification = self._classification_from(
+            {key: value for key, value in result.items() if key != "tasks"}
+        )
+        return classification, self._graph_from(result)
+
+    def _parse_graph(self, response: str) -> TaskGraph:
+        """Граф задач из ответа модели"""
+        return self._graph_from(self._extract_json(response))
 
+    def _graph_from(self, result: dict) -> TaskGraph:
+        """Граф задач из разобранного JSON"""
         # Создаём граф задач
         graph = TaskGraph()
 
@@ -399,30 +855,21 @@ class TaskParser:
             dict: {
                 "total_tasks": int,
                 "parallel_groups": int,
+                "execution_groups": list,
+                "unreachable_tasks": list,
                 "estimated_time_minutes": int,
                 "models_needed": list
             }
+
+            unreachable_tasks — задачи, которые никогда не станут готовыми
+            (зависимость вне графа или цикл) и не входят в execution_groups.
         """
         total = len(graph.tasks)
 
-        # Группы параллельных задач
-        order = graph.get_execution_order()
-        groups = []
-        current_group = []
-        completed = set()
-
-        for task_id in order:
-            task = graph.tasks[task_id]
-            if task.is_ready(completed):
-                current_group.append(task_id)
-            else:
-                if current_group:
-                    groups.append(current_group)
-                    completed.update(current_group)
-                current_group = [task_id]
-
-        if current_group:
-            groups.append(current_group)
+        # Группы параллельных задач — уровни топологического порядка
+        groups = graph.levels
+        scheduled = {task_id for level in groups for task_id in level}
+        unreachable = [task_id for task_id in graph.tasks if task_id not in scheduled]
 
         # Модели для разных типов задач
         models_map = {
@@ -449,6 +896,7 @@ class TaskParser:
             "total_tasks": total,
             "parallel_groups": len(groups),
             "execution_groups": groups,
+            "unreachable_tasks": unreachable,
             "estimated_time_minutes": estimated_time,
             "models_needed": models_needed,
         }
@@ -467,17 +915,14 @@ if __name__ == "__main__":
 
     print(f"📝 Задача: {task_desc}\n")
 
-    # Классификация
-    print("🔍 Классификация...")
-    classification = parser.classify_task(task_desc)
+    # Классификация и декомпозиция одним запросом
+    print("🔍 Классификация и 📋 декомпозиция...")
+    with parser:
+        classification, graph = parser.plan(task_desc)
     print(f"   Тип: {classification['workflow_type']}")
     print(f"   Сложность: {classification['complexity']}")
     print(f"   Примерно задач: {classification['estimated_tasks']}")
 
-    # Декомпозиция
-    print("\n📋 Декомпозиция...")
-    graph = parser.decompose_task(task_desc)
-
     print(f"\n📊 Создано задач: {len(graph.tasks)}")
     for task in graph.tasks.values():
         deps = f" (depends: {task.depends_on})" if task.depends_on else ""
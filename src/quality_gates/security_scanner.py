@@ -46,6 +46,14 @@ class SecurityScannerGate(QualityGate):
         "models.yaml", "config.yaml", "settings.yaml",
     }
 
+    # Бинарные расширения, которые не сканируются
+    BINARY_EXTENSIONS = frozenset({".pyc", ".pyo", ".so", ".dylib", ".dll", ".exe", ".bin"})
+
+    # Директории, которые не сканируются: маркеры внутри пути и префиксы
+    IGNORE_DIRS = ("node_modules", ".git", ".venv", "venv", "__pycache__", "dist", "build")
+    _IGNORE_DIR_MARKERS = tuple(f"/{d}/" for d in IGNORE_DIRS)
+    _IGNORE_DIR_PREFIXES = tuple(f"{d}/" for d in IGNORE_DIRS)
+
     SECURITY_COMMANDS = {
         "python": {
             "code": "bandit -r . -f json",
@@ -102,16 +110,15 @@ class SecurityScannerGate(QualityGate):
                 return False
 
         # Игнорируем бинарные файлы
-        binary_extensions = {".pyc", ".pyo", ".so", ".dylib", ".dll", ".exe", ".bin"}
-        if file_path.suffix in binary_extensions:
+        if file_path.suffix in self.BINARY_EXTENSIONS:
             return False
 
         # Игнорируем node_modules, .git, etc.
         path_str = str(file_path)
-        ignore_dirs = {"node_modules", ".git", ".venv", "venv", "__pycache__", "dist", "build"}
-        for ignore_dir in ignore_dirs:
-            if f"/{ignore_dir}/" in path_str or path_str.startswith(f"{ignore_dir}/"):
-                return False
+        if path_str.startswith(self._IGNORE_DIR_PREFIXES):
+            return False
+        if any(marker in path_str for marker in self._IGNORE_DIR_MARKERS):
+            return False
 
         return True
 
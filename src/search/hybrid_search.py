@@ -9,6 +9,7 @@ Hybrid Search Engine для Code RAG.
 """
 
 import asyncio
+import inspect
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, Callable, Any
@@ -97,7 +98,7 @@ class HybridSearchEngine:
         """
         Args:
             qdrant_client: Клиент Qdrant
-            embed_fn: Функция для dense embeddings
+            embed_fn: Функция для dense embeddings (sync или async)
             sparse_embed_fn: Функция для sparse embeddings (indices, values)
             rerank_fn: Cross-encoder для re-ranking
         """
@@ -143,6 +144,13 @@ class HybridSearchEngine:
 
         return results[:query.limit]
 
+    async def _embed_query(self, text: str) -> np.ndarray:
+        """Dense embedding запроса (embed_fn может быть sync или async)."""
+        vector = self.embed(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        return vector
+
     async def _hybrid_search(
         self,
         query: SearchQuery,
@@ -158,7 +166,7 @@ class HybridSearchEngine:
         3. RRF fusion
         """
         # Получаем embeddings
-        dense_vector = self.embed(query.text)
+        dense_vector = await self._embed_query(query.text)
 
         # Формируем prefetch запросы
         prefetch_queries = [
@@ -207,7 +215,7 @@ class HybridSearchEngine:
         filter_conditions: Optional[Filter],
     ) -> list[SearchResult]:
         """Только dense vector search."""
-        dense_vector = self.embed(query.text)
+        dense_vector = await self._embed_query(query.text)
 
         response = self.client.query_points(
             collection_name=collection,
@@ -5,9 +5,11 @@ Integration Tests for Local Swarm
 """
 
 import asyncio
-import pytest
-from pathlib import Path
+import os
 import sys
+from pathlib import Path
+
+import pytest
 
 # Добавляем путь к модулям
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -57,6 +59,51 @@ class TestSerenaIntegration:
         finally:
             await serena.close()
 
+    def test_symbol_collector(self):
+        """Один обход AST: методы (и async) классов, вложенные функции не попадают"""
+        import ast
+        import textwrap
+
+        from src.integrations.serena_integration import _SymbolCollector
+
+        source = textwrap.dedent('''
+            class Outer:
+                """Doc"""
+                async def fetch(self):
+                    pass
+
+                def sync(self):
+                    def inner():
+                        pass
+
+                class Inner:
+                    def method(self):
+                        pass
+
+
+            async def top():
+                pass
+
+
+            def helper():
+                def nested():
+                    pass
+        ''')
+
+        collector = _SymbolCollector(with_docstrings=True)
+        collector.visit(ast.parse(source))
+
+        assert [(name, kind, path) for name, kind, path, *_ in collector.symbols] == [
+            ("Outer", "class", "Outer"),
+            ("fetch", "method", "Outer/fetch"),
+            ("sync", "method", "Outer/sync"),
+            ("Inner", "class", "Inner"),
+            ("method", "method", "Inner/method"),
+            ("top", "function", "top"),
+            ("helper", "function", "helper"),
+        ]
+        assert collector.symbols[0][3:] == (2, 13, "Doc")
+
 
 class TestGitIntegration:
     """Тесты для Git Integration"""
@@ -90,6 +137,95 @@ class TestGitIntegration:
         assert commits[0].hash is not None
         assert commits[0].message is not None
 
+    def test_parse_porcelain(self):
+        """Разбор porcelain: ведущий пробел первой строки — колонка статуса, а не отступ"""
+        from src.integrations.git_integration import GitIntegration, GitStatus
+
+        status = GitStatus()
+        GitIntegration._parse_porcelain(
+            b" M src/a.py\nM  b.py\n?? new.py\n D gone.py\nMM both.py\n", status
+        )
+
+        assert status.modified == ["src/a.py", "both.py"]
+        assert status.staged == ["b.py", "both.py"]
+        assert status.untracked == ["new.py"]
+        assert status.deleted == ["gone.py"]
+
+
+class TestLocalMCPClient:
+    """Тесты для Local MCP Client"""
+
+    @pytest.mark.asyncio
+    async def test_read_file_cache(self, tmp_path):
+        """Тест кэша read_file и его инвалидации при записи"""
+        from src.integrations.mcp_client import LocalMCPClient, MCPToolCall
+
+        client = LocalMCPClient(tmp_path)
+        (tmp_path / "a.txt").write_text("first")
+
+        read = MCPToolCall(server="filesystem", tool="read_file", params={"path": "a.txt"})
+        result = await client.call_tool(read)
+        assert result.data == "first"
+        assert (tmp_path / "a.txt") in client._read_cache
+
+        # Правка вне клиента видна сразу: локальные вызовы не кэшируются по TTL
+        path = tmp_path / "a.txt"
+        mtime_ns = path.stat().st_mtime_ns
+        path.write_text("edited")
+        os.utime(path, ns=(mtime_ns, mtime_ns + 1_000_000))  # mtime гарантированно новый
+        result = await client.call_tool(read)
+        assert result.data == "edited"
+
+        await client.call_tool(MCPToolCall(
+            server="filesystem",
+            tool="write_file",
+            params={"path": "a.txt", "content": "second"}
+        ))
+        assert (tmp_path / "a.txt") not in client._read_cache
+
+        result = await client.call_tool(read)
+        assert result.data == "second"
+
+    @pytest.mark.asyncio
+    async def test_remote_result_cache(self):
+        """Результаты MCP серверов кэшируются на TTL и выдаются копиями"""
+        from src.integrations.mcp_client import MCPClient, MCPToolCall, MCPToolResult
+
+        calls = []
+
+        class StubClient(MCPClient):
+            async def _call_tool(self, call, timeout=30):
+                calls.append(call.tool)
+                return MCPToolResult(success=True, data=["a.py"])
+
+        client = StubClient()
+        listing = MCPToolCall(server="serena", tool="list_directory", params={"path": "."})
+        first = await client.call_tool(listing)
+        first.data.append("changed")
+
+        assert (await client.call_tool(listing)).data == ["a.py"]
+        assert calls == ["list_directory"]
+
+    @pytest.mark.asyncio
+    async def test_read_message_framing(self):
+        """Сообщения сервера: построчный JSON и кадры Content-Length"""
+        from types import SimpleNamespace
+
+        from src.integrations.mcp_client import MCPClient
+
+        body = b'{"jsonrpc": "2.0",\n "id": 2}'
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"jsonrpc": "2.0", "id": 1}\n')
+        reader.feed_data(b"Content-Length: %d\r\nContent-Type: application/json\r\n\r\n" % len(body))
+        reader.feed_data(body)
+        reader.feed_eof()
+
+        client = MCPClient()
+        proc = SimpleNamespace(stdout=reader)
+        assert await client._read_message(proc) == b'{"jsonrpc": "2.0", "id": 1}\n'
+        assert await client._read_message(proc) == body
+        assert await client._read_message(proc) == b""
+
 
 class TestCodeContextManager:
     """Тесты для Code Context Manager"""
@@ -216,6 +352,232 @@ class TestTaskParser:
         assert task.type == TaskType.DOCUMENTATION
         assert task.status.value == "pending"
 
+    def test_graph_levels(self):
+        """Уровни Кана: параллельные группы, циклы и зависимости вне графа"""
+        from src.orchestrator.task_parser import Task, TaskGraph, TaskParser, TaskType
+
+        graph = TaskGraph()
+        for task_id, deps in [
+            ("a", []), ("b", ["a"]), ("c", ["a"]), ("d", ["b", "c"]),
+            ("x", ["y"]), ("y", ["x"]),  # цикл
+            ("z", ["missing"]),          # зависимость вне графа
+        ]:
+            graph.add_task(Task(id=task_id, title=task_id, description=task_id,
+                                type=TaskType.IMPLEMENTATION, depends_on=deps))
+
+        assert graph.levels == [["a"], ["b", "c"], ["d"]]
+
+        order = graph.get_execution_order()
+        assert sorted(order) == sorted(graph.tasks)
+        assert order.index("a") < order.index("b") < order.index("d")
+
+        with TaskParser() as parser:
+            estimate = parser.estimate_complexity(graph)
+        assert estimate["parallel_groups"] == 3
+        assert estimate["unreachable_tasks"] == ["x", "y", "z"]
+
+        # Новая задача сбрасывает закэшированные уровни
+        graph.add_task(Task(id="e", title="e", description="e",
+                            type=TaskType.TESTING, depends_on=["d"]))
+        assert graph.levels[-1] == ["e"]
+
+    def test_ready_counters(self):
+        """Готовность по счётчикам: завершение освобождает только последователей"""
+        from src.orchestrator.task_parser import Task, TaskGraph, TaskPriority, TaskStatus, TaskType
+
+        graph = TaskGraph()
+        for task_id, deps, priority in [
+            ("a", [], TaskPriority.MEDIUM),
+            ("b", ["a"], TaskPriority.LOW),
+            ("c", ["a"], TaskPriority.CRITICAL),
+            ("z", ["missing"], TaskPriority.MEDIUM),
+        ]:
+            graph.add_task(Task(id=task_id, title=task_id, description=task_id,
+                                type=TaskType.IMPLEMENTATION, priority=priority, depends_on=deps))
+
+        assert [t.id for t in graph.get_ready_tasks()] == ["a"]
+        assert graph.get_ready_tasks() == []
+
+        graph.mark_completed("a")
+        assert graph.tasks["a"].status == TaskStatus.COMPLETED
+        assert [t.id for t in graph.get_ready_tasks()] == ["c", "b"]
+
+        graph.mark_completed("a")  # повторно — без эффекта
+        assert graph.get_ready_tasks() == []
+        assert graph.tasks["z"].remaining_deps == 1
+
+    def test_parse_plan(self):
+        """Ответ PLAN_PROMPT: классификация с умолчаниями и граф задач"""
+        from src.orchestrator.task_parser import TaskParser, TaskPriority, TaskType
+
+        response = """План готов:
+```json
+{
+  "workflow_type": "bugfix",
+  "complexity": "simple",
+  "summary": "починить логин",
+  "tasks": [
+    {"id": "task_1", "title": "Fix", "description": "Исправить проверку пароля",
+     "type": "bugfix", "priority": 1, "depends_on": []},
+    {"id": "task_2", "title": "Test", "description": "Тест на логин",
+     "type": "testing", "depends_on": ["task_1"]}
+  ]
+}
+```"""
+        with TaskParser() as parser:
+            classification, graph = parser._parse_plan(response)
+
+        assert classification == {
+            "workflow_type": "bugfix",
+            "complexity": "simple",
+            "estimated_tasks": 3,
+            "needs_architecture": True,
+            "needs_testing": True,
+            "primary_language": "python",
+            "summary": "починить логин",
+        }
+        assert list(graph.tasks) == ["task_1", "task_2"]
+        assert graph.tasks["task_1"].type == TaskType.BUGFIX
+        assert graph.tasks["task_2"].priority == TaskPriority.MEDIUM
+        assert graph.tasks["task_1"].blocks == ["task_2"]
+        assert graph.root_task_id == "task_1"
+        assert graph.levels == [["task_1"], ["task_2"]]
+
+
+class TestExecutor:
+    """Тесты для Execution Scheduler"""
+
+    def test_scheduler_blocked_tasks(self):
+        """Циклы и зависимости вне графа не становятся готовыми и не зацикливают планировщик"""
+        from src.orchestrator.executor import _Scheduler
+        from src.orchestrator.task_parser import Task, TaskGraph, TaskType
+
+        graph = TaskGraph()
+        for task_id, deps in [
+            ("a", []), ("b", ["a"]),
+            ("x", ["y"]), ("y", ["x"]),  # цикл
+            ("z", ["missing"]),          # зависимость вне графа
+        ]:
+            graph.add_task(Task(id=task_id, title=task_id, description=task_id,
+                                type=TaskType.IMPLEMENTATION, depends_on=deps))
+
+        scheduler = _Scheduler(graph)
+        assert [t.id for t in scheduler.take()] == ["a"]
+        scheduler.complete("a")
+        assert [t.id for t in scheduler.take()] == ["b"]
+        scheduler.complete("b")
+
+        assert scheduler.take() == []
+        assert not scheduler.finished
+        assert scheduler.blocked() == ["x", "y", "z"]
+
+    def test_result_log_torn_tail(self, tmp_path):
+        """Оборванная запись в конце лога отбрасывается, новые записи читаются после переоткрытия"""
+        from src.orchestrator.executor import ExecutionResult, ResultLog
+
+        path = tmp_path / "results.log"
+        log = ResultLog(path)
+        log["a"] = ExecutionResult(task_id="a", success=True, output="first")
+        log["b"] = ExecutionResult(task_id="b", success=True, output="second")
+        log.close()
+
+        # Падение посреди записи: заголовок обещает больше байт, чем записано
+        with open(path, "ab") as f:
+            f.write(ResultLog._HEADER.pack(64) + b'{"task_id": "c"')
+
+        log = ResultLog(path)
+        assert sorted(log) == ["a", "b"]
+        assert log["b"].output == "second"
+        log["c"] = ExecutionResult(task_id="c", success=False, error="boom")
+        log.close()
+
+        log = ResultLog(path)
+        assert sorted(log) == ["a", "b", "c"]
+        assert log["c"].error == "boom"
+        log.close()
+
+    def test_retry_delay(self):
+        """Ошибки запроса не повторяются, перегрузка — с backoff"""
+        from src.orchestrator.executor import ExecutionResult, ExecutionScheduler
+
+        def delay(status_code, attempt=0):
+            result = ExecutionResult(task_id="t", success=False, status_code=status_code)
+            return ExecutionScheduler._retry_delay(result, attempt)
+
+        for status_code in (400, 404, 422):
+            assert delay(status_code) is None
+        for status_code in (429, 503, 504):
+            assert 0.5 <= delay(status_code) <= 1.0
+            assert 4.0 <= delay(status_code, attempt=3) <= 4.5
+            assert delay(status_code, attempt=10) == 30.0
+        assert delay(None) == 0.0
+        assert delay(500) == 0.0
+
+
+class TestSemanticCache:
+    """Тесты для Semantic Cache"""
+
+    def test_hit_and_persistence(self, tmp_path):
+        """Близкий запрос возвращает сохранённый ответ, кэш переживает перезапуск"""
+        import numpy as np
+
+        from src.orchestrator.semantic_cache import SemanticCache
+
+        vectors = {
+            "add health endpoint": [1.0, 0.0, 0.0],
+            "add a health endpoint": [0.99, 0.05, 0.0],
+            "fix login bug": [0.0, 1.0, 0.0],
+        }
+
+        def embed(texts):
+            return np.array([vectors[t] for t in texts])
+
+        path = tmp_path / "semcache.npz"
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"workflow_type": "feature"}
+
+        cache = SemanticCache(embed, threshold=0.95, path=path)
+        cache.get_or_compute("classification", "add health endpoint", compute)
+        assert cache.get_or_compute("classification", "add a health endpoint", compute) == {
+            "workflow_type": "feature"
+        }
+        assert len(calls) == 1
+
+        # Другой смысл и другое пространство имён — промах
+        cache.get_or_compute("classification", "fix login bug", compute)
+        cache.get_or_compute("review", "add health endpoint", compute)
+        assert len(calls) == 3
+
+        cache.flush()
+        reloaded = SemanticCache(embed, threshold=0.95, path=path)
+        reloaded.get_or_compute("classification", "add a health endpoint", compute)
+        assert len(calls) == 3
+
+        # Близкий запрос с другой областью (контекстом проекта) — промах
+        reloaded.get_or_compute("plan", "add health endpoint", compute, scope="repo-a")
+        reloaded.get_or_compute("plan", "add a health endpoint", compute, scope="repo-b")
+        assert len(calls) == 5
+        reloaded.get_or_compute("plan", "add a health endpoint", compute, scope="repo-a")
+        assert len(calls) == 5
+
+    def test_exact_entries(self, tmp_path):
+        """Точный кэш не отвечает на похожий текст и переживает перезапуск"""
+        from src.orchestrator.semantic_cache import SemanticCache
+
+        path = tmp_path / "semcache.npz"
+        cache = SemanticCache(lambda texts: [], path=path)
+        cache.put_exact("review", "def f(): return 1", {"success": True})
+
+        assert cache.get_exact("review", "def f(): return 2") is None
+        assert cache.get_exact("testing", "def f(): return 1") is None
+
+        cache.flush()
+        reloaded = SemanticCache(lambda texts: [], path=path)
+        assert reloaded.get_exact("review", "def f(): return 1") == {"success": True}
+
 
 # Запуск тестов
 if __name__ == "__main__":